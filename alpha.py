@@ -1,35 +1,58 @@
 from AlgorithmImports import *
-from datetime import timedelta
-from collections import deque
+from datetime import datetime, timedelta
 import numpy as np
 
-from trendCalculator import get_trend
-
-from macd_oracle import get_macd_score
-from bollinger_oracle import get_bollinger_buy_and_short
-from rsi_oracle import get_rsi_buy_short
+from trendCalculator import StreamingTrend
+from numpy_indicators import MACD, Bollinger, RSI, EMA, ADX, OBV, ATR, indicator_state, restore_indicator
+from numpy_indicators import load_macd, load_bollinger, load_rsi, load_ema, load_adx, load_obv, load_atr
+from lean_indicators import LeanMACD, LeanBollinger, LeanRSI, LeanEMA, LeanADX, LeanOBV, LeanATR
+
+from macd_oracle import get_macd_score_batch
+from bollinger_oracle import get_bollinger_buy_and_short_batch
+from rsi_oracle import get_rsi_buy_short_batch
+from ring_buffer import ColumnarRingStore, RingWindow, MirrorWindow
+from sliding_stats import CrossoverCount, SlidingExtremes, LastGradient
+from interop_benchmark import benchmark_interop
+from state_snapshot import StateSnapshot
+from daily_fanout import DailyBarFanout
+from symbol_lifecycle import SymbolLifecycle
+from evaluation_scheduler import EvaluationScheduler
+from screening import prefilter
+from funnel_telemetry import FunnelTelemetry, Gate
+from latency_profiler import LatencyProfiler
+from pending_entries import PendingEntries
+from trailing_stops import TrailingStops
+from chart_recorder import ChartRecorder
+
+# Update arguments for a daily bar, as DailyBarFanout selectors. The NumPy
+# indicators take floats; LEAN's take (EndTime, Close), the fan-out's default,
+# or the bar itself.
+def close_of(bar):
+    return (float(bar.Close),)
+
+def high_low_close_of(bar):
+    return (float(bar.High), float(bar.Low), float(bar.Close))
+
+def close_volume_of(bar):
+    return (float(bar.Close), float(bar.Volume))
+
+def bar_of(bar):
+    return (bar,)
 
 class custom_alpha(AlphaModel):
-    # contain bollinger band information
-    class bollinger_holder:
-        def __init__(self, lower, middle, upper, price):
-            self.lower = lower
-            self.middle = middle
-            self.upper = upper
-            self.price = price
-    
-    # contain macd information
-    class macd_holder:
-        def __init__(self, fast, slow, signal, macd, hist):
-            self.fast = fast
-            self.slow = slow
-            self.signal = signal
-            self.macd = macd
-            self.hist = hist
-
     def __init__(self, algo):
         self.algo = self
+        self.logger = algo.logger
         self.plotting = False
+        # symbols to chart when plotting; only these bypass the prefilter
+        self.plot_watch_list = ["MS", "HOOD", "DAL", "TOST", "APP"]
+        self.run_interop_benchmark = False
+        self.profile_latency = False
+        # LEAN's indicators unless set. The NumPy ones (numpy_indicators) can be
+        # snapshotted and warmed up vectorized, but their conventions are only
+        # checked against LEAN by tests/test_numpy_indicators.py, which needs a
+        # reference recorded with numpy_indicators.save_lean_reference.
+        self.use_numpy_indicators = False
        
 
         # MACD Parameters
@@ -44,6 +67,7 @@ class custom_alpha(AlphaModel):
 
         # EMA parameters
         self.ema_rolling_window_length = 250
+        self.ema_trend_threshold = 210
         self.derivative_threshold = .005
 
         # RSI Parameters
@@ -58,6 +82,9 @@ class custom_alpha(AlphaModel):
         self.obv_rolling_window_length = 150
         self.obv_threshold = .5 # maybe change around
 
+        self.screening_params = {'ema_trend_threshold': self.ema_trend_threshold, 'derivative_threshold': self.derivative_threshold,
+                                 'adx_threshold': self.adx_threshold}
+
         # ATR parameters
         self.atr_stop_multiplier = 3
 
@@ -72,10 +99,13 @@ class custom_alpha(AlphaModel):
         self.obv_trend_order = 2
         self.obv_K_order = 2
         
+        # every per-symbol table is owned by the lifecycle so removed symbols can be freed
+        self.lifecycle = SymbolLifecycle(algo)
+
         # Portfolio Management Parameters
-        self.look_for_entries = {}
-        self.entry_scores = {}
-        self.hold_length = {}
+        self.entry_expiry = 70
+        self.pending_entries = PendingEntries(self.entry_expiry)
+        self.entry_scores = self.lifecycle.table("entry_scores")
         self.max_position_size = .15
         self.activeStocks = set()
         self.insight_expiry = 14
@@ -83,32 +113,74 @@ class custom_alpha(AlphaModel):
         self.port_bias = 700
         
         # Indicators
-        self.trend_rolling_windows = {}
-        self.MACDS = {}
-        self.macd_consolidators = {}
-        self.MACDS_rolling_windows = {}
-        self.Bollingers = {}
-        self.bollinger_consolidators = {}
-        self.Bollingers_rolling_windows = {}
-        self.RSIS = {}
-        self.RSIS_trend = {}
-        self.RSIS_rolling_windows = {}
-        self.rsi_consolidators = {}
-        self.EMAS = {}
-        self.EMAS_rolling_windows = {}
-        self.ema_consolidators = {}
-        self.EMAS50 = {}
-        self.EMAS50_rolling_windows = {}
-        self.ema50_consolidators = {}
-        self.ADX = {}
-        self.adx_consolidators = {}
-        self.adx_rolling = {}
-        self.obvs = {}
-        self.obv_consolidators = {}
-        self.obvs_rolling = {}
-        self.ATRS = {}
-        self.atr_consolidators = {}
-        self.peak_prices = {}
+        self.trend_rolling_windows = self.lifecycle.table("trend_rolling_windows")
+        self.price_trend_trackers = self.lifecycle.table("price_trend_trackers")
+        self.MACDS = self.lifecycle.table("MACDS")
+        self.macd_store = ColumnarRingStore(self.macd_candles_history_size, ('fast', 'slow', 'signal', 'macd', 'hist'))
+        self.Bollingers = self.lifecycle.table("Bollingers")
+        self.bollinger_store = ColumnarRingStore(self.Bollinger_window_size, ('lower', 'middle', 'upper', 'price'))
+        self.RSIS = self.lifecycle.table("RSIS")
+        self.RSIS_trend = self.lifecycle.table("RSIS_trend")
+        self.RSIS_rolling_windows = self.lifecycle.table("RSIS_rolling_windows")
+        self.rsi_trend_trackers = self.lifecycle.table("rsi_trend_trackers")
+        self.EMAS = self.lifecycle.table("EMAS")
+        self.EMAS_rolling_windows = self.lifecycle.table("EMAS_rolling_windows")
+        self.ema_crossovers = self.lifecycle.table("ema_crossovers")
+        self.EMAS50 = self.lifecycle.table("EMAS50")
+        self.EMAS50_rolling_windows = self.lifecycle.table("EMAS50_rolling_windows")
+        self.ema50_gradients = self.lifecycle.table("ema50_gradients")
+        self.ADX = self.lifecycle.table("ADX")
+        self.adx_rolling = self.lifecycle.table("adx_rolling")
+        self.adx_extremes = self.lifecycle.table("adx_extremes")
+        self.obvs = self.lifecycle.table("obvs")
+        self.obvs_rolling = self.lifecycle.table("obvs_rolling")
+        self.obv_trend_trackers = self.lifecycle.table("obv_trend_trackers")
+        self.ATRS = self.lifecycle.table("ATRS")
+        # start of the last daily bar and end of the last hourly bar run through the indicators
+        self.last_daily_bar = self.lifecycle.table("last_daily_bar")
+        self.last_hourly_bar = self.lifecycle.table("last_hourly_bar")
+        self.trailing_stops = TrailingStops()
+
+        # one daily consolidator per symbol feeding every daily indicator
+        self.daily_fanout = DailyBarFanout(algo)
+        self.daily_fanout.subscribe(self.record_daily_bar)
+
+        # symbols whose inputs changed since their signal chain last ran
+        self.scheduler = EvaluationScheduler()
+
+        # diagnostic series recorded when plotting, saved at the end of the algorithm
+        self.charts = ChartRecorder(
+            (("price", "price"), ("price", "atr trail"), ("price", "peak"), ("price", "ema50"), ("price", "ema200"),
+             ("price", "bollinger_middle"), ("price", "bollinger_upper"), ("atr", "atr"), ("macd", "macd"), ("adx", "adx"),
+             ("obv trend", "obv trend"), ("obv", "obv"), ("trend", "price_trend"), ("trend", "rsi_trend"), ("rsi", "rsi"),
+             ("bollinger_score", "bollinger_score"), ("macd_score", "macd_score"), ("rsi_score", "rsi_score"),
+             ("derivative", "derivative"), ("ema_trend: ", "ema_trend")),
+            self.plot_watch_list, plot_interval=timedelta(days=1))
+
+        # per-phase timings of Update and OnSecuritiesChanged, off unless profile_latency is set
+        self.profiler = LatencyProfiler(self.profile_latency)
+
+        # per-gate rejection counts, aggregated daily
+        self.funnel = FunnelTelemetry(timedelta(days=1))
+        self.prefilter_gates = (Gate.DERIVATIVE, Gate.ADX_THRESHOLD, Gate.ADX_MAX)
+
+        # indicator state saved at the end of a run so the next start can skip the history warm-up
+        self.history_length = self.ema_rolling_window_length*3
+        self.snapshot_max_age = timedelta(days=14)
+        self.state_snapshot = StateSnapshot(algo)
+        self.restored_state = self.state_snapshot.load()
+        # snapshot symbols added during a warm-up that starts before the snapshot was taken
+        self.deferred_restores = set()
+        self.daily_fanout.subscribe(lambda bar: self.scheduler.mark(bar.Symbol))
+
+        for store in (self.macd_store, self.bollinger_store):
+            self.lifecycle.track_store(store)
+        self.lifecycle.on_release(self.daily_fanout.remove_symbol)
+        self.lifecycle.on_release(self.scheduler.discard)
+        self.lifecycle.on_release(self.deferred_restores.discard)
+        self.lifecycle.on_release(self.pending_entries.disarm)
+        self.lifecycle.on_release(self.trailing_stops.close)
+        self.lifecycle.on_release(self.charts.remove)
 
         self.universe_type = "equity"
         if self.universe_type != "equity":
@@ -121,233 +193,270 @@ class custom_alpha(AlphaModel):
         self.symbols_invested_in_last_iteration.add(algo.AddEquity("TOST", Resolution.Hour).Symbol)
         self.symbols_invested_in_last_iteration.add(algo.AddEquity("APP", Resolution.Hour).Symbol)
 
+        if self.run_interop_benchmark:
+            self.logger.info("window read benchmark (us): %s", benchmark_interop(self))
+
     def Update(self, algo, data):
-        self.nobuyreasons = []
+        self.funnel.roll(algo.Time)
         insights = []
         if self.symbols_invested_in_last_iteration != None:
             for symbol in self.symbols_invested_in_last_iteration:
                 self.activeStocks.add(symbol)
                 insight = Insight.price(symbol, timedelta(days=self.insight_expiry-4), InsightDirection.Up, weight = .75)
                 insights.append(insight)
-                algo.Log("added initial insight: " + str(symbol))
+                self.logger.info("added initial insight: %s", symbol)
         self.symbols_invested_in_last_iteration = None
+        self.lifecycle.release_flat()
+        if self.deferred_restores and algo.Time > self.restored_state[0]:
+            self.restore_deferred(algo)
 
 
         if self.universe_type != "equity" and self.universe_equity not in self.activeStocks:
             self.activeStocks.add(self.universe_equity) 
 
-        algo.Log("symbols in active stocks: " + str(len(self.activeStocks)))
-        for symbol in self.activeStocks:
-
-            # region update indicators
+        self.logger.debug("symbols in active stocks: %d", len(self.activeStocks))
+        ready_symbols = []
+        self.funnel.enter(len(self.activeStocks))
+        with self.profiler.phase("window updates"):
+            for symbol in self.activeStocks:
 
-            if not data.ContainsKey(symbol) or data[symbol] is None:
-                self.nobuyreasons.append("no data")
-                continue
+                # region update indicators
 
-            if not self.MACDS[symbol].IsReady:
-                self.nobuyreasons.append("macd not ready")
-                continue
-            
-            # if it is 10:00am 
-            if data[symbol].EndTime.hour == 10 and data[symbol].EndTime.minute == 0:
-                self.trend_rolling_windows[symbol].Add(data[symbol].Close)
-                self.Bollingers_rolling_windows[symbol].append(self.bollinger_holder(self.Bollingers[symbol].LowerBand.Current.Value, self.Bollingers[symbol].MiddleBand.Current.Value, self.Bollingers[symbol].UpperBand.Current.Value, data[symbol].price))
-                self.MACDS_rolling_windows[symbol].append(self.macd_holder(self.MACDS[symbol].Fast.Current.Value, self.MACDS[symbol].Slow.Current.Value, self.MACDS[symbol].Signal.Current.Value, self.MACDS[symbol].Current.Value, self.MACDS[symbol].histogram.Current.Value))
-                self.RSIS_rolling_windows[symbol].Add(self.RSIS_trend[symbol].Current.Value)
-                self.EMAS_rolling_windows[symbol].Add(self.EMAS[symbol].Current.Value)
-                self.EMAS50_rolling_windows[symbol].Add(self.EMAS50[symbol].Current.Value)
-                self.obvs_rolling[symbol].Add(self.obvs[symbol].Current.Value)
-                self.adx_rolling[symbol].Add(self.ADX[symbol].Current.Value)
+                if not data.ContainsKey(symbol) or data[symbol] is None:
+                    self.funnel.reject(Gate.NO_DATA)
+                    continue
+                if symbol in self.deferred_restores or not self.update_hourly(symbol, data[symbol]):
+                    self.funnel.reject(Gate.MACD_NOT_READY)
+                    continue
             
-            # endregion
-
-
-            price_trend = get_trend(self.trend_rolling_windows[symbol], self.trend_order, self.K_order)/data[symbol].price
-            rsi_trend = get_trend(self.RSIS_rolling_windows[symbol], self.rsi_trend_order, self.rsi_K_order)/self.RSIS[symbol].Current.Value
-            obv_trend = get_trend(self.obvs_rolling[symbol], self.obv_trend_order, self.obv_K_order)/abs(self.obvs[symbol].Current.Value)
+                # endregion
+                ready_symbols.append(symbol)
+
+        # the signal chain only runs for symbols whose windows, indicators or position changed
+        due_symbols = self.scheduler.take(ready_symbols)
+        self.funnel.reject(Gate.INPUTS_UNCHANGED, len(ready_symbols) - len(due_symbols))
+        ready_symbols = due_symbols
+
+        # stage one: the cheap EMA, slope and ADX gates for the whole universe at once
+        with self.profiler.phase("prefilter"):
+            ema_trends = [self.ema_crossovers[symbol].Value for symbol in ready_symbols]
+            derivatives = [self.ema50_derivative(symbol) for symbol in ready_symbols]
+            adxs = [self.ADX[symbol].Value for symbol in ready_symbols]
+            adx_maxes = [self.adx_extremes[symbol].Max for symbol in ready_symbols]
+            adx_mins = [self.adx_extremes[symbol].Min for symbol in ready_symbols]
+            long_mask, short_mask, long_reasons = prefilter(ema_trends, derivatives, adxs, adx_maxes, adx_mins, self.screening_params)
+
+            survivors, screened, screened_gates = [], [], []
+            for i, symbol in enumerate(ready_symbols):
+                # watched symbols are charted, so they are never screened out
+                if long_mask[i] or short_mask[i] or (self.plotting and self.charts.watching(symbol)):
+                    survivors.append(symbol)
+                elif long_reasons[i] >= 0:
+                    screened.append(symbol)
+                    screened_gates.append(self.prefilter_gates[long_reasons[i]])
+                else:
+                    self.funnel.reject(Gate.EMA_TREND)
+            ready_symbols = survivors
+
+        with self.profiler.phase("screened gates"):
+            self.reject_screened(screened, screened_gates, data)
+
+        # stage two: trend extraction and oracles for the survivors, one vectorized call each
+        with self.profiler.phase("bollinger oracle"):
+            bollinger_scores = self.batch_bollinger_scores(ready_symbols)
+        with self.profiler.phase("macd oracle"):
+            macd_scores = self.batch_macd_scores(ready_symbols)
+
+        with self.profiler.phase("price trend"):
+            price_trends = self.trend_ratios([self.price_trend_trackers[symbol].Value for symbol in ready_symbols], [data[symbol].price for symbol in ready_symbols])
+        with self.profiler.phase("obv trend"):
+            obv_trends = self.trend_ratios([self.obv_trend_trackers[symbol].Value for symbol in ready_symbols], [abs(self.obvs[symbol].Value) for symbol in ready_symbols])
+        with self.profiler.phase("rsi trend"):
+            rsi_trends = self.trend_ratios([self.rsi_trend_trackers[symbol].Value for symbol in ready_symbols], [self.RSIS[symbol].Value for symbol in ready_symbols])
+        with self.profiler.phase("rsi oracle"):
+            rsi_scores = get_rsi_buy_short_batch(price_trends, rsi_trends)
+
+        with self.profiler.phase("gating"):
+            for i, symbol in enumerate(ready_symbols):
+
+                price_trend = price_trends[i]
+                rsi_trend = rsi_trends[i]
+                obv_trend = obv_trends[i]
 
             
-            # if 50 ema has been above 200 ema for a while, trend is up
-            ema_trend = 0
-            ema50s = [x for x in self.EMAS50_rolling_windows[symbol]]
-            ema200s = [x for x in self.EMAS_rolling_windows[symbol]]
+                # if 50 ema has been above 200 ema for a while, trend is up
+                ema_trend = self.ema_crossovers[symbol].Value
             
-            for i in range(len(ema50s)):
-                if ema50s[i] > ema200s[i]:
-                    ema_trend += 1
-            
-            bollinger_score_buy_short = get_bollinger_buy_and_short(algo, self.Bollingers_rolling_windows[symbol], 1, self.bollinger_params)
-            macd_score = get_macd_score(self.MACDS_rolling_windows[symbol], 1, self.macd_params)  
-            rsi_score = get_rsi_buy_short(price_trend, rsi_trend)
-
-            prices = [x for x in self.EMAS50_rolling_windows[symbol]]
-            prices.reverse()
-            if len(prices) < 2:
-                derivative = 0
-            else:
-                derivative = np.gradient(prices)/self.EMAS50_rolling_windows[symbol][0]
-
-            # buy signal
-            if ema_trend >= 210:
-                # if in ema uptrend, buy if price between midle and upper bollinger
-                if bollinger_score_buy_short == 1:
-                    if macd_score == 1:
-                        if rsi_score == 1:
-                            if derivative[-1] > self.derivative_threshold:
-                                if self.ADX[symbol].Current.Value > self.adx_threshold:
-                                    max_adx = max(self.adx_rolling[symbol])
-                                    current_adx = self.ADX[symbol].Current.Value
-                                    if current_adx >= max_adx * .95:
-                                        if obv_trend > self.obv_threshold:
-                                            open_orders = algo.Transactions.GetOpenOrders(symbol)
-                                            if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
-                                                if symbol not in self.look_for_entries or self.look_for_entries[symbol] == 0:
-                                                    self.look_for_entries[symbol] = 1
-                                                    self.entry_scores[symbol] = abs(int(derivative[-1] * self.ADX[symbol].Current.Value * max(price_trend, 1) * max(rsi_trend, 1) * max(obv_trend, 1) * 100 + self.port_bias))
+                bollinger_score_buy_short = bollinger_scores[i]
+                macd_score = macd_scores[i]
+                rsi_score = rsi_scores[i]
+
+                derivative = self.ema50_derivative(symbol)
+
+                # buy signal
+                if ema_trend >= self.ema_trend_threshold:
+                    # if in ema uptrend, buy if price between midle and upper bollinger
+                    if bollinger_score_buy_short == 1:
+                        if macd_score == 1:
+                            if rsi_score == 1:
+                                if derivative > self.derivative_threshold:
+                                    if self.ADX[symbol].Value > self.adx_threshold:
+                                        max_adx = self.adx_extremes[symbol].Max
+                                        current_adx = self.ADX[symbol].Value
+                                        if current_adx >= max_adx * .95:
+                                            if obv_trend > self.obv_threshold:
+                                                open_orders = algo.Transactions.GetOpenOrders(symbol)
+                                                if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
+                                                    if self.pending_entries.direction(symbol) == 0:
+                                                        self.pending_entries.arm(symbol, 1)
+                                                        self.entry_scores[symbol] = abs(int(derivative * self.ADX[symbol].Value * max(price_trend, 1) * max(rsi_trend, 1) * max(obv_trend, 1) * 100 + self.port_bias))
+                                            else:
+                                                self.funnel.reject(Gate.OBV)
                                         else:
-                                            self.nobuyreasons.append("obv trend too low: ")
+                                            self.funnel.reject(Gate.ADX_MAX)
                                     else:
-                                        self.nobuyreasons.append("adx not at max")
+                                        self.funnel.reject(Gate.ADX_THRESHOLD)
                                 else:
-                                    self.nobuyreasons.append("adx below threshold")
+                                    self.funnel.reject(Gate.DERIVATIVE)
                             else:
-                                self.nobuyreasons.append("not in derivative uptrend")
+                                self.funnel.reject(Gate.RSI)
                         else:
-                            self.nobuyreasons.append("not in rsi uptrend")
+                            self.funnel.reject(Gate.MACD)
                     else:
-                        self.nobuyreasons.append("not in macd uptrend")
+                        self.funnel.reject(Gate.BOLLINGER)
                 else:
-                    self.nobuyreasons.append("not in bollinger uptrend")
-            else:
-                self.nobuyreasons.append("not in ema uptrend")
-                if bollinger_score_buy_short == 2:
-                    if macd_score == 2:
-                        if rsi_score == 2:
-                            if derivative[-1] < -self.derivative_threshold:
-                                if self.ADX[symbol].Current.Value > self.adx_threshold:
-                                    min_adx = min(self.adx_rolling[symbol])
-                                    current_adx = self.ADX[symbol].Current.Value
-                                    if current_adx <= min_adx * 1.05:
-                                        if obv_trend < -self.obv_threshold:
-                                            open_orders = algo.Transactions.GetOpenOrders(symbol)
-                                            if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
-                                                self.look_for_entries[symbol] = -1
-                                                self.entry_scores[symbol] = abs(int(derivative[-1] * self.ADX[symbol].Current.Value * max(price_trend, 1) * max(rsi_trend, 1) * max(obv_trend, 1) * 100 + self.port_bias))
-
-            # generate sell signal
-            #if self.RSIS[symbol].Current.Value < 50:
-            ###    if algo.Portfolio[symbol].Invested and algo.Portfolio[symbol].IsLong:
-            #        insight = Insight.price(symbol, timedelta(days=self.insight_expiry_sell), InsightDirection.Flat, weight = 1)
-            #        insights.append(insight)
-            #if self.RSIS[symbol].Current.Value > 50:
-            #    if algo.Portfolio[symbol].Invested and algo.Portfolio[symbol].IsShort:
-            #        insight = Insight.price(symbol, timedelta(days=self.insight_expiry_sell), InsightDirection.Flat, weight = 1)
-            #        insights.append(insight)
+                    self.funnel.reject(Gate.EMA_TREND)
+                    if bollinger_score_buy_short == 2:
+                        if macd_score == 2:
+                            if rsi_score == 2:
+                                if derivative < -self.derivative_threshold:
+                                    if self.ADX[symbol].Value > self.adx_threshold:
+                                        min_adx = self.adx_extremes[symbol].Min
+                                        current_adx = self.ADX[symbol].Value
+                                        if current_adx <= min_adx * 1.05:
+                                            if obv_trend < -self.obv_threshold:
+                                                open_orders = algo.Transactions.GetOpenOrders(symbol)
+                                                if not algo.Portfolio[symbol].Invested and len(open_orders) == 0:
+                                                    self.pending_entries.arm(symbol, -1)
+                                                    self.entry_scores[symbol] = abs(int(derivative * self.ADX[symbol].Value * max(price_trend, 1) * max(rsi_trend, 1) * max(obv_trend, 1) * 100 + self.port_bias))
+
+                # generate sell signal
+                #if self.RSIS[symbol].Value < 50:
+                ###    if algo.Portfolio[symbol].Invested and algo.Portfolio[symbol].IsLong:
+                #        insight = Insight.price(symbol, timedelta(days=self.insight_expiry_sell), InsightDirection.Flat, weight = 1)
+                #        insights.append(insight)
+                #if self.RSIS[symbol].Value > 50:
+                #    if algo.Portfolio[symbol].Invested and algo.Portfolio[symbol].IsShort:
+                #        insight = Insight.price(symbol, timedelta(days=self.insight_expiry_sell), InsightDirection.Flat, weight = 1)
+                #        insights.append(insight)
             
-            if self.plotting:
-                if symbol in self.peak_prices and self.peak_prices[symbol] != None:
-                    algo.Plot("price", "atr trail", self.peak_prices[symbol] - self.atr_stop_multiplier * self.ATRS[symbol].Current.Value)
-                    algo.Plot("price", "peak", self.peak_prices[symbol])
-                algo.Plot("atr", "atr", self.ATRS[symbol].Current.Value)
-                algo.Plot("macd", "macd", self.MACDS[symbol].Current.Value)
-                algo.Plot("adx", "adx", self.ADX[symbol].Current.Value)
-                algo.Plot("obv trend", "obv trend", obv_trend)
-                algo.Plot("obv", "obv", self.obvs[symbol].Current.Value)
-                algo.Plot("trend", "price_trend", price_trend)
-                algo.Plot("trend", "rsi_trend", rsi_trend)
-                algo.Plot("rsi", "rsi", self.RSIS[symbol].Current.Value)
-
-                algo.Plot("price", "ema50", self.EMAS50[symbol].Current.Value)
-                algo.Plot("price", "ema200", self.EMAS[symbol].Current.Value)
-
-                algo.Plot("bollinger_score", "bollinger_score", bollinger_score_buy_short)
-                algo.Plot("macd_score", "macd_score", macd_score)
-                algo.Plot("rsi_score", "rsi_score", rsi_score)
-
-                algo.Plot("derivative", "derivative", derivative[-1])
-
-                algo.Plot("ema_trend: ", "ema_trend", ema_trend)
-                algo.Plot("price", "price", data[symbol].Close)
-                algo.Plot("price", "bollinger_middle", self.Bollingers[symbol].MiddleBand.Current.Value)
-                algo.Plot("price", "bollinger_upper", self.Bollingers[symbol].UpperBand.Current.Value)
-                algo.Plot("trend", "price_trend", price_trend)
-
-        # print out by order of most the nobuyreasons and their number of occurences
-        for reason in sorted(set(self.nobuyreasons), key = lambda x: self.nobuyreasons.count(x), reverse = True):
-            algo.Log(reason + ": " + str(self.nobuyreasons.count(reason)))  
-
-
-
-        if len(self.look_for_entries.keys()) > 0:
-            for key in self.look_for_entries:
-                if self.look_for_entries[key] > 0:
-                    self.look_for_entries[key] += 1
-                    if self.look_for_entries[key] > 70:
-                        self.look_for_entries[key] = 0
-                        self.hold_length[key] = None
-                    else:
-                        #self.Log("Looking for entry for: " + str(key))
-                        if self.trend_rolling_windows[key][0] > self.Bollingers[key].MiddleBand.Current.Value:
-                            #insight = Insight(key, timedelta(days=2), InsightType.PRICE, InsightDirection.Down, self.entry_scores[key])
-                            insight = Insight.price(key, timedelta(days=self.insight_expiry), InsightDirection.Up, weight = self.entry_scores[key])
-                            self.peak_prices[key] = data[key].price
-                            self.hold_length[key] = 1
-                            insights.append(insight)
-                            self.look_for_entries[key] = 0
-                elif self.look_for_entries[key] < 0:
-                    self.look_for_entries[key] -= 1
-                    if self.look_for_entries[key] < -70:
-                        self.look_for_entries[key] = 0
-                        self.hold_length[key] = None
-                    else:
-                        #self.Log("Looking for entry for: " + str(key))
-                        if self.trend_rolling_windows[key][0] < self.Bollingers[key].MiddleBand.Current.Value:
-                            #insight = Insight(key, timedelta(days=2), InsightType.PRICE, InsightDirection.Down, self.entry_scores[key])
-                            insight = Insight.price(key, timedelta(days=self.insight_expiry), InsightDirection.Down, weight = self.entry_scores[key])
-                            insights.append(insight)
-                            self.peak_prices[key] = data[key].price
-                            self.hold_length[key] = -1
-                            self.look_for_entries[key] = 0
-            # endregion
-
-        added_insights = self.atr_trail_stop_loss(algo, data)
+                if self.plotting and self.charts.due(symbol, algo.Time):
+                    peak = self.trailing_stops.peak(symbol) if symbol in self.trailing_stops else np.nan
+                    self.charts.record(symbol, algo.Time, (
+                        data[symbol].Close, peak - self.atr_stop_multiplier * self.ATRS[symbol].Value, peak,
+                        self.EMAS50[symbol].Value, self.EMAS[symbol].Value,
+                        self.Bollingers[symbol].Middle, self.Bollingers[symbol].Upper,
+                        self.ATRS[symbol].Value, self.MACDS[symbol].Value, self.ADX[symbol].Value,
+                        obv_trend, self.obvs[symbol].Value, price_trend, rsi_trend, self.RSIS[symbol].Value,
+                        bollinger_score_buy_short, macd_score, rsi_score, derivative, ema_trend))
+
+        if self.plotting:
+            self.charts.plot(algo)
+
+        with self.profiler.phase("entry scanning"):
+            # armed entries lapse after entry_expiry bars
+            for key in self.pending_entries.advance():
+                self.trailing_stops.stop_counting(key)
+
+            # enter once price crosses the middle band in the armed direction
+            armed = self.pending_entries.symbols
+            prices = [self.trend_rolling_windows[key][0] for key in armed]
+            middles = [self.Bollingers[key].Middle for key in armed]
+            for key, direction in self.pending_entries.triggered(prices, middles):
+                insight_direction = InsightDirection.Up if direction > 0 else InsightDirection.Down
+                insights.append(Insight.price(key, timedelta(days=self.insight_expiry), insight_direction, weight = self.entry_scores[key]))
+                self.trailing_stops.open(key, data[key].price, self.atr_stop_multiplier, direction)
+                self.pending_entries.disarm(key)
+
+        with self.profiler.phase("atr trailing stop"):
+            added_insights = self.atr_trail_stop_loss(algo, data)
         for insight in added_insights:
             insights.append(insight)
         return insights
-    
+
+    def reject_screened(self, symbols, prefilter_gates, data):
+        '''
+        Counts the EMA-uptrend symbols the prefilter screened out under the gate
+        the full chain rejects them at. The Bollinger, MACD and RSI gates come
+        before the slope and ADX gates, so those scores are still computed for them.
+        '''
+        if not symbols:
+            return
+        bollinger_scores = self.batch_bollinger_scores(symbols)
+        macd_scores = self.batch_macd_scores(symbols)
+        price_trends = self.trend_ratios([self.price_trend_trackers[symbol].Value for symbol in symbols], [data[symbol].price for symbol in symbols])
+        rsi_trends = self.trend_ratios([self.rsi_trend_trackers[symbol].Value for symbol in symbols], [self.RSIS[symbol].Value for symbol in symbols])
+        rsi_scores = get_rsi_buy_short_batch(price_trends, rsi_trends)
+        for i, prefilter_gate in enumerate(prefilter_gates):
+            if bollinger_scores[i] != 1:
+                self.funnel.reject(Gate.BOLLINGER)
+            elif macd_scores[i] != 1:
+                self.funnel.reject(Gate.MACD)
+            elif rsi_scores[i] != 1:
+                self.funnel.reject(Gate.RSI)
+            else:
+                self.funnel.reject(prefilter_gate)
+
+    def ema50_derivative(self, symbol):
+        # slope of the last two 50 ema values relative to the latest one
+        ema50_gradient = self.ema50_gradients[symbol]
+        return ema50_gradient.Value/ema50_gradient.latest if ema50_gradient.latest is not None else 0
+
+    def trend_ratios(self, trends, scales):
+        # a zero scale (an OBV or daily RSI of exactly 0) gives no trend rather than an infinite one
+        trends = np.asarray(trends, dtype=np.float64)
+        scales = np.asarray(scales, dtype=np.float64)
+        ratios = np.zeros(len(trends))
+        np.divide(trends, scales, out=ratios, where=scales != 0)
+        return ratios
+
+    def windows_advanced(self, symbol):
+        self.scheduler.mark(symbol)
+
+    def on_order_event(self, order_event):
+        # fills and cancellations change holdings and open orders, which the entry gates read
+        self.scheduler.mark(order_event.Symbol)
+
+    def batch_bollinger_scores(self, symbols):
+        lowers, counts = self.bollinger_store.gather(symbols, 'lower')
+        middles, _ = self.bollinger_store.gather(symbols, 'middle')
+        uppers, _ = self.bollinger_store.gather(symbols, 'upper')
+        prices, _ = self.bollinger_store.gather(symbols, 'price')
+        return get_bollinger_buy_and_short_batch(lowers, middles, uppers, prices, 1, self.bollinger_params, counts)
+
+    def batch_macd_scores(self, symbols):
+        macds, counts = self.macd_store.gather(symbols, 'macd', newest_first=False)
+        return get_macd_score_batch(macds, 1, self.macd_params, counts)
+
     def atr_trail_stop_loss(self, algo, data):
         added_insights = []
-        for key in algo.Portfolio.Keys:
-            if key in self.peak_prices and self.peak_prices[key] != None and key in self.hold_length:
-                if self.hold_length[key] != None:
-                    self.hold_length[key] += 1
-                if algo.Portfolio[key].IsLong:
-                    if key in data and data[key] != None:
-                        price = data[key].price
-                    else:
-                        price = self.trend_rolling_windows[key][0]
-                    if price > self.peak_prices[key]: 
-                        self.peak_prices[key] = price
-                    if price < self.peak_prices[key] - self.atr_stop_multiplier * self.ATRS[key].Current.Value:
-                        added_insights.append(Insight.price(key, timedelta(days=7), InsightDirection.Flat, weight = 1))
-                        algo.Log("liquidating long " + str(key) + " price is: " + str(price) + " peak price is: " + str(self.peak_prices[key]) + " atr is: " + str(self.ATRS[key].Current.Value))
-                        algo.Liquidate(key)
-                        self.hold_length[key] = None
-                        self.peak_prices[key] = None
-                else:
-                    if key in data and data[key] != None:
-                        price = data[key].price
-                    else:
-                        price = self.trend_rolling_windows[key][0]
-                    if price < self.peak_prices[key]:
-                        self.peak_prices[key] = price
-                    if price > self.peak_prices[key] + self.atr_stop_multiplier * self.ATRS[key].Current.Value:
-                        added_insights.append(Insight.price(key, timedelta(days=7), InsightDirection.Flat, weight = 1))
-                        algo.Log("liquidating short " + str(key) + " price is: " + str(price) + " peak price is: " + str(self.peak_prices[key]) + " atr is: " + str(self.ATRS[key].Current.Value))
-                        algo.Liquidate(key)
-                        self.hold_length[key] = None
-                        self.peak_prices[key] = None
+        stops = self.trailing_stops
+        if len(stops) == 0:
+            return added_insights
+
+        prices = [data[key].price if key in data and data[key] != None else self.trend_rolling_windows[key][0] for key in stops.symbols]
+        atrs = [self.ATRS[key].Value for key in stops.symbols]
+        is_long = [algo.Portfolio[key].IsLong for key in stops.symbols]
+        for i in stops.update(prices, atrs, is_long):
+            key = stops.symbols[i]
+            added_insights.append(Insight.price(key, timedelta(days=7), InsightDirection.Flat, weight = 1))
+            self.logger.info("liquidating %s %s price is: %s peak price is: %s atr is: %s", "long" if is_long[i] else "short", key, prices[i], stops.peaks[i], atrs[i])
+
+        # closing a trail reorders the arrays, so only after every stop has been read
+        for insight in added_insights:
+            algo.Liquidate(insight.Symbol)
+            self.scheduler.mark(insight.Symbol)
+            stops.close(insight.Symbol)
         return added_insights
 
     def OnSecuritiesChanged(self, algo, changes):
@@ -355,92 +464,447 @@ class custom_alpha(AlphaModel):
         for x in changes.RemovedSecurities:
             if x.Symbol in self.activeStocks:
                 self.activeStocks.remove(x.Symbol)
+            self.lifecycle.remove(x.Symbol)
 
         # can't open positions here since data might not be added correctly yet
+        added_symbols = []
         for x in changes.AddedSecurities:
             self.activeStocks.add(x.Symbol) 
-
-            self.trend_rolling_windows[x.Symbol] = RollingWindow[float](self.price_rolling_window_length)
-
-            self.MACDS[x.Symbol] = MovingAverageConvergenceDivergence(12, 26, 9, MovingAverageType.Exponential)
-            self.macd_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.MACDS[x.Symbol], self.macd_consolidators[x.Symbol])
-            self.MACDS_rolling_windows[x.Symbol] = deque(maxlen=self.macd_candles_history_size)
-           
-            self.Bollingers[x.Symbol] = BollingerBands(20, 2, MovingAverageType.Simple)
-            self.bollinger_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.Bollingers[x.Symbol], self.bollinger_consolidators[x.Symbol])
-            self.Bollingers_rolling_windows[x.Symbol] = deque(maxlen=self.Bollinger_window_size)
-
-            self.RSIS_trend[x.Symbol] = algo.rsi(x.Symbol, 14, Resolution.Hour)
-            self.RSIS[x.Symbol] = RelativeStrengthIndex(14)
-            self.rsi_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.RSIS[x.Symbol], self.rsi_consolidators[x.Symbol])
-            self.RSIS_rolling_windows[x.Symbol] = RollingWindow[float](self.RSIS_rolling_window_length)
-
-            self.EMAS[x.Symbol] = ExponentialMovingAverage(200)
-            self.ema_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.EMAS[x.Symbol], self.ema_consolidators[x.Symbol])
-            self.EMAS_rolling_windows[x.Symbol] = RollingWindow[float](self.ema_rolling_window_length)
-            
-            self.EMAS50[x.Symbol] = ExponentialMovingAverage(50)
-            self.ema50_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.EMAS50[x.Symbol], self.ema50_consolidators[x.Symbol])
-            self.EMAS50_rolling_windows[x.Symbol] = RollingWindow[float](self.ema_rolling_window_length)
-
-            self.ADX[x.Symbol] = AverageDirectionalIndex(14)
-            self.adx_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.ADX[x.Symbol], self.adx_consolidators[x.Symbol])
-            self.adx_rolling[x.Symbol] = RollingWindow[float](self.adx_rolling_window_length)
-
-            self.obvs[x.Symbol] = OnBalanceVolume()
-            self.obv_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.obvs[x.Symbol], self.obv_consolidators[x.Symbol])
-            self.obvs_rolling[x.Symbol] = RollingWindow[float](self.obv_rolling_window_length)
-
-            self.ATRS[x.Symbol] = AverageTrueRange(14)
-            self.atr_consolidators[x.Symbol] = TradeBarConsolidator(timedelta(days=1))
-            algo.register_indicator(x.Symbol, self.ATRS[x.Symbol], self.atr_consolidators[x.Symbol])
-
-            history = algo.History[TradeBar](x.Symbol,self.ema_rolling_window_length*3, Resolution.Hour)
-            history2 = algo.History[TradeBar](x.Symbol,self.ema_rolling_window_length*3, Resolution.Daily)
-            for bar in history:
-                self.RSIS_trend[x.Symbol].Update(bar.EndTime, bar.Close)
-                self.RSIS_rolling_windows[x.Symbol].Add(self.RSIS_trend[x.Symbol].Current.Value)
-            
-            for bar in history2:
-                self.trend_rolling_windows[x.Symbol].Add(bar.Close)
-
-                self.MACDS[x.Symbol].Update(bar.EndTime, bar.Close)
-                new_macd = self.macd_holder(self.MACDS[x.Symbol].Fast.Current.Value, self.MACDS[x.Symbol].Slow.Current.Value, self.MACDS[x.Symbol].Signal.Current.Value, self.MACDS[x.Symbol].Current.Value, self.MACDS[x.Symbol].histogram.Current.Value)
-                self.MACDS_rolling_windows[x.Symbol].append(new_macd)
-                
-                self.Bollingers[x.Symbol].Update(bar.EndTime, bar.Close)
-                new_bol = self.bollinger_holder(self.Bollingers[x.Symbol].LowerBand.Current.Value, self.Bollingers[x.Symbol].MiddleBand.Current.Value, self.Bollingers[x.Symbol].UpperBand.Current.Value, bar.Close)
-                self.Bollingers_rolling_windows[x.Symbol].append(new_bol)
-                
-                self.RSIS[x.Symbol].Update(bar.EndTime, bar.Close)
-
-                self.EMAS[x.Symbol].Update(bar.EndTime, bar.Close)
-                self.EMAS_rolling_windows[x.Symbol].Add(self.EMAS[x.Symbol].Current.Value)
-                self.EMAS50[x.Symbol].Update(bar.EndTime, bar.Close)
-                self.EMAS50_rolling_windows[x.Symbol].Add(self.EMAS50[x.Symbol].Current.Value)
-
-                self.ADX[x.Symbol].Update(bar)
-                self.adx_rolling[x.Symbol].Add(self.ADX[x.Symbol].Current.Value)
-
-                self.obvs[x.Symbol].Update(bar)
-                self.obvs_rolling[x.Symbol].Add(self.obvs[x.Symbol].Current.Value)
-
-                self.ATRS[x.Symbol].Update(bar)
-
+            self.lifecycle.keep(x.Symbol)
+            self.daily_fanout.add_symbol(x.Symbol)
+            self.last_daily_bar.pop(x.Symbol, None)
+            self.last_hourly_bar.pop(x.Symbol, None)
+
+            # the daily indicators are updated by the fan-out, the hourly RSI by update_hourly
+            self.trend_rolling_windows[x.Symbol] = MirrorWindow(self.price_rolling_window_length)
+            self.price_trend_trackers[x.Symbol] = StreamingTrend(self.price_rolling_window_length, self.trend_order, self.K_order)
+
+            self.create_indicators(x.Symbol)
+            self.macd_store.add_symbol(x.Symbol)
+            self.bollinger_store.add_symbol(x.Symbol)
+
+            self.RSIS_rolling_windows[x.Symbol] = MirrorWindow(self.RSIS_rolling_window_length)
+            self.rsi_trend_trackers[x.Symbol] = StreamingTrend(self.RSIS_rolling_window_length, self.rsi_trend_order, self.rsi_K_order)
+
+            self.EMAS_rolling_windows[x.Symbol] = MirrorWindow(self.ema_rolling_window_length)
+            self.ema_crossovers[x.Symbol] = CrossoverCount(self.ema_rolling_window_length)
+            self.EMAS50_rolling_windows[x.Symbol] = MirrorWindow(self.ema_rolling_window_length)
+            self.ema50_gradients[x.Symbol] = LastGradient()
+
+            self.adx_rolling[x.Symbol] = MirrorWindow(self.adx_rolling_window_length)
+            self.adx_extremes[x.Symbol] = SlidingExtremes(self.adx_rolling_window_length)
+
+            self.obvs_rolling[x.Symbol] = MirrorWindow(self.obv_rolling_window_length)
+            self.obv_trend_trackers[x.Symbol] = StreamingTrend(self.obv_rolling_window_length, self.obv_trend_order, self.obv_K_order)
+
+            added_symbols.append(x.Symbol)
+
+        if len(added_symbols) > 0:
+            with self.profiler.phase("history warm-up"):
+                self.warm_up(algo, added_symbols)
+
+    def create_indicators(self, symbol):
+        '''
+        Creates the symbol's indicators, NumPy or LEAN, and registers the daily
+        ones with the fan-out
+        '''
+        if self.use_numpy_indicators:
+            macd, bollinger, rsi, ema, adx, obv, atr = MACD, Bollinger, RSI, EMA, ADX, OBV, ATR
+            close, bar, volume_bar = close_of, high_low_close_of, close_volume_of
+        else:
+            macd, bollinger, rsi, ema, adx, obv, atr = LeanMACD, LeanBollinger, LeanRSI, LeanEMA, LeanADX, LeanOBV, LeanATR
+            close, bar, volume_bar = None, bar_of, bar_of
+
+        self.MACDS[symbol] = macd(12, 26, 9)
+        self.Bollingers[symbol] = bollinger(20, 2)
+        self.RSIS[symbol] = rsi(14)
+        # updated with the hourly bars by update_hourly_rsi
+        self.RSIS_trend[symbol] = rsi(14)
+        self.EMAS[symbol] = ema(200)
+        self.EMAS50[symbol] = ema(50)
+        self.ADX[symbol] = adx(14)
+        self.obvs[symbol] = obv()
+        self.ATRS[symbol] = atr(14)
+        for table, selector in ((self.MACDS, close), (self.Bollingers, close), (self.RSIS, close), (self.EMAS, close),
+                                (self.EMAS50, close), (self.ADX, bar), (self.obvs, volume_bar), (self.ATRS, bar)):
+            self.daily_fanout.register_indicator(symbol, table[symbol], selector)
+
+    def warm_up(self, algo, symbols):
+        '''
+        Primes the indicators and windows of newly added symbols. Symbols found in
+        the start-up snapshot are restored from it; the rest are warmed from one
+        multi-symbol history request per resolution.
+        '''
+        restored = self.restore_from_snapshot(algo, symbols)
+        symbols = [symbol for symbol in symbols if symbol not in restored]
+        if len(symbols) == 0:
+            return
+
+        hourly_history = self.history_by_symbol(symbols, algo.History[TradeBar](symbols, self.history_length, Resolution.Hour))
+        daily_history = self.history_by_symbol(symbols, algo.History[TradeBar](symbols, self.history_length, Resolution.Daily))
+        if self.use_numpy_indicators:
+            self.load_history(symbols, hourly_history, daily_history)
+        else:
+            for symbol in symbols:
+                self.replay_history(symbol, hourly_history[symbol], daily_history[symbol])
+        for symbol in symbols:
+            self.windows_advanced(symbol)
+
+    def replay_history(self, symbol, hourly_bars, daily_bars):
+        '''
+        Runs bars through the indicators. Every bar goes through the LEAN
+        indicators, whose state can't be set from Python, but indicator values
+        are only read for the bars that end up inside a window.
+        '''
+        rsi_start = len(hourly_bars) - self.RSIS_rolling_window_length
+        for i, bar in enumerate(hourly_bars):
+            self.update_hourly_rsi(symbol, bar)
+            if i >= rsi_start:
+                rsi = self.RSIS_trend[symbol].Value
+                self.RSIS_rolling_windows[symbol].Add(rsi)
+                self.rsi_trend_trackers[symbol].Add(rsi)
+
+        # index of the first bar that survives in each window
+        price_start = len(daily_bars) - self.price_rolling_window_length
+        macd_start = len(daily_bars) - self.macd_candles_history_size
+        bollinger_start = len(daily_bars) - self.Bollinger_window_size
+        ema_start = len(daily_bars) - self.ema_rolling_window_length
+        adx_start = len(daily_bars) - self.adx_rolling_window_length
+        obv_start = len(daily_bars) - self.obv_rolling_window_length
+        for i, bar in enumerate(daily_bars):
+            self.update_daily_indicators(bar)
+            close = float(bar.Close)
+
+            if i >= price_start:
+                self.trend_rolling_windows[symbol].Add(close)
+                self.price_trend_trackers[symbol].Add(close)
+
+            if i >= macd_start:
+                macd = self.MACDS[symbol]
+                self.macd_store.append(symbol, macd.Fast.Value, macd.Slow.Value, macd.Signal.Value, macd.Value, macd.Histogram)
+
+            if i >= bollinger_start:
+                bollinger = self.Bollingers[symbol]
+                self.bollinger_store.append(symbol, bollinger.Lower, bollinger.Middle, bollinger.Upper, close)
+
+            if i >= ema_start:
+                ema200 = self.EMAS[symbol].Value
+                ema50 = self.EMAS50[symbol].Value
+                self.EMAS_rolling_windows[symbol].Add(ema200)
+                self.EMAS50_rolling_windows[symbol].Add(ema50)
+                self.ema_crossovers[symbol].Add(ema50, ema200)
+                self.ema50_gradients[symbol].Add(ema50)
+
+            if i >= adx_start:
+                adx = self.ADX[symbol].Value
+                self.adx_rolling[symbol].Add(adx)
+                self.adx_extremes[symbol].Add(adx)
+
+            if i >= obv_start:
+                obv = self.obvs[symbol].Value
+                self.obvs_rolling[symbol].Add(obv)
+                self.obv_trend_trackers[symbol].Add(obv)
+
+    def load_history(self, symbols, hourly_history, daily_history):
+        '''
+        replay_history for the NumPy indicators, for all symbols at once: the
+        indicator series are computed from (symbols x bars) arrays, every
+        indicator is left in the state its last Update would leave it in and
+        the windows and stores are loaded from the series' tails. Only the
+        trend trackers still take the values one at a time.
+        '''
+        hourly = self.history_arrays(symbols, hourly_history, ('Close',))
+        daily = self.history_arrays(symbols, daily_history, ('High', 'Low', 'Close', 'Volume'))
+        high, low, close, volume = daily['High'], daily['Low'], daily['Close'], daily['Volume']
+        hourly_counts = [len(hourly_history[symbol]) for symbol in symbols]
+        daily_counts = [len(daily_history[symbol]) for symbol in symbols]
+
+        def tables(table):
+            return [table[symbol] for symbol in symbols]
+
+        if hourly['Close'].shape[1] > 0:
+            hourly_rsi = load_rsi(tables(self.RSIS_trend), hourly['Close'])
+        if close.shape[1] > 0:
+            fast, slow, line, signal, histogram = load_macd(tables(self.MACDS), close)
+            lower, middle, upper = load_bollinger(tables(self.Bollingers), close)
+            load_rsi(tables(self.RSIS), close)
+            ema200 = load_ema(tables(self.EMAS), close)
+            ema50 = load_ema(tables(self.EMAS50), close)
+            adx = load_adx(tables(self.ADX), high, low, close)
+            obv = load_obv(tables(self.obvs), close, volume)
+            load_atr(tables(self.ATRS), high, low, close)
+            # the streaming signal line and histogram read 0 until they start
+            signal, histogram = np.nan_to_num(signal), np.nan_to_num(histogram)
+
+        for i, symbol in enumerate(symbols):
+            if hourly_counts[i] > 0:
+                self.last_hourly_bar[symbol] = hourly_history[symbol][-1].EndTime
+                rsi = self.last_values(hourly_rsi[i], hourly_counts[i], self.RSIS_rolling_window_length)
+                self.RSIS_rolling_windows[symbol].extend(rsi)
+                for value in rsi.tolist():
+                    self.rsi_trend_trackers[symbol].Add(value)
+            if daily_counts[i] == 0:
+                continue
+            self.last_daily_bar[symbol] = daily_history[symbol][-1].Time
+
+            def tail(series, size):
+                return self.last_values(series[i], daily_counts[i], size)
+
+            prices = tail(close, self.price_rolling_window_length)
+            self.trend_rolling_windows[symbol].extend(prices)
+            for value in prices.tolist():
+                self.price_trend_trackers[symbol].Add(value)
+
+            size = self.macd_candles_history_size
+            self.macd_store.extend(symbol, tail(fast, size), tail(slow, size), tail(signal, size), tail(line, size), tail(histogram, size))
+            size = self.Bollinger_window_size
+            self.bollinger_store.extend(symbol, tail(lower, size), tail(middle, size), tail(upper, size), tail(close, size))
+
+            size = self.ema_rolling_window_length
+            self.EMAS_rolling_windows[symbol].extend(tail(ema200, size))
+            self.EMAS50_rolling_windows[symbol].extend(tail(ema50, size))
+            self.ema_crossovers[symbol].extend(tail(ema50, size), tail(ema200, size))
+            self.ema50_gradients[symbol].extend(tail(ema50, size))
+
+            adxs = tail(adx, self.adx_rolling_window_length)
+            self.adx_rolling[symbol].extend(adxs)
+            self.adx_extremes[symbol].extend(adxs)
+
+            obvs = tail(obv, self.obv_rolling_window_length)
+            self.obvs_rolling[symbol].extend(obvs)
+            for value in obvs.tolist():
+                self.obv_trend_trackers[symbol].Add(value)
+
+    def history_arrays(self, symbols, bars_by_symbol, fields):
+        '''
+        (symbols x bars) arrays of the given TradeBar fields, each row ending
+        with the symbol's last bar and left padded with NaN
+        '''
+        length = max([len(bars_by_symbol[symbol]) for symbol in symbols] + [0])
+        arrays = {field: np.full((len(symbols), length), np.nan) for field in fields}
+        for i, symbol in enumerate(symbols):
+            bars = bars_by_symbol[symbol]
+            for field in fields:
+                arrays[field][i, length - len(bars):] = [float(getattr(bar, field)) for bar in bars]
+        return arrays
+
+    def last_values(self, row, count, size):
+        '''the values of a left padded row that end up in a window of the given size'''
+        return row[len(row) - min(count, size):]
+
+    def update_daily_indicators(self, bar):
+        '''runs a daily bar from History through the indicators the fan-out feeds live'''
+        self.daily_fanout.update_indicators(bar)
+        self.record_daily_bar(bar)
+
+    def record_daily_bar(self, bar):
+        self.last_daily_bar[bar.Symbol] = bar.Time
+
+    def update_hourly(self, symbol, bar):
+        '''
+        Runs an hourly bar through the hourly RSI and, once the daily indicators
+        are ready, advances the windows at the 10:00 bar. A bar no newer than
+        the last one applied was already replayed from History and is skipped.
+        Returns whether the daily indicators are ready.
+        '''
+        if symbol in self.last_hourly_bar and bar.EndTime <= self.last_hourly_bar[symbol]:
+            return self.MACDS[symbol].IsReady
+        self.update_hourly_rsi(symbol, bar)
+        if not self.MACDS[symbol].IsReady:
+            return False
+        # if it is 10:00am
+        if bar.EndTime.hour == 10 and bar.EndTime.minute == 0:
+            self.advance_windows(symbol, float(bar.Close))
+            self.windows_advanced(symbol)
+        return True
+
+    def update_hourly_rsi(self, symbol, bar):
+        if self.use_numpy_indicators:
+            self.RSIS_trend[symbol].Update(float(bar.Close))
+        else:
+            self.RSIS_trend[symbol].Update(bar.EndTime, bar.Close)
+        self.last_hourly_bar[symbol] = bar.EndTime
+
+    def advance_windows(self, symbol, price):
+        self.trend_rolling_windows[symbol].Add(price)
+        self.price_trend_trackers[symbol].Add(price)
+        bollinger = self.Bollingers[symbol]
+        self.bollinger_store.append(symbol, bollinger.Lower, bollinger.Middle, bollinger.Upper, price)
+        macd = self.MACDS[symbol]
+        self.macd_store.append(symbol, macd.Fast.Value, macd.Slow.Value, macd.Signal.Value, macd.Value, macd.Histogram)
+        rsi = self.RSIS_trend[symbol].Value
+        self.RSIS_rolling_windows[symbol].Add(rsi)
+        self.rsi_trend_trackers[symbol].Add(rsi)
+        ema200 = self.EMAS[symbol].Value
+        ema50 = self.EMAS50[symbol].Value
+        self.EMAS_rolling_windows[symbol].Add(ema200)
+        self.EMAS50_rolling_windows[symbol].Add(ema50)
+        self.ema_crossovers[symbol].Add(ema50, ema200)
+        self.ema50_gradients[symbol].Add(ema50)
+        obv = self.obvs[symbol].Value
+        self.obvs_rolling[symbol].Add(obv)
+        self.obv_trend_trackers[symbol].Add(obv)
+        adx = self.ADX[symbol].Value
+        self.adx_rolling[symbol].Add(adx)
+        self.adx_extremes[symbol].Add(adx)
+
+    def history_by_symbol(self, symbols, history):
+        '''
+        Splits a multi-symbol History[TradeBar] result into per-symbol bar lists
+        in time order
+        '''
+        bars_by_symbol = {symbol: [] for symbol in symbols}
+        for bars in history:
+            for bar in bars.Values:
+                if bar.Symbol in bars_by_symbol:
+                    bars_by_symbol[bar.Symbol].append(bar)
+        return bars_by_symbol
+
+    def indicator_tables(self):
+        return {'macd': self.MACDS, 'bollinger': self.Bollingers, 'rsi': self.RSIS, 'rsi_hourly': self.RSIS_trend,
+                'ema200': self.EMAS, 'ema50': self.EMAS50, 'adx': self.ADX, 'obv': self.obvs, 'atr': self.ATRS}
+
+    def snapshot_windows(self):
+        return {'trend': self.trend_rolling_windows, 'rsi': self.RSIS_rolling_windows, 'ema200': self.EMAS_rolling_windows,
+                'ema50': self.EMAS50_rolling_windows, 'adx': self.adx_rolling, 'obv': self.obvs_rolling}
+
+    def save_snapshot(self, algo):
+        '''
+        Writes the indicator state, rolling windows, oracle stores, armed entry
+        and trailing stop of every active symbol, with the last bars they
+        include, so the next start only has to replay the bars it missed. Only
+        the NumPy indicators can be saved, so there is no snapshot otherwise.
+        '''
+        if not self.use_numpy_indicators:
+            return
+        states = {}
+        for symbol in self.activeStocks:
+            if symbol not in self.last_daily_bar or symbol not in self.last_hourly_bar:
+                continue
+            state = {'last_daily_bar': np.array(self.last_daily_bar[symbol].isoformat()),
+                     'last_hourly_bar': np.array(self.last_hourly_bar[symbol].isoformat())}
+            for name, table in self.indicator_tables().items():
+                state.update(indicator_state(table[symbol], name + '.'))
+            for prefix, store in (('bollinger_', self.bollinger_store), ('macd_', self.macd_store)):
+                window = store.window(symbol)
+                for column in store.columns:
+                    state[prefix + column] = window.oldest_first(column)
+            for name, windows in self.snapshot_windows().items():
+                state[name] = windows[symbol].oldest_first()
+
+            if self.pending_entries.direction(symbol) != 0:
+                state['entry'] = np.array([self.pending_entries.direction(symbol), self.pending_entries.bars_left(symbol)])
+            if symbol in self.entry_scores:
+                state['entry_score'] = np.array(self.entry_scores[symbol])
+            if symbol in self.trailing_stops:
+                state['trail'] = np.array(self.trailing_stops.trail(symbol))
+            states[str(symbol.ID)] = state
+        self.state_snapshot.save(algo.Time, states)
+        self.logger.info("saved indicator snapshot for %d symbols", len(states))
+
+    def restore_from_snapshot(self, algo, symbols):
+        '''
+        Restores the symbols found in the start-up snapshot and returns them.
+        Only the bars that arrived after the snapshot are requested from History.
+        The snapshot's age is measured from the start date: symbols added while
+        the warm-up is still before the snapshot are restored by Update once it
+        has passed the snapshot.
+        '''
+        if self.restored_state is None or not self.use_numpy_indicators:
+            return set()
+        snapshot_time, states = self.restored_state
+        start = max(algo.Time, algo.StartDate)
+        if snapshot_time > algo.StartDate or start - snapshot_time > self.snapshot_max_age:
+            self.restored_state = None
+            return set()
+
+        # snapshots without indicator state are from an older version and are warmed up instead
+        symbols = [symbol for symbol in symbols if 'last_daily_bar' in states.get(str(symbol.ID), {})]
+        if len(symbols) == 0:
+            return set()
+        if snapshot_time > algo.Time:
+            self.deferred_restores.update(symbols)
+            return set(symbols)
+        self.restore_symbols(algo, symbols)
+        return set(symbols)
+
+    def restore_deferred(self, algo):
+        symbols = list(self.deferred_restores)
+        self.deferred_restores.clear()
+        self.restore_symbols(algo, symbols)
+
+    def restore_symbols(self, algo, symbols):
+        _, states = self.restored_state
+        for symbol in symbols:
+            self.restore_symbol(symbol, states.pop(str(symbol.ID)))
+        start = min(min(self.last_daily_bar[symbol], self.last_hourly_bar[symbol]) for symbol in symbols)
+        hourly_history = self.history_by_symbol(symbols, algo.History[TradeBar](symbols, start, algo.Time, Resolution.Hour))
+        daily_history = self.history_by_symbol(symbols, algo.History[TradeBar](symbols, start, algo.Time, Resolution.Daily))
+        for symbol in symbols:
+            last_day = self.last_daily_bar[symbol].date()
+            self.replay_missed_bars(symbol,
+                                    [bar for bar in hourly_history[symbol] if bar.EndTime > self.last_hourly_bar[symbol]],
+                                    [bar for bar in daily_history[symbol] if bar.Time.date() > last_day])
+            self.windows_advanced(symbol)
+
+        self.logger.info("restored %d symbols from indicator snapshot", len(symbols))
+
+    def restore_symbol(self, symbol, state):
+        for name, table in self.indicator_tables().items():
+            restore_indicator(table[symbol], state, name + '.')
+        self.last_daily_bar[symbol] = datetime.fromisoformat(state['last_daily_bar'].item())
+        self.last_hourly_bar[symbol] = datetime.fromisoformat(state['last_hourly_bar'].item())
+
+        for values in zip(*[state['bollinger_' + column] for column in self.bollinger_store.columns]):
+            self.bollinger_store.append(symbol, *values)
+        for values in zip(*[state['macd_' + column] for column in self.macd_store.columns]):
+            self.macd_store.append(symbol, *values)
+
+        windows = self.snapshot_windows()
+        for name, values in state.items():
+            if name in windows:
+                for value in values.tolist():
+                    windows[name][symbol].Add(value)
+        for value in state['trend'].tolist():
+            self.price_trend_trackers[symbol].Add(value)
+        for value in state['rsi'].tolist():
+            self.rsi_trend_trackers[symbol].Add(value)
+        for value in state['obv'].tolist():
+            self.obv_trend_trackers[symbol].Add(value)
+        for ema50, ema200 in zip(state['ema50'].tolist(), state['ema200'].tolist()):
+            self.ema_crossovers[symbol].Add(ema50, ema200)
+            self.ema50_gradients[symbol].Add(ema50)
+        for adx in state['adx'].tolist():
+            self.adx_extremes[symbol].Add(adx)
+
+        if 'entry' in state:
+            direction, bars_left = state['entry'].tolist()
+            self.pending_entries.arm(symbol, int(direction), int(bars_left))
+        if 'entry_score' in state:
+            self.entry_scores[symbol] = state['entry_score'].item()
+        if 'trail' in state:
+            self.trailing_stops.open(symbol, *state['trail'].tolist())
+
+    def replay_missed_bars(self, symbol, hourly_bars, daily_bars):
+        '''
+        Runs the bars missed since a snapshot in the order they arrive live: a
+        day's bar is consolidated at the first hourly bar of a later day, before
+        that bar reaches Update
+        '''
+        day = 0
+        for bar in hourly_bars:
+            while day < len(daily_bars) and daily_bars[day].Time.date() < bar.Time.date():
+                self.update_daily_indicators(daily_bars[day])
+                day += 1
+            self.update_hourly(symbol, bar)
+        for bar in daily_bars[day:]:
+            self.update_daily_indicators(bar)
 
     def display_rolling_window(self, rolling_window):
         rolling_str = "["
+        if type(rolling_window) == RingWindow:
+            rolling_window = rolling_window.oldest_first('macd')
         for x in rolling_window:
-            if type(x) == self.macd_holder:
-                rolling_str += str(x.macd) + ", "
-            else:
-                rolling_str += str(x) + ", "
+            rolling_str += str(x) + ", "
         rolling_str += "]"
         return rolling_str
\ No newline at end of file
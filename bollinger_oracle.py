@@ -1,9 +1,12 @@
-#region imports
-from AlgorithmImports import *
-#endregion
+import numpy as np
+
+from ring_buffer import RingWindow
 
 
 def get_bollinger_buy_and_short(QCalgo, bollinger_rolling_window,trend, bollinger_params):  
+    if isinstance(bollinger_rolling_window, RingWindow):
+        return _get_bollinger_buy_and_short_columns(bollinger_rolling_window, trend, bollinger_params)
+
     score = 0
     lowers = [x.lower for x in bollinger_rolling_window]
     middles = [x.middle for x in bollinger_rolling_window]
@@ -67,3 +70,54 @@ def get_bollinger_buy_and_short(QCalgo, bollinger_rolling_window,trend, bollinge
     return score
 
 
+def _get_bollinger_buy_and_short_columns(bollinger_window, trend, bollinger_params):
+    '''
+    Same scoring as get_bollinger_buy_and_short, computed on the newest-first
+    column views of a RingWindow without copying them into lists.
+    '''
+    return get_bollinger_buy_and_short_batch(bollinger_window.newest_first('lower')[None],
+                                             bollinger_window.newest_first('middle')[None],
+                                             bollinger_window.newest_first('upper')[None],
+                                             bollinger_window.newest_first('price')[None],
+                                             trend, bollinger_params)[0]
+
+
+def get_bollinger_buy_and_short_batch(lowers, middles, uppers, prices, trend, bollinger_params, counts=None):
+    '''
+    get_bollinger_buy_and_short for many symbols at once.
+    lowers, middles, uppers and prices are (symbols x window) arrays with the
+    most recent bar in column 0. Rows shorter than the window are padded on the
+    right and their lengths given in counts. trend is a scalar or one value per
+    symbol. Returns the 0 / .5 / 1 / 2 score of every symbol.
+    '''
+    lowers, middles, uppers, prices = (np.asarray(x, dtype=np.float64) for x in (lowers, middles, uppers, prices))
+    symbols, window = prices.shape
+    if counts is None:
+        counts = np.full(symbols, window)
+    valid = np.arange(window) < np.asarray(counts)[:, None]
+    trend = np.broadcast_to(np.asarray(trend), (symbols,))
+
+    at_or_above_upper = prices >= uppers
+    at_or_above_middle = prices >= middles
+    below_middle = valid & ~at_or_above_upper & ~at_or_above_middle
+    lower_middle = np.count_nonzero(below_middle & (prices >= lowers), axis=1)
+    below_lower = np.count_nonzero(below_middle & ~(prices >= lowers), axis=1)
+
+    # amount_below as it stood before each bar, accumulated in the same order as the loop
+    below_amounts = np.where(valid & (prices < middles), middles - prices, 0.0)
+    amount_below = np.cumsum(np.concatenate((np.full((symbols, 1), .0001), below_amounts), axis=1), axis=1)
+    above_amounts = np.where(valid & at_or_above_middle & (amount_below[:, :-1] == .0001), prices - middles, 0.0)
+    amount_above = np.cumsum(above_amounts, axis=1)[:, -1] if window > 0 else np.zeros(symbols)
+    amount_below = amount_below[:, -1]
+
+    # where the most recent price sits decides which side can score
+    upper_half = (prices[:, 0] >= uppers[:, 0]) | (prices[:, 0] >= middles[:, 0])
+
+    scores = np.zeros(symbols)
+    long_side = (trend > 0) & upper_half
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long_ok = amount_above / amount_below >= bollinger_params['long_threshold']
+        short_ok = (lower_middle + below_lower) / counts >= bollinger_params['short_threshold']
+    scores[long_side] = np.where(long_ok[long_side], 1, .5)
+    scores[(trend < 0) & ~upper_half & short_ok] = 2
+    return scores
@@ -0,0 +1,76 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from datetime import timedelta
+
+import numpy as np
+
+from ring_buffer import ColumnarRingStore
+from state_snapshot import StateSnapshot
+
+
+class ChartRecorder:
+    '''
+    Records diagnostic chart series per symbol into preallocated ring buffers
+    instead of calling algo.Plot for every value. Only symbols on the watch
+    list (Symbols or tickers) are recorded, at most once per interval. The
+    buffers are saved as a columnar .npz for offline plotting; plot also sends
+    the latest values to LEAN's charts at most once per plot_interval.
+    '''
+    def __init__(self, series, watch_list, capacity=500, interval=timedelta(days=1), plot_interval=None):
+        # recording every symbol would also exempt every symbol from screening
+        if not watch_list:
+            raise ValueError("ChartRecorder needs a non-empty watch list")
+        self.series = tuple(series)
+        self.columns = ('time',) + tuple(chart + '/' + name for chart, name in self.series)
+        self.store = ColumnarRingStore(capacity, self.columns, initial_rows=8)
+        self.watch_list = set(watch_list)
+        self.interval = interval
+        self.plot_interval = plot_interval
+        self.last_recorded = {}
+        self.last_plotted = None
+
+    def watching(self, symbol):
+        return symbol in self.watch_list or symbol.Value in self.watch_list
+
+    def due(self, symbol, time):
+        '''whether a point for symbol at time should be recorded'''
+        if not self.watching(symbol):
+            return False
+        last = self.last_recorded.get(symbol)
+        return last is None or time - last >= self.interval
+
+    def record(self, symbol, time, values):
+        '''values are in the order of series; NaN for a series with no point'''
+        if symbol not in self.store.rows:
+            self.store.add_symbol(symbol)
+        self.store.append(symbol, time.timestamp(), *values)
+        self.last_recorded[symbol] = time
+
+    def remove(self, symbol):
+        self.store.remove_symbol(symbol)
+        self.last_recorded.pop(symbol, None)
+
+    def plot(self, algo):
+        '''plots the latest recorded point of the watched symbols, at most once per plot_interval'''
+        if self.plot_interval is None:
+            return
+        if self.last_plotted is not None and algo.Time - self.last_plotted < self.plot_interval:
+            return
+        self.last_plotted = algo.Time
+        for symbol in self.store.rows:
+            window = self.store.window(symbol)
+            if len(window) == 0:
+                continue
+            for (chart, name), column in zip(self.series, self.columns[1:]):
+                value = window.newest_first(column)[0]
+                if not np.isnan(value):
+                    algo.Plot(chart, name, float(value))
+
+    def save(self, algo, key="custom_alpha_charts", path=None):
+        '''writes every symbol's recorded series, oldest first, as one .npz'''
+        states = {}
+        for symbol in self.store.rows:
+            window = self.store.window(symbol)
+            states[str(symbol.ID)] = {column: window.oldest_first(column) for column in self.columns}
+        StateSnapshot(algo, key, path).save(algo.Time, states)
@@ -0,0 +1,59 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from datetime import timedelta
+
+
+class DailyBarFanout:
+    '''
+    One daily TradeBarConsolidator per symbol. Each daily bar is built once and
+    pushed to every indicator registered for the symbol, then to every
+    subscriber of the daily bar stream.
+    '''
+    def __init__(self, algo):
+        self.algo = algo
+        self.consolidators = {}
+        self.indicators = {}
+        self.subscribers = []
+
+    def add_symbol(self, symbol):
+        if symbol in self.consolidators:
+            self.remove_symbol(symbol)
+        consolidator = TradeBarConsolidator(timedelta(days=1))
+        consolidator.DataConsolidated += self.on_daily_bar
+        self.algo.SubscriptionManager.AddConsolidator(symbol, consolidator)
+        self.consolidators[symbol] = consolidator
+        self.indicators[symbol] = []
+
+    def remove_symbol(self, symbol):
+        consolidator = self.consolidators.pop(symbol, None)
+        if consolidator is not None:
+            consolidator.DataConsolidated -= self.on_daily_bar
+            self.algo.SubscriptionManager.RemoveConsolidator(symbol, consolidator)
+        self.indicators.pop(symbol, None)
+
+    def register_indicator(self, symbol, indicator, selector=None):
+        '''
+        selector(bar) returns the arguments indicator.Update takes for a daily
+        bar. The default passes (bar.EndTime, bar.Close), like
+        algo.register_indicator's default selector.
+        '''
+        self.indicators[symbol].append((indicator, selector or _end_time_and_close))
+
+    def subscribe(self, callback):
+        '''callback(bar) is called with every daily bar, after the indicators are updated'''
+        self.subscribers.append(callback)
+
+    def update_indicators(self, bar):
+        '''runs a daily bar through the indicators registered for its symbol'''
+        for indicator, selector in self.indicators.get(bar.Symbol, ()):
+            indicator.Update(*selector(bar))
+
+    def on_daily_bar(self, sender, bar):
+        self.update_indicators(bar)
+        for callback in self.subscribers:
+            callback(bar)
+
+
+def _end_time_and_close(bar):
+    return bar.EndTime, bar.Close
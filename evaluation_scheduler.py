@@ -0,0 +1,39 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+
+
+class EvaluationScheduler:
+    '''
+    Tracks which symbols need their signal chain re-run. A symbol is marked dirty
+    when one of its windows or indicators advances, when it gets an order event
+    or when its trailing stop liquidates it, and is evaluated on the next bar
+    it has data for. This also covers the version-keyed result cache it
+    replaced: skipped and evaluated count what were its hits and misses.
+    '''
+    def __init__(self):
+        self.dirty = set()
+        self.evaluated = 0
+        self.skipped = 0
+
+    def mark(self, symbol):
+        self.dirty.add(symbol)
+
+    def discard(self, symbol):
+        self.dirty.discard(symbol)
+
+    def take(self, symbols):
+        '''
+        Returns the dirty symbols among symbols, in order, and marks them clean.
+        Dirty symbols that are not in symbols stay dirty.
+        '''
+        due = [symbol for symbol in symbols if symbol in self.dirty]
+        self.dirty.difference_update(due)
+        self.evaluated += len(due)
+        self.skipped += len(symbols) - len(due)
+        return due
+
+    def summary(self):
+        total = self.evaluated + self.skipped
+        skip_rate = self.skipped / total if total > 0 else 0
+        return "evaluations run: " + str(self.evaluated) + " skipped: " + str(self.skipped) + " skip rate: " + str(round(skip_rate, 3))
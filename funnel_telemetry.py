@@ -0,0 +1,87 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import json
+from datetime import timedelta
+from enum import IntEnum
+
+
+class Gate(IntEnum):
+    '''gates of the long entry funnel, in the order Update applies them'''
+    NO_DATA = 0
+    MACD_NOT_READY = 1
+    INPUTS_UNCHANGED = 2
+    EMA_TREND = 3
+    BOLLINGER = 4
+    MACD = 5
+    RSI = 6
+    DERIVATIVE = 7
+    ADX_THRESHOLD = 8
+    ADX_MAX = 9
+    OBV = 10
+
+
+class FunnelTelemetry:
+    '''
+    Counts how many symbols enter the funnel and how many each gate rejects,
+    per interval. Everything a gate doesn't reject passes it, so the pass
+    counts are derived when the counts are reported, not on the hot path.
+    '''
+    def __init__(self, interval=timedelta(days=1)):
+        self.interval = interval
+        self.interval_start = None
+        self.entered = 0
+        self.rejected = [0] * len(Gate)
+        self.history = []
+
+    def roll(self, time):
+        '''closes the current interval once time has moved past it'''
+        if self.interval_start is None:
+            self.interval_start = time
+        elif time - self.interval_start >= self.interval:
+            self.history.append((self.interval_start, self.entered, self.rejected))
+            self.interval_start = time
+            self.entered = 0
+            self.rejected = [0] * len(Gate)
+
+    def enter(self, count):
+        self.entered += count
+
+    def reject(self, gate, count=1):
+        self.rejected[gate] += count
+
+    def intervals(self):
+        '''(start, entered, rejected) for every closed interval and the open one'''
+        if self.interval_start is None:
+            return list(self.history)
+        return self.history + [(self.interval_start, self.entered, self.rejected)]
+
+    def passed(self, entered, rejected):
+        passed = []
+        remaining = entered
+        for count in rejected:
+            remaining -= count
+            passed.append(remaining)
+        return passed
+
+    def summary(self):
+        entered = sum(interval[1] for interval in self.intervals())
+        rejected = [sum(interval[2][gate] for interval in self.intervals()) for gate in Gate]
+        passed = self.passed(entered, rejected)
+        return "funnel (rejected/passed) entered: " + str(entered) + " " + " ".join(
+            gate.name.lower() + ": " + str(rejected[gate]) + "/" + str(passed[gate]) for gate in Gate)
+
+    def to_csv(self):
+        lines = ["start,entered," + ",".join(gate.name.lower() for gate in Gate) + ",signals"]
+        for start, entered, rejected in self.intervals():
+            signals = self.passed(entered, rejected)[-1]
+            lines.append(str(start) + "," + str(entered) + "," + ",".join(str(x) for x in rejected) + "," + str(signals))
+        return "\n".join(lines)
+
+    def to_json(self):
+        return json.dumps([{'start': str(start), 'entered': entered, 'rejected': {gate.name.lower(): rejected[gate] for gate in Gate}}
+                           for start, entered, rejected in self.intervals()])
+
+    def save(self, algo, key="custom_alpha_funnel.csv"):
+        '''saves the per-interval counts to the ObjectStore'''
+        algo.ObjectStore.Save(key, self.to_csv())
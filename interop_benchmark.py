@@ -0,0 +1,51 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import time
+
+from ring_buffer import MirrorWindow
+
+
+def read_window_pattern(price, rsi, obv, ema50, ema200, adx):
+    '''
+    The reads Update used to make against one symbol's windows on every bar:
+    full copies for the trend, crossover and gradient calculations, the ADX max
+    and the most recent price for the entry and stop checks.
+    '''
+    close_data = [x for x in price]
+    rsi_data = [x for x in rsi]
+    obv_data = [x for x in obv]
+    ema50s = [x for x in ema50]
+    ema200s = [x for x in ema200]
+    max_adx = max(adx)
+    latest = price[0]
+    return len(close_data) + len(rsi_data) + len(obv_data) + len(ema50s) + len(ema200s) + max_adx + latest
+
+
+def benchmark_interop(alpha, symbols=400, bars=200):
+    '''
+    Times read_window_pattern against RollingWindow[float] and MirrorWindow
+    windows sized like custom_alpha's. Run it from a research notebook or from
+    Initialize; returns microseconds per symbol per bar for both, and the
+    saving per bar for a universe of the given size.
+    '''
+    sizes = (alpha.price_rolling_window_length, alpha.RSIS_rolling_window_length, alpha.obv_rolling_window_length,
+             alpha.ema_rolling_window_length, alpha.ema_rolling_window_length, alpha.adx_rolling_window_length)
+
+    lean_windows = [RollingWindow[float](size) for size in sizes]
+    mirror_windows = [MirrorWindow(size) for size in sizes]
+    for windows in (lean_windows, mirror_windows):
+        for window, size in zip(windows, sizes):
+            for i in range(size):
+                window.Add(100.0 + i)
+
+    timings = {}
+    for name, windows in (("RollingWindow", lean_windows), ("MirrorWindow", mirror_windows)):
+        start = time.perf_counter()
+        for _ in range(bars):
+            read_window_pattern(*windows)
+        timings[name] = (time.perf_counter() - start) / bars * 1e6
+
+    timings["saved per symbol"] = timings["RollingWindow"] - timings["MirrorWindow"]
+    timings["saved per bar"] = timings["saved per symbol"] * symbols
+    return timings
@@ -0,0 +1,106 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import math
+import time
+
+import numpy as np
+
+
+class LatencyHistogram:
+    '''
+    Fixed-size log-spaced histogram of durations from 100ns to 10s, about 5%
+    wide per bucket. Percentiles are read off the bucket edges.
+    '''
+    lowest = -7
+    buckets_per_decade = 25
+    decades = 8
+
+    def __init__(self):
+        self.counts = np.zeros(self.decades * self.buckets_per_decade, dtype=np.int64)
+        self.samples = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds > 0:
+            bucket = int((math.log10(seconds) - self.lowest) * self.buckets_per_decade)
+            bucket = min(max(bucket, 0), len(self.counts) - 1)
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        self.samples += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        '''upper edge of the bucket holding the q-th percentile, in seconds'''
+        if self.samples == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.samples))
+        return min(10 ** (self.lowest + (bucket + 1) / self.buckets_per_decade), self.max)
+
+
+class _PhaseTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class LatencyProfiler:
+    '''
+    Opt-in per-phase timers for the alpha's hot path:
+
+        with self.profiler.phase("oracles"):
+            ...
+
+    Disabled, phase returns a shared no-op context manager. Phases of the same
+    name must not nest.
+    '''
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.timers = {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self.timers.get(name)
+        if timer is None:
+            self.histograms[name] = LatencyHistogram()
+            timer = self.timers[name] = _PhaseTimer(self.histograms[name])
+        return timer
+
+    def report(self):
+        '''one line per phase with sample count, total, mean, p50/p95/p99 and max in microseconds'''
+        lines = []
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: item[1].total, reverse=True):
+            mean = histogram.total / histogram.samples if histogram.samples > 0 else 0
+            lines.append(name + ": n=" + str(histogram.samples) + " total=" + str(round(histogram.total, 3)) + "s"
+                         + " mean=" + str(round(mean * 1e6, 1)) + " p50=" + str(round(histogram.percentile(50) * 1e6, 1))
+                         + " p95=" + str(round(histogram.percentile(95) * 1e6, 1)) + " p99=" + str(round(histogram.percentile(99) * 1e6, 1))
+                         + " max=" + str(round(histogram.max * 1e6, 1)) + " us")
+        return lines
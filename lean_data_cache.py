@@ -0,0 +1,215 @@
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from offline_backtest import Bars
+
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+# LEAN stores equity prices in deci-cents
+PRICE_SCALE = {'equity': 10000}
+PERIODS = {'daily': np.timedelta64(1, 'D'), 'hour': np.timedelta64(1, 'h'), 'minute': np.timedelta64(1, 'm')}
+
+
+def _read_zip(path, day=None):
+    '''
+    Reads the trade CSV in one LEAN zip as (bar start times, OHLCV array).
+    Daily and hour files carry "yyyyMMdd HH:mm" times; minute files carry
+    milliseconds since midnight of day.
+    '''
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(archive.namelist()[0]) as f:
+            frame = pd.read_csv(f, header=None, usecols=range(6))
+    if day is None:
+        times = pd.to_datetime(frame[0], format='%Y%m%d %H:%M').values.astype('datetime64[s]')
+    else:
+        times = day + frame[0].values.astype('timedelta64[ms]').astype('timedelta64[s]')
+    return times, frame.iloc[:, 1:6].values.astype(np.float64)
+
+
+class LeanDataCache:
+    '''
+    Converts a local LEAN data folder into memory-mapped columnar arrays, one
+    directory per resolution holding times.npy, one (time x symbol) .npy per
+    OHLCV field and an index.json with the tickers and a manifest of their
+    sources: the size and modification time of a ticker's zip, or of its
+    directory for minute data. load only stats one path per ticker, parses the
+    tickers that are missing or changed and copies the other columns over; an
+    up-to-date cache is only mapped, and slicing a time range or a run of
+    tickers does not copy.
+
+    A minute directory's time changes when day files are added or removed; a
+    day file rewritten in place is picked up by build(resolution, [ticker]).
+
+    Times are bar end times in the exchange's time zone, as OfflineBacktest
+    expects.
+    '''
+    def __init__(self, data_folder, cache_folder, security_type='equity', market='usa'):
+        self.data_folder = data_folder
+        self.cache_folder = cache_folder
+        self.security_type = security_type
+        self.market = market
+        self.scale = PRICE_SCALE.get(security_type, 1)
+
+    def source_folder(self, resolution):
+        return os.path.join(self.data_folder, self.security_type, self.market, resolution)
+
+    def _source_path(self, resolution, ticker):
+        folder = self.source_folder(resolution)
+        return os.path.join(folder, ticker) if resolution == 'minute' else os.path.join(folder, ticker + '.zip')
+
+    def _source_tickers(self, resolution):
+        folder = self.source_folder(resolution)
+        if resolution == 'minute':
+            return sorted(name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name)))
+        return sorted(name[:-4] for name in os.listdir(folder) if name.endswith('.zip'))
+
+    def _files(self, resolution, ticker):
+        '''the (path, day) source files of a ticker'''
+        path = self._source_path(resolution, ticker)
+        if resolution != 'minute':
+            return [(path, None)]
+        return [(os.path.join(path, name), np.datetime64(pd.Timestamp(name[:8]), 's'))
+                for name in sorted(os.listdir(path)) if name.endswith('_trade.zip')]
+
+    def _stamp(self, resolution, ticker):
+        '''the manifest entry of a ticker's sources, None if it has none'''
+        try:
+            stat = os.stat(self._source_path(resolution, ticker))
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime]
+
+    def _folder(self, resolution):
+        return os.path.join(self.cache_folder, resolution)
+
+    def _index_path(self, resolution):
+        return os.path.join(self._folder(resolution), 'index.json')
+
+    def _read_index(self, resolution):
+        '''the index of the cache, None if there is no complete cache with a manifest'''
+        try:
+            with open(self._index_path(resolution)) as f:
+                index = json.load(f)
+            shapes = {name: np.load(os.path.join(self._folder(resolution), name + '.npy'), mmap_mode='r').shape
+                      for name in ('times',) + FIELDS}
+        except FileNotFoundError:
+            return None
+        shape = tuple(index.get('shape', ()))
+        if 'manifest' not in index or shapes.pop('times') != shape[:1] or set(shapes.values()) != {shape}:
+            return None
+        return index
+
+    def _stale(self, resolution, tickers, manifest):
+        '''
+        the tickers (every ticker with source data by default) that are not
+        cached or whose sources changed; a cached ticker whose sources were
+        removed keeps its data
+        '''
+        names = [ticker.lower() for ticker in tickers] if tickers is not None else self._source_tickers(resolution)
+        stale = []
+        for ticker in names:
+            stamp = self._stamp(resolution, ticker) if ticker in manifest else None
+            if ticker not in manifest or (stamp is not None and stamp != manifest[ticker]):
+                stale.append(ticker)
+        return stale
+
+    def is_current(self, resolution, tickers=None):
+        '''whether the cache exists and holds the tickers' current sources'''
+        index = self._read_index(resolution)
+        return index is not None and not self._stale(resolution, tickers, index['manifest'])
+
+    def build(self, resolution, tickers=None):
+        '''
+        parses the LEAN zips of the tickers (every ticker with source data by
+        default) into the cache, keeping the other cached tickers. Raises
+        ValueError, before parsing anything, for tickers without source data.
+        '''
+        names = sorted({ticker.lower() for ticker in tickers}) if tickers is not None else self._source_tickers(resolution)
+        # stat before reading, so a file written while parsing shows up as changed next time
+        stamps = {ticker: self._stamp(resolution, ticker) for ticker in names}
+        missing = [ticker for ticker in names if stamps[ticker] is None]
+        if missing:
+            raise ValueError("no " + resolution + " data for " + ", ".join(missing) + " in " + self.source_folder(resolution))
+        parsed = {}
+        for ticker in names:
+            chunks = [_read_zip(path, day) for path, day in self._files(resolution, ticker)]
+            times = np.concatenate([times for times, _ in chunks]) if chunks else np.array([], dtype='datetime64[s]')
+            values = np.concatenate([values for _, values in chunks]) if chunks else np.zeros((0, len(FIELDS)))
+            parsed[ticker] = (times + PERIODS[resolution], values)
+
+        folder = self._folder(resolution)
+        os.makedirs(folder, exist_ok=True)
+        index = self._read_index(resolution)
+        manifest = dict(index['manifest']) if index else {}
+        kept = [ticker for ticker in (index['tickers'] if index else []) if ticker not in parsed]
+        old, kept_times, has_bar = {}, np.array([], dtype='datetime64[s]'), None
+        if kept:
+            old = {name: np.load(os.path.join(folder, name + '.npy'), mmap_mode='r') for name in ('times',) + FIELDS}
+            old_column = {ticker: i for i, ticker in enumerate(index['tickers'])}
+            # drop the times only the re-parsed tickers had bars at
+            has_bar = ~np.isnan(old['close'][:, [old_column[ticker] for ticker in kept]]).all(axis=1)
+            kept_times = old['times'][has_bar]
+        times = np.unique(np.concatenate([kept_times] + [parsed[ticker][0] for ticker in names]))
+        cached = sorted(kept + names)
+        column = {ticker: i for i, ticker in enumerate(cached)}
+
+        # new files replace the old ones, so Bars still mapping the old cache stay valid
+        temporary = lambda name: os.path.join(folder, name + '.tmp.npy')
+        np.save(temporary('times'), times)
+        arrays = {field: np.lib.format.open_memmap(temporary(field), mode='w+', dtype=np.float64,
+                                                   shape=(len(times), len(cached))) for field in FIELDS}
+        for array in arrays.values():
+            array[:] = np.nan
+        if kept:
+            rows = np.searchsorted(times, kept_times)
+            for ticker in kept:
+                for field in FIELDS:
+                    arrays[field][rows, column[ticker]] = old[field][has_bar, old_column[ticker]]
+        for ticker in names:
+            rows = np.searchsorted(times, parsed[ticker][0])
+            values = parsed[ticker][1]
+            for i, field in enumerate(FIELDS):
+                arrays[field][rows, column[ticker]] = values[:, i] / self.scale if field != 'volume' else values[:, i]
+            manifest[ticker] = stamps[ticker]
+        for array in arrays.values():
+            array.flush()
+        del arrays, old
+
+        for name in ('times',) + FIELDS:
+            os.replace(temporary(name), os.path.join(folder, name + '.npy'))
+        index = {'resolution': resolution, 'tickers': cached, 'shape': [len(times), len(cached)], 'manifest': manifest}
+        with open(self._index_path(resolution) + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(self._index_path(resolution) + '.tmp', self._index_path(resolution))
+
+    def load(self, resolution, tickers=None, start=None, end=None):
+        '''
+        Bars of the tickers (all cached tickers by default) between start and
+        end, parsing the tickers that are missing or changed first. Raises
+        ValueError for tickers that are neither cached nor in the data folder.
+        The arrays are transposed views of the memory maps; they are only
+        copied when the tickers are not one contiguous run of the cache's
+        sorted tickers.
+        '''
+        index = self._read_index(resolution)
+        stale = self._stale(resolution, tickers, index['manifest'] if index else {})
+        if stale or index is None:
+            self.build(resolution, stale)
+            index = self._read_index(resolution)
+        cached = index['tickers']
+        folder = self._folder(resolution)
+        times = np.load(os.path.join(folder, 'times.npy'), mmap_mode='r')
+        first = np.searchsorted(times, np.datetime64(start, 's')) if start is not None else 0
+        last = np.searchsorted(times, np.datetime64(end, 's'), side='right') if end is not None else len(times)
+
+        names = [ticker.lower() for ticker in tickers] if tickers else cached
+        position = {ticker: i for i, ticker in enumerate(cached)}
+        columns = [position[ticker] for ticker in names]
+        if columns and columns == list(range(columns[0], columns[0] + len(columns))):
+            columns = slice(columns[0], columns[0] + len(columns))
+        arrays = {field: np.load(os.path.join(folder, field + '.npy'), mmap_mode='r')[first:last, columns].T for field in FIELDS}
+        return Bars([ticker.upper() for ticker in names], times[first:last], **arrays)
@@ -0,0 +1,74 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+
+
+# LEAN's indicators behind the attribute names of numpy_indicators, so
+# custom_alpha reads the values of either set the same way. Update keeps LEAN's
+# signatures: (time, value) for the price indicators, a TradeBar for ADX, OBV
+# and ATR. Their state lives in the engine, so it can't be snapshotted.
+
+
+class LeanIndicator:
+    def __init__(self, indicator):
+        self.indicator = indicator
+
+    @property
+    def Value(self):
+        return float(self.indicator.Current.Value)
+
+    @property
+    def IsReady(self):
+        return self.indicator.IsReady
+
+    def Update(self, *args):
+        return self.indicator.Update(*args)
+
+
+class LeanMACD(LeanIndicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        super().__init__(MovingAverageConvergenceDivergence(fast, slow, signal, MovingAverageType.Exponential))
+        self.Fast = LeanIndicator(self.indicator.Fast)
+        self.Slow = LeanIndicator(self.indicator.Slow)
+        self.Signal = LeanIndicator(self.indicator.Signal)
+
+    @property
+    def Histogram(self):
+        return float(self.indicator.Histogram.Current.Value)
+
+
+class LeanBollinger(LeanIndicator):
+    def __init__(self, period=20, k=2):
+        super().__init__(BollingerBands(period, k, MovingAverageType.Simple))
+
+    @property
+    def Lower(self):
+        return float(self.indicator.LowerBand.Current.Value)
+
+    @property
+    def Middle(self):
+        return float(self.indicator.MiddleBand.Current.Value)
+
+    @property
+    def Upper(self):
+        return float(self.indicator.UpperBand.Current.Value)
+
+
+def LeanRSI(period=14):
+    return LeanIndicator(RelativeStrengthIndex(period))
+
+
+def LeanEMA(period):
+    return LeanIndicator(ExponentialMovingAverage(period))
+
+
+def LeanADX(period=14):
+    return LeanIndicator(AverageDirectionalIndex(period))
+
+
+def LeanOBV():
+    return LeanIndicator(OnBalanceVolume())
+
+
+def LeanATR(period=14):
+    return LeanIndicator(AverageTrueRange(period))
@@ -0,0 +1,94 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from enum import IntEnum
+
+
+class LogLevel(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+
+class AlgoLogger:
+    '''
+    Leveled logging in front of algo.Log. Messages are %-style format strings
+    (or callables returning a string) that are only formatted when emitted, so
+    a call below the level costs one comparison. Per-key rate limits and
+    sampling keep repeated messages from flooding LEAN's log quota. Emitted
+    lines are buffered and written to algo.Log, or to a local file when a path
+    is given, in batches.
+    '''
+    def __init__(self, algo, level=LogLevel.INFO, path=None, buffer_size=100):
+        self.algo = algo
+        self.level = level
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.limits = {}
+        self.last_emitted = {}
+        self.seen = {}
+        self.suppressed = 0
+
+    def limit(self, key, every=None, sample=None):
+        '''
+        Messages logged with this key are emitted at most once per every
+        (a timedelta of algorithm time) and/or once per sample calls
+        '''
+        self.limits[key] = (every, sample)
+
+    def debug(self, message, *args, key=None):
+        if LogLevel.DEBUG >= self.level:
+            self.log(LogLevel.DEBUG, message, args, key)
+
+    def info(self, message, *args, key=None):
+        if LogLevel.INFO >= self.level:
+            self.log(LogLevel.INFO, message, args, key)
+
+    def warning(self, message, *args, key=None):
+        if LogLevel.WARNING >= self.level:
+            self.log(LogLevel.WARNING, message, args, key)
+
+    def error(self, message, *args, key=None):
+        if LogLevel.ERROR >= self.level:
+            self.log(LogLevel.ERROR, message, args, key)
+
+    def log(self, level, message, args, key=None):
+        if key is not None and key in self.limits and not self.allowed(key):
+            self.suppressed += 1
+            return
+        if callable(message):
+            message = message()
+        elif args:
+            message = message % args
+        self.buffer.append(str(self.algo.Time) + " " + level.name + " " + message)
+        if len(self.buffer) >= self.buffer_size or level >= LogLevel.WARNING:
+            self.flush()
+
+    def allowed(self, key):
+        every, sample = self.limits[key]
+        self.seen[key] = self.seen.get(key, 0) + 1
+        if sample is not None and (self.seen[key] - 1) % sample != 0:
+            return False
+        if every is not None:
+            last = self.last_emitted.get(key)
+            if last is not None and self.algo.Time - last < every:
+                return False
+            self.last_emitted[key] = self.algo.Time
+        return True
+
+    def flush(self):
+        if len(self.buffer) == 0:
+            return
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write("\n".join(self.buffer) + "\n")
+        else:
+            self.algo.Log("\n".join(self.buffer))
+        self.buffer = []
+
+    def close(self):
+        if self.suppressed > 0:
+            self.info("%d rate-limited log messages suppressed", self.suppressed)
+        self.flush()
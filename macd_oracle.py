@@ -1,10 +1,11 @@
-#region imports
-from AlgorithmImports import *
-from tqdm import tqdm
-import pandas as pd
-#endregion
+import numpy as np
+
+from ring_buffer import RingWindow
 
 def get_macd_score(macd_rolling, trend, macd_params):
+    if isinstance(macd_rolling, RingWindow):
+        return _get_macd_score_columns(macd_rolling, trend, macd_params)
+
     # last 35 macd histogram data points
     hists = [x.hist for x in macd_rolling][:macd_params['cross_check_length']]
     macds = [x.macd for x in macd_rolling][:macd_params['macd_above_below_length']]
@@ -32,3 +33,34 @@ def get_macd_score(macd_rolling, trend, macd_params):
     return score
 
 
+def _get_macd_score_columns(macd_window, trend, macd_params):
+    '''
+    Same scoring as get_macd_score on the column views of a RingWindow.
+    The window is read in the order the deque was iterated, oldest first.
+    '''
+    return get_macd_score_batch(macd_window.oldest_first('macd')[None], trend, macd_params)[0]
+
+
+def get_macd_score_batch(macds, trend, macd_params, counts=None):
+    '''
+    get_macd_score for many symbols. macds is (symbols x length) in macd_rolling
+    order, oldest first, with short rows padded on the right and their lengths
+    given in counts. trend is a scalar or one value per symbol.
+    '''
+    macds = np.asarray(macds, dtype=np.float64)[:, :macd_params['macd_above_below_length']]
+    valid = _valid_mask(macds.shape, counts)
+    trend = np.broadcast_to(np.asarray(trend), (len(macds),))
+
+    long_ok = ((macds > macd_params['long_macd_threshold']) | ~valid).all(axis=1) & (macds[:, 0] > macd_params['long_macd_threshold'])
+    short_ok = ((macds > macd_params['short_macd_threshold']) | ~valid).all(axis=1) & (macds[:, 0] > macd_params['short_macd_threshold'])
+
+    scores = np.zeros(len(macds), dtype=np.int64)
+    scores[(trend > 0) & long_ok] = 1
+    scores[(trend < 0) & short_ok] = 2
+    return scores
+
+
+def _valid_mask(shape, counts):
+    if counts is None:
+        return np.ones(shape, dtype=bool)
+    return np.arange(shape[1]) < np.asarray(counts)[:, None]
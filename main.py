@@ -2,6 +2,7 @@
 from datetime import datetime
 from AlgorithmImports import *
 from alpha import custom_alpha
+from log_facade import AlgoLogger, LogLevel
 
 # endregion
 
@@ -18,26 +19,47 @@ class CompetitionAlgorithm(QCAlgorithm):
 
         # Parameters:
         self.final_universe_size = 400
+        self.log_level = LogLevel.INFO
+
+        # leveled, buffered logging; set log_level to LogLevel.WARNING for production runs
+        self.logger = AlgoLogger(self, self.log_level)
+        self.logger.limit("universe filter", every=timedelta(days=1))
 
         # Universe selection
         self.rebalanceTime = self.time
         self.universe_type = "equity"
 
         if self.universe_type == "equity":
-            self.Log("adding equitiy universe")
+            self.logger.info("adding equitiy universe")
             self.add_universe(self.equity_filter)
             #self.add_universe(CryptoUniverse.coinbase(self._crypto_universe_filter))
 
         self.UniverseSettings.Resolution = Resolution.Hour
 
         self.set_portfolio_construction(self.MyPCM())
-        self.set_alpha(custom_alpha(self))
+        self.alpha_model = custom_alpha(self)
+        self.set_alpha(self.alpha_model)
         self.set_execution(VolumeWeightedAveragePriceExecutionModel())
         self.add_risk_management(NullRiskManagementModel())
  
         # set account type
         #self.SetBrokerageModel(BrokerageName.InteractiveBrokersBrokerage, AccountType.Margin)
 
+    def OnOrderEvent(self, orderEvent):
+        self.alpha_model.on_order_event(orderEvent)
+
+    def OnEndOfAlgorithm(self):
+        self.logger.info(self.alpha_model.lifecycle.memory_report)
+        self.logger.info(self.alpha_model.scheduler.summary)
+        self.logger.info(self.alpha_model.funnel.summary)
+        self.alpha_model.funnel.save(self)
+        for line in self.alpha_model.profiler.report():
+            self.logger.info(line)
+        self.alpha_model.save_snapshot(self)
+        if self.alpha_model.plotting:
+            self.alpha_model.charts.save(self)
+        self.logger.close()
+
     def _crypto_universe_filter(self, data):
         if self.Time <= self.rebalanceTime:
             return self.Universe.Unchanged
@@ -50,20 +72,18 @@ class CompetitionAlgorithm(QCAlgorithm):
             # remove USD and EUR from string
             sym_string = str(cf.symbol).replace("USDT", "").replace("USDC", "").replace("USD", "")\
                 .replace("EUR", "").replace("GBP", "").split(" ")[0]
-            self.Log("sym_string: " + sym_string)
+            self.logger.debug("sym_string: %s", sym_string)
             if sym_string not in first_of_tickers_added:
                 first_of_tickers_added.append(sym_string)
                 new_universe.append(cf)
         sorted_by_vol = sorted(new_universe, key=lambda x: x.volume_in_usd, reverse=True)
         final =  [cf.symbol for cf in sorted_by_vol][:10]
-        self.Log("final: ")
-        for i in final:
-            self.Log(str(i))
+        self.logger.debug(lambda: "final: " + ", ".join(str(i) for i in final))
         return final
 
         
     def equity_filter(self, data):
-        self.Log("in filter for equities")
+        self.logger.debug("in filter for equities", key="universe filter")
         # Rebalancing monthly
         if self.Time <= self.rebalanceTime:
             return self.Universe.Unchanged
@@ -71,7 +91,7 @@ class CompetitionAlgorithm(QCAlgorithm):
         
         sortedByDollarVolume = sorted(data, key=lambda x: x.DollarVolume, reverse=True)
         final = [x.Symbol for x in sortedByDollarVolume if x.HasFundamentalData and x.price > 10 and x.MarketCap > 2000000000][:self.final_universe_size]
-        self.Log("coming out of course: " + str(len(final)))
+        self.logger.info("coming out of course: %d", len(final))
         return final
     class MyPCM(InsightWeightingPortfolioConstructionModel): 
         # override to set leverage higher
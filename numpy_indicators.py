@@ -0,0 +1,714 @@
+import io
+import math
+from collections import deque
+
+import numpy as np
+
+
+# NumPy versions of the LEAN indicators custom_alpha uses, with LEAN's
+# definitions and default parameters:
+#
+#     MACD(12, 26, 9, exponential)  -> MACD / macd
+#     BollingerBands(20, 2, simple) -> Bollinger / bollinger
+#     RelativeStrengthIndex(14)     -> RSI / rsi (Wilder averages)
+#     ExponentialMovingAverage(n)   -> EMA / ema
+#     AverageDirectionalIndex(14)   -> ADX / adx
+#     OnBalanceVolume()             -> OBV / obv
+#     AverageTrueRange(14)          -> ATR / atr (Wilder average)
+#
+# The classes update one bar at a time with LEAN-style Update / Value / IsReady.
+# The functions take whole histories, 1-D or (symbols x time) with time on the
+# last axis, and run the same recurrences across all symbols at once. Rows may be
+# left padded with NaN for symbols with shorter histories; their outputs are NaN
+# until the first value. LEAN computes in decimal, so results match to float
+# precision, not bit for bit. verify_against_lean checks them inside the engine.
+
+
+class EMA:
+    def __init__(self, period):
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.Samples = 0
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.period
+
+    def Update(self, value):
+        self.Samples += 1
+        # the first value seeds the average
+        if self.Samples == 1:
+            self.Value = value
+        else:
+            self.Value = value * self.k + self.Value * (1 - self.k)
+        return self.Value
+
+
+class SMA:
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.sum = 0.0
+        self.Samples = 0
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.period
+
+    def Update(self, value):
+        self.Samples += 1
+        if len(self.window) == self.period:
+            self.sum -= self.window[0]
+        self.window.append(value)
+        self.sum += value
+        self.Value = self.sum / len(self.window)
+        return self.Value
+
+
+class Wilder:
+    '''Wilder's moving average, seeded with the simple average of the first period values'''
+    def __init__(self, period):
+        self.period = period
+        self.k = 1 / period
+        self.sum = 0.0
+        self.Samples = 0
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.period
+
+    def Update(self, value):
+        self.Samples += 1
+        if self.Samples <= self.period:
+            self.sum += value
+            self.Value = self.sum / self.Samples
+        else:
+            self.Value = value * self.k + self.Value * (1 - self.k)
+        return self.Value
+
+
+class MACD:
+    '''the signal line starts once the slow average is ready, like LEAN's'''
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.Fast = EMA(fast)
+        self.Slow = EMA(slow)
+        self.Signal = EMA(signal)
+        self.Histogram = 0.0
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.Signal.IsReady
+
+    def Update(self, value):
+        self.Fast.Update(value)
+        self.Slow.Update(value)
+        self.Value = self.Fast.Value - self.Slow.Value
+        if self.Fast.IsReady and self.Slow.IsReady:
+            self.Signal.Update(self.Value)
+            if self.Signal.IsReady:
+                self.Histogram = self.Value - self.Signal.Value
+        return self.Value
+
+
+class Bollinger:
+    '''middle band is the simple average, the width uses the population standard deviation'''
+    def __init__(self, period=20, k=2):
+        self.period = period
+        self.k = k
+        self.window = deque(maxlen=period)
+        self.sum = 0.0
+        self.sum_of_squares = 0.0
+        self.Samples = 0
+        self.Lower = self.Middle = self.Upper = self.StandardDeviation = 0.0
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.period
+
+    def Update(self, value):
+        self.Samples += 1
+        if len(self.window) == self.period:
+            oldest = self.window[0]
+            self.sum -= oldest
+            self.sum_of_squares -= oldest * oldest
+        self.window.append(value)
+        self.sum += value
+        self.sum_of_squares += value * value
+
+        n = len(self.window)
+        self.Middle = self.sum / n
+        variance = max(0.0, self.sum_of_squares / n - self.Middle * self.Middle) if self.Samples >= 2 else 0.0
+        self.StandardDeviation = math.sqrt(variance)
+        self.Upper = self.Middle + self.k * self.StandardDeviation
+        self.Lower = self.Middle - self.k * self.StandardDeviation
+        return self.Middle
+
+
+class RSI:
+    def __init__(self, period=14):
+        self.period = period
+        self.AverageGain = Wilder(period)
+        self.AverageLoss = Wilder(period)
+        self.previous = None
+        self.Samples = 0
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.AverageLoss.IsReady
+
+    def Update(self, value):
+        self.Samples += 1
+        if self.previous is not None:
+            change = value - self.previous
+            self.AverageGain.Update(max(change, 0.0))
+            self.AverageLoss.Update(max(-change, 0.0))
+            if self.AverageLoss.Value == 0:
+                self.Value = 100.0
+            else:
+                self.Value = 100 - 100 / (1 + self.AverageGain.Value / self.AverageLoss.Value)
+        self.previous = value
+        return self.Value
+
+
+def _true_range(high, low, previous_close):
+    return max(high - low, abs(high - previous_close), abs(low - previous_close))
+
+
+class ATR:
+    '''the first bar's true range is 0, as it has no previous close'''
+    def __init__(self, period=14):
+        self.average = Wilder(period)
+        self.previous_close = None
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.average.IsReady
+
+    def Update(self, high, low, close):
+        true_range = 0.0 if self.previous_close is None else _true_range(high, low, self.previous_close)
+        self.previous_close = close
+        self.Value = self.average.Update(true_range)
+        return self.Value
+
+
+class ADX:
+    '''
+    True range and directional movement are smoothed with Wilder's running sum;
+    the directional index is averaged with Wilder's moving average
+    '''
+    def __init__(self, period=14):
+        self.period = period
+        self.average = Wilder(period)
+        self.previous = None
+        self.moves = 0
+        self.smoothed_tr = self.smoothed_plus = self.smoothed_minus = 0.0
+        self.PositiveDirectionalIndex = self.NegativeDirectionalIndex = 0.0
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.average.IsReady
+
+    def Update(self, high, low, close):
+        if self.previous is not None:
+            previous_high, previous_low, previous_close = self.previous
+            up = high - previous_high
+            down = previous_low - low
+            plus = up if up > down and up > 0 else 0.0
+            minus = down if down > up and down > 0 else 0.0
+            true_range = _true_range(high, low, previous_close)
+
+            self.moves += 1
+            if self.moves > self.period:
+                self.smoothed_tr -= self.smoothed_tr / self.period
+                self.smoothed_plus -= self.smoothed_plus / self.period
+                self.smoothed_minus -= self.smoothed_minus / self.period
+            self.smoothed_tr += true_range
+            self.smoothed_plus += plus
+            self.smoothed_minus += minus
+
+            if self.smoothed_tr != 0:
+                self.PositiveDirectionalIndex = 100 * self.smoothed_plus / self.smoothed_tr
+                self.NegativeDirectionalIndex = 100 * self.smoothed_minus / self.smoothed_tr
+            total = self.PositiveDirectionalIndex + self.NegativeDirectionalIndex
+            dx = 100 * abs(self.PositiveDirectionalIndex - self.NegativeDirectionalIndex) / total if total != 0 else 0.0
+            self.Value = self.average.Update(dx)
+        self.previous = (high, low, close)
+        return self.Value
+
+
+class OBV:
+    '''starts at the first bar's volume'''
+    def __init__(self):
+        self.previous_close = None
+        self.Value = 0.0
+
+    @property
+    def IsReady(self):
+        return self.previous_close is not None
+
+    def Update(self, close, volume):
+        if self.previous_close is None:
+            self.Value = volume
+        elif close > self.previous_close:
+            self.Value += volume
+        elif close < self.previous_close:
+            self.Value -= volume
+        self.previous_close = close
+        return self.Value
+
+
+_INDICATORS = (EMA, SMA, Wilder, MACD, Bollinger, RSI, ATR, ADX, OBV)
+
+
+def indicator_state(indicator, prefix=''):
+    '''
+    The complete state of an indicator as named arrays, nested indicators under
+    dotted names. Restoring it with restore_indicator continues the indicator
+    exactly where it stopped.
+    '''
+    state = {}
+    for name, value in vars(indicator).items():
+        if isinstance(value, _INDICATORS):
+            state.update(indicator_state(value, prefix + name + '.'))
+        elif value is None:
+            state[prefix + name] = np.zeros(0)
+        elif isinstance(value, (deque, tuple)):
+            state[prefix + name] = np.array(value, dtype=np.float64)
+        else:
+            state[prefix + name] = np.array(value)
+    return state
+
+
+def restore_indicator(indicator, state, prefix=''):
+    '''sets indicator to a state returned by indicator_state'''
+    for name, value in vars(indicator).items():
+        if isinstance(value, _INDICATORS):
+            restore_indicator(value, state, prefix + name + '.')
+            continue
+        stored = state[prefix + name]
+        if isinstance(value, deque):
+            value.clear()
+            value.extend(stored.tolist())
+        elif stored.ndim == 0:
+            setattr(indicator, name, stored.item())
+        else:
+            # None was stored as an empty array, a tuple as its values
+            setattr(indicator, name, tuple(stored.tolist()) if len(stored) > 0 else None)
+
+
+def _as_rows(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.atleast_2d(values), values.ndim == 1
+
+
+def _shape_like(result, one_dimensional):
+    return result[0] if one_dimensional else result
+
+
+def ema(values, period):
+    x, flat = _as_rows(values)
+    k = 2 / (period + 1)
+    out = np.full(x.shape, np.nan)
+    current = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        column = x[:, t]
+        current = np.where(np.isnan(current), column, column * k + current * (1 - k))
+        out[:, t] = current
+    return _shape_like(out, flat)
+
+
+def _wilder_rows(x, period):
+    '''Wilder average of the rows of x; NaNs before a row's first value are skipped'''
+    k = 1 / period
+    out = np.full(x.shape, np.nan)
+    total = np.zeros(x.shape[0])
+    samples = np.zeros(x.shape[0], dtype=np.int64)
+    current = np.zeros(x.shape[0])
+    for t in range(x.shape[1]):
+        column = x[:, t]
+        valid = ~np.isnan(column)
+        samples = samples + valid
+        seeding = valid & (samples <= period)
+        total = np.where(seeding, total + column, total)
+        current = np.where(seeding, total / np.maximum(samples, 1), np.where(valid, column * k + current * (1 - k), current))
+        out[:, t] = np.where(samples > 0, current, np.nan)
+    return out
+
+
+def wilder(values, period):
+    x, flat = _as_rows(values)
+    return _shape_like(_wilder_rows(x, period), flat)
+
+
+def _rolling_sums(x, period):
+    '''running sums over the last period values, subtracting the oldest like SMA.Update'''
+    sums = np.full(x.shape, np.nan)
+    squares = np.full(x.shape, np.nan)
+    counts = np.zeros(x.shape, dtype=np.int64)
+    total = np.zeros(x.shape[0])
+    total_squares = np.zeros(x.shape[0])
+    count = np.zeros(x.shape[0], dtype=np.int64)
+    for t in range(x.shape[1]):
+        column = x[:, t]
+        valid = ~np.isnan(column)
+        if t >= period:
+            oldest = x[:, t - period]
+            full = valid & ~np.isnan(oldest)
+            total = np.where(full, total - oldest, total)
+            total_squares = np.where(full, total_squares - oldest * oldest, total_squares)
+        count = np.where(valid, np.minimum(count + 1, period), count)
+        total = np.where(valid, total + column, total)
+        total_squares = np.where(valid, total_squares + column * column, total_squares)
+        sums[:, t] = total
+        squares[:, t] = total_squares
+        counts[:, t] = count
+    return sums, squares, counts
+
+
+def sma(values, period):
+    x, flat = _as_rows(values)
+    sums, _, counts = _rolling_sums(x, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(counts > 0, sums / counts, np.nan)
+    return _shape_like(out, flat)
+
+
+def _bollinger_rows(x, period, k):
+    sums, squares, counts = _rolling_sums(x, period)
+    samples = np.cumsum(~np.isnan(x), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        middle = np.where(counts > 0, sums / counts, np.nan)
+        variance = np.where(samples >= 2, np.maximum(0.0, squares / counts - middle * middle), 0.0)
+    deviation = np.sqrt(variance)
+    upper = middle + k * deviation
+    lower = middle - k * deviation
+    return lower, middle, upper, deviation, sums, squares
+
+
+def bollinger(values, period=20, k=2):
+    '''returns (lower, middle, upper)'''
+    x, flat = _as_rows(values)
+    lower, middle, upper = _bollinger_rows(x, period, k)[:3]
+    return tuple(_shape_like(band, flat) for band in (lower, middle, upper))
+
+
+def macd(values, fast=12, slow=26, signal=9):
+    '''returns (fast, slow, macd, signal, histogram); signal and histogram are NaN until they start'''
+    x, flat = _as_rows(values)
+    fast_line = ema(x, fast)
+    slow_line = ema(x, slow)
+    macd_line = fast_line - slow_line
+    samples = np.cumsum(~np.isnan(x), axis=1)
+    # the signal line only sees MACD values once both averages are ready
+    signal_line = ema(np.where(samples >= max(fast, slow), macd_line, np.nan), signal)
+    histogram = np.where(samples >= max(fast, slow) + signal - 1, macd_line - signal_line, np.nan)
+    return tuple(_shape_like(line, flat) for line in (fast_line, slow_line, macd_line, signal_line, histogram))
+
+
+def _rsi_rows(x, period):
+    change = np.full(x.shape, np.nan)
+    change[:, 1:] = x[:, 1:] - x[:, :-1]
+    gains = np.where(np.isnan(change), np.nan, np.maximum(change, 0.0))
+    losses = np.where(np.isnan(change), np.nan, np.maximum(-change, 0.0))
+    average_gain = _wilder_rows(gains, period)
+    average_loss = _wilder_rows(losses, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(average_loss == 0, 100.0, 100 - 100 / (1 + average_gain / average_loss))
+    out = np.where(np.isnan(average_loss), np.where(np.isnan(x), np.nan, 0.0), out)
+    return out, gains, losses, average_gain, average_loss
+
+
+def rsi(values, period=14):
+    x, flat = _as_rows(values)
+    return _shape_like(_rsi_rows(x, period)[0], flat)
+
+
+def _true_ranges(high, low, close):
+    previous_close = np.full(close.shape, np.nan)
+    previous_close[:, 1:] = close[:, :-1]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return np.where(np.isnan(previous_close), np.nan, true_range)
+
+
+def _atr_true_ranges(h, l, c):
+    true_range = _true_ranges(h, l, c)
+    # the first bar of a row contributes a true range of 0
+    first = np.isnan(true_range) & ~np.isnan(c)
+    return np.where(first, 0.0, true_range)
+
+
+def atr(high, low, close, period=14):
+    h, flat = _as_rows(high)
+    l, _ = _as_rows(low)
+    c, _ = _as_rows(close)
+    return _shape_like(_wilder_rows(_atr_true_ranges(h, l, c), period), flat)
+
+
+def _adx_rows(h, l, c, period):
+    '''the directional index and its Wilder average, and the smoothing state after the last bar'''
+    true_range = _true_ranges(h, l, c)
+    up = np.full(h.shape, np.nan)
+    down = np.full(h.shape, np.nan)
+    up[:, 1:] = h[:, 1:] - h[:, :-1]
+    down[:, 1:] = l[:, :-1] - l[:, 1:]
+    plus = np.where((up > down) & (up > 0), up, 0.0)
+    minus = np.where((down > up) & (down > 0), down, 0.0)
+
+    rows = h.shape[0]
+    moves = np.zeros(rows, dtype=np.int64)
+    smoothed_tr = np.zeros(rows)
+    smoothed_plus = np.zeros(rows)
+    smoothed_minus = np.zeros(rows)
+    positive = np.zeros(rows)
+    negative = np.zeros(rows)
+    dx = np.full(h.shape, np.nan)
+    for t in range(h.shape[1]):
+        valid = ~np.isnan(true_range[:, t])
+        moves = moves + valid
+        decay = valid & (moves > period)
+        smoothed_tr = np.where(decay, smoothed_tr - smoothed_tr / period, smoothed_tr)
+        smoothed_plus = np.where(decay, smoothed_plus - smoothed_plus / period, smoothed_plus)
+        smoothed_minus = np.where(decay, smoothed_minus - smoothed_minus / period, smoothed_minus)
+        smoothed_tr = np.where(valid, smoothed_tr + true_range[:, t], smoothed_tr)
+        smoothed_plus = np.where(valid, smoothed_plus + plus[:, t], smoothed_plus)
+        smoothed_minus = np.where(valid, smoothed_minus + minus[:, t], smoothed_minus)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            positive = np.where(valid & (smoothed_tr != 0), 100 * smoothed_plus / smoothed_tr, positive)
+            negative = np.where(valid & (smoothed_tr != 0), 100 * smoothed_minus / smoothed_tr, negative)
+            total = positive + negative
+            dx[:, t] = np.where(valid, np.where(total != 0, 100 * np.abs(positive - negative) / total, 0.0), np.nan)
+
+    state = (moves, smoothed_tr, smoothed_plus, smoothed_minus, positive, negative)
+    return dx, _wilder_rows(dx, period), state
+
+
+def adx(high, low, close, period=14):
+    h, flat = _as_rows(high)
+    l, _ = _as_rows(low)
+    c, _ = _as_rows(close)
+    out = _adx_rows(h, l, c, period)[1]
+    # before the second bar LEAN reports 0
+    out = np.where(np.isnan(out) & ~np.isnan(c), 0.0, out)
+    return _shape_like(out, flat)
+
+
+def obv(close, volume):
+    c, flat = _as_rows(close)
+    v, _ = _as_rows(volume)
+    change = np.zeros(c.shape)
+    change[:, 1:] = np.sign(c[:, 1:] - c[:, :-1])
+    first = ~np.isnan(c) & np.concatenate([np.ones((c.shape[0], 1), dtype=bool), np.isnan(c[:, :-1])], axis=1)
+    steps = np.where(first, v, np.nan_to_num(change) * v)
+    out = np.cumsum(np.where(np.isnan(c), 0.0, steps), axis=1)
+    return _shape_like(np.where(np.isnan(c), np.nan, out), flat)
+
+
+# Vectorized warm-up of the classes. Each load_* function takes fresh
+# indicators with the same parameters, one per row of the (symbols x time)
+# inputs, computes the series with the functions above and leaves every
+# indicator in the state its Update would leave it in after the row's last
+# value. Returns the series; rows are left padded with NaN like the inputs.
+
+def _last_values(x, i, count):
+    return x[i, x.shape[1] - count:]
+
+
+def _set_ema(indicator, line, count):
+    indicator.Samples = int(count)
+    if count > 0:
+        indicator.Value = float(line[-1])
+
+
+def _set_wilder(indicator, inputs, average):
+    '''inputs and average are one row, the average's inputs and its _wilder_rows output'''
+    inputs = inputs[~np.isnan(inputs)]
+    indicator.Samples = len(inputs)
+    if len(inputs) > 0:
+        # summed one value at a time, like Update
+        indicator.sum = float(np.cumsum(inputs[:indicator.period])[-1])
+        indicator.Value = float(average[-1])
+
+
+def load_ema(indicators, values):
+    x, _ = _as_rows(values)
+    line = ema(x, indicators[0].period)
+    counts = np.sum(~np.isnan(x), axis=1)
+    for i, indicator in enumerate(indicators):
+        _set_ema(indicator, line[i], counts[i])
+    return line
+
+
+def load_macd(indicators, values):
+    '''returns (fast, slow, macd, signal, histogram) like macd'''
+    x, _ = _as_rows(values)
+    first = indicators[0]
+    fast, slow, signal = first.Fast.period, first.Slow.period, first.Signal.period
+    lines = macd(x, fast, slow, signal)
+    fast_line, slow_line, macd_line, signal_line, histogram = lines
+    counts = np.sum(~np.isnan(x), axis=1)
+    for i, indicator in enumerate(indicators):
+        _set_ema(indicator.Fast, fast_line[i], counts[i])
+        _set_ema(indicator.Slow, slow_line[i], counts[i])
+        _set_ema(indicator.Signal, signal_line[i], max(0, counts[i] - max(fast, slow) + 1))
+        if counts[i] > 0:
+            indicator.Value = float(macd_line[i, -1])
+        if indicator.Signal.IsReady:
+            indicator.Histogram = float(histogram[i, -1])
+    return lines
+
+
+def load_bollinger(indicators, values):
+    '''returns (lower, middle, upper) like bollinger'''
+    x, _ = _as_rows(values)
+    first = indicators[0]
+    lower, middle, upper, deviation, sums, squares = _bollinger_rows(x, first.period, first.k)
+    counts = np.sum(~np.isnan(x), axis=1)
+    for i, indicator in enumerate(indicators):
+        if counts[i] == 0:
+            continue
+        indicator.Samples = int(counts[i])
+        indicator.window.extend(_last_values(x, i, min(counts[i], indicator.period)).tolist())
+        indicator.sum = float(sums[i, -1])
+        indicator.sum_of_squares = float(squares[i, -1])
+        indicator.Lower, indicator.Middle, indicator.Upper = float(lower[i, -1]), float(middle[i, -1]), float(upper[i, -1])
+        indicator.StandardDeviation = float(deviation[i, -1])
+    return lower, middle, upper
+
+
+def load_rsi(indicators, values):
+    x, _ = _as_rows(values)
+    out, gains, losses, average_gain, average_loss = _rsi_rows(x, indicators[0].period)
+    counts = np.sum(~np.isnan(x), axis=1)
+    for i, indicator in enumerate(indicators):
+        if counts[i] == 0:
+            continue
+        indicator.Samples = int(counts[i])
+        indicator.previous = float(x[i, -1])
+        indicator.Value = float(out[i, -1])
+        _set_wilder(indicator.AverageGain, gains[i], average_gain[i])
+        _set_wilder(indicator.AverageLoss, losses[i], average_loss[i])
+    return out
+
+
+def load_atr(indicators, high, low, close):
+    h, _ = _as_rows(high)
+    l, _ = _as_rows(low)
+    c, _ = _as_rows(close)
+    true_range = _atr_true_ranges(h, l, c)
+    out = _wilder_rows(true_range, indicators[0].average.period)
+    for i, indicator in enumerate(indicators):
+        if np.isnan(c[i, -1]):
+            continue
+        _set_wilder(indicator.average, true_range[i], out[i])
+        indicator.previous_close = float(c[i, -1])
+        indicator.Value = float(out[i, -1])
+    return out
+
+
+def load_adx(indicators, high, low, close):
+    h, _ = _as_rows(high)
+    l, _ = _as_rows(low)
+    c, _ = _as_rows(close)
+    dx, average, state = _adx_rows(h, l, c, indicators[0].period)
+    moves, smoothed_tr, smoothed_plus, smoothed_minus, positive, negative = state
+    out = np.where(np.isnan(average) & ~np.isnan(c), 0.0, average)
+    for i, indicator in enumerate(indicators):
+        if np.isnan(c[i, -1]):
+            continue
+        indicator.previous = (float(h[i, -1]), float(l[i, -1]), float(c[i, -1]))
+        indicator.moves = int(moves[i])
+        indicator.smoothed_tr = float(smoothed_tr[i])
+        indicator.smoothed_plus = float(smoothed_plus[i])
+        indicator.smoothed_minus = float(smoothed_minus[i])
+        indicator.PositiveDirectionalIndex = float(positive[i])
+        indicator.NegativeDirectionalIndex = float(negative[i])
+        indicator.Value = float(out[i, -1])
+        _set_wilder(indicator.average, dx[i], average[i])
+    return out
+
+
+def load_obv(indicators, close, volume):
+    c, _ = _as_rows(close)
+    out = obv(c, volume)
+    for i, indicator in enumerate(indicators):
+        if np.isnan(c[i, -1]):
+            continue
+        indicator.previous_close = float(c[i, -1])
+        indicator.Value = float(out[i, -1])
+    return out
+
+
+def all_outputs(high, low, close, volume):
+    '''every value verify_against_lean compares, from the vectorized functions'''
+    _, _, macd_line, signal_line, _ = macd(close)
+    lower, middle, upper = bollinger(close)
+    return {'macd': macd_line, 'signal': signal_line, 'lower': lower, 'middle': middle, 'upper': upper,
+            'rsi': rsi(close), 'ema50': ema(close, 50), 'ema200': ema(close, 200), 'adx': adx(high, low, close),
+            'obv': obv(close, volume), 'atr': atr(high, low, close)}
+
+
+def lean_reference(algo, symbol, bars=500):
+    '''
+    Runs LEAN's indicators over the daily history of symbol. Returns the
+    history's high, low, close and volume and LEAN's value of every output of
+    all_outputs after each bar; the signal line is NaN until it is ready.
+    '''
+    from AlgorithmImports import (AverageDirectionalIndex, AverageTrueRange, BollingerBands, ExponentialMovingAverage,
+                                  MovingAverageConvergenceDivergence, MovingAverageType, OnBalanceVolume,
+                                  RelativeStrengthIndex, Resolution, TradeBar)
+
+    history = list(algo.History[TradeBar](symbol, bars, Resolution.Daily))
+    reference = {name: np.array([float(getattr(bar, name.capitalize())) for bar in history])
+                 for name in ('high', 'low', 'close', 'volume')}
+
+    lean = {'macd': MovingAverageConvergenceDivergence(12, 26, 9, MovingAverageType.Exponential),
+            'bollinger': BollingerBands(20, 2, MovingAverageType.Simple), 'rsi': RelativeStrengthIndex(14),
+            'ema50': ExponentialMovingAverage(50), 'ema200': ExponentialMovingAverage(200),
+            'adx': AverageDirectionalIndex(14), 'obv': OnBalanceVolume(), 'atr': AverageTrueRange(14)}
+    expected = {name: [] for name in ('macd', 'signal', 'lower', 'middle', 'upper', 'rsi', 'ema50', 'ema200', 'adx', 'obv', 'atr')}
+    for bar in history:
+        for name in ('macd', 'bollinger', 'rsi', 'ema50', 'ema200'):
+            lean[name].Update(bar.EndTime, bar.Close)
+        for name in ('adx', 'obv', 'atr'):
+            lean[name].Update(bar)
+        expected['macd'].append(float(lean['macd'].Current.Value))
+        expected['signal'].append(float(lean['macd'].Signal.Current.Value) if lean['macd'].Signal.IsReady else np.nan)
+        expected['lower'].append(float(lean['bollinger'].LowerBand.Current.Value))
+        expected['middle'].append(float(lean['bollinger'].MiddleBand.Current.Value))
+        expected['upper'].append(float(lean['bollinger'].UpperBand.Current.Value))
+        for name in ('rsi', 'ema50', 'ema200', 'adx', 'obv', 'atr'):
+            expected[name].append(float(lean[name].Current.Value))
+    reference.update({name: np.array(values) for name, values in expected.items()})
+    return reference
+
+
+def save_lean_reference(algo, symbol, bars=500, key="numpy_indicators_reference"):
+    '''
+    Stores lean_reference as an .npz in the ObjectStore. Downloaded to
+    tests/data/lean_indicator_reference.npz it is the golden file the tests
+    check the NumPy indicators against.
+    '''
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **lean_reference(algo, symbol, bars))
+    algo.ObjectStore.SaveBytes(key, bytearray(buffer.getvalue()))
+
+
+def verify_against_lean(algo, symbol, bars=500):
+    '''
+    Golden check inside the engine: runs LEAN's indicators and the vectorized
+    functions here over the same daily history and returns the largest
+    absolute difference per indicator value.
+    '''
+    reference = lean_reference(algo, symbol, bars)
+    actual = all_outputs(reference['high'], reference['low'], reference['close'], reference['volume'])
+    actual['signal'] = np.where(np.isnan(reference['signal']), np.nan, actual['signal'])
+    return {name: float(np.nanmax(np.abs(reference[name] - actual[name]))) if len(reference['close']) > 0 else 0.0
+            for name in actual}
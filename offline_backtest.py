@@ -0,0 +1,488 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import numpy_indicators as ni
+from bollinger_oracle import get_bollinger_buy_and_short_batch
+from macd_oracle import get_macd_score_batch
+from pending_entries import PendingEntries
+from rsi_oracle import get_rsi_buy_short_batch
+from screening import prefilter
+from trailing_stops import TrailingStops
+from trendCalculator import get_trend_batch
+
+
+# custom_alpha's parameters
+DEFAULT_PARAMS = {
+    'macd_params': {'cross_check_length': 35, 'macd_above_below_length': 28, 'long_macd_threshold': 0.25,
+                    'short_macd_threshold': -0.25},
+    'macd_candles_history_size': 15,
+    'Bollinger_window_size': 25,
+    'bollinger_params': {'long_threshold': 1, 'short_threshold': 1},
+    'ema_rolling_window_length': 250,
+    'ema_trend_threshold': 210,
+    'derivative_threshold': .005,
+    'price_rolling_window_length': 30,
+    'RSIS_rolling_window_length': 30,
+    'adx_rolling_window_length': 30,
+    'adx_threshold': 30,
+    'obv_rolling_window_length': 150,
+    'obv_threshold': .5,
+    'atr_stop_multiplier': 3,
+    'trend_order': 5,
+    'K_order': 2,
+    'rsi_trend_order': 5,
+    'rsi_K_order': 2,
+    'obv_trend_order': 2,
+    'obv_K_order': 2,
+    'insight_expiry': 14,
+    'entry_expiry': 70,
+    'port_bias': 700,
+    'leverage': 1.85,
+    # held at the end of the previous run; the first Update re-enters them at weight .75
+    'initial_tickers': ('MS', 'HOOD', 'DAL', 'TOST', 'APP'),
+}
+
+
+class Bars:
+    '''
+    OHLCV bars of many symbols on one time axis. times are bar end times; the
+    price arrays are (symbols x time) with NaN where a symbol has no bar.
+    '''
+    def __init__(self, tickers, times, open, high, low, close, volume):
+        self.tickers = list(tickers)
+        self.times = np.asarray(times, dtype='datetime64[s]')
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_frames(cls, frames):
+        '''frames maps ticker to a DataFrame indexed by end time with open/high/low/close/volume columns'''
+        tickers = sorted(frames)
+        times = np.unique(np.concatenate([frames[t].index.values.astype('datetime64[s]') for t in tickers])) if tickers else np.array([], dtype='datetime64[s]')
+        arrays = {name: np.full((len(tickers), len(times)), np.nan) for name in ('open', 'high', 'low', 'close', 'volume')}
+        for row, ticker in enumerate(tickers):
+            frame = frames[ticker]
+            columns = np.searchsorted(times, frame.index.values.astype('datetime64[s]'))
+            for name in arrays:
+                arrays[name][row, columns] = frame[name].values
+        return cls(tickers, times, **arrays)
+
+    def select(self, tickers):
+        rows = [self.tickers.index(ticker) for ticker in tickers]
+        return Bars(tickers, self.times, self.open[rows], self.high[rows], self.low[rows], self.close[rows], self.volume[rows])
+
+
+def load_csv_bars(directory, tickers=None):
+    '''
+    Reads <directory>/<ticker>.csv files with time,open,high,low,close,volume
+    columns, time being the bar's end time
+    '''
+    if tickers is None:
+        tickers = [name[:-4] for name in os.listdir(directory) if name.endswith('.csv')]
+    frames = {}
+    for ticker in tickers:
+        frame = pd.read_csv(os.path.join(directory, ticker + '.csv'), parse_dates=['time'], index_col='time')
+        frames[ticker] = frame.sort_index()
+    return Bars.from_frames(frames)
+
+
+def _history_before(bars, start, length):
+    '''
+    bars as an algorithm starting at start sees them: only the last length bars
+    of each symbol up to start, as History returns them, and every bar after.
+    Returns the trimmed bars and a mask of the history bars.
+    '''
+    before = (bars.times <= start)[None, :] & ~np.isnan(bars.close)
+    order = np.cumsum(before, axis=1)
+    dropped = before & (order <= order[:, -1:] - length)
+    trim = lambda values: np.where(dropped, np.nan, values)
+    trimmed = Bars(bars.tickers, bars.times, trim(bars.open), trim(bars.high), trim(bars.low), trim(bars.close), trim(bars.volume))
+    return trimmed, before & ~dropped
+
+
+def _last_values(values, mask, length):
+    '''(symbols x length) of each row's values where mask is set, the last length of them, NaN padded on the left'''
+    out = np.full((len(values), length), np.nan)
+    for row in range(len(values)):
+        selected = values[row, mask[row]][-length:]
+        out[row, length - len(selected):] = selected
+    return out
+
+
+def _windows(series, valid, size, seed=()):
+    '''
+    For every position of a 1-D series, the last size values up to and
+    including it, newest first and NaN padded on the right, plus their count.
+    The values are the seed (warm-up values, oldest first) followed by the
+    valid values of the series. Positions that are not valid get an empty window.
+    '''
+    seed = np.asarray(seed, dtype=np.float64)
+    samples = np.concatenate([seed, series[valid]])
+    padded = np.concatenate([np.full(size - 1, np.nan), samples])
+    windows = np.full((len(series), size), np.nan)
+    counts = np.zeros(len(series), dtype=np.int64)
+    if valid.any():
+        windows[valid] = sliding_window_view(padded, size)[len(seed):, ::-1]
+        counts[valid] = np.minimum(np.arange(len(seed) + 1, len(samples) + 1), size)
+    return windows, counts
+
+
+def _trends(windows, counts, order, K):
+    '''get_trend_batch over newest-first windows of varying fill'''
+    trends = np.full(len(windows), np.nan)
+    for count in np.unique(counts[counts > 0]):
+        rows = counts == count
+        trends[rows] = get_trend_batch(windows[rows, :count], order, K)
+    return trends
+
+
+class EvaluationInputs:
+    '''
+    The parameter-free inputs of the 10:00 evaluation: daily indicators as the
+    daily fan-out updates them and the hourly RSI and close, sampled at every
+    10:00 bar as (symbols x evaluations) arrays. They are computed once per
+    start and shared by every parameter set.
+
+    The warm_ arrays are the same values at the history bars before start,
+    (symbols x history_length) and NaN padded on the left, which
+    custom_alpha.replay_history seeds the windows with.
+    '''
+    ARRAYS = ('columns', 'times', 'daily_index', 'price', 'ema50', 'ema200', 'macd', 'daily_rsi', 'adx', 'obv', 'atr',
+              'lower', 'middle', 'upper', 'hourly_rsi', 'valid', 'warm_price', 'warm_ema50', 'warm_ema200', 'warm_macd',
+              'warm_adx', 'warm_obv', 'warm_lower', 'warm_middle', 'warm_upper', 'warm_hourly_rsi')
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def compute(cls, daily, hourly, start=None, history_length=750):
+        '''
+        start is when the algorithm starts, midnight before the first hourly bar
+        by default. Like custom_alpha.warm_up, the indicators only see the last
+        history_length daily and hourly bars before it; the evaluations are the
+        10:00 bars after it.
+        '''
+        start = np.datetime64(start, 's') if start is not None else hourly.times[0].astype('datetime64[D]').astype('datetime64[s]')
+        daily, daily_history = _history_before(daily, start, history_length)
+        hourly, hourly_history = _history_before(hourly, start, history_length)
+
+        ema50 = ni.ema(daily.close, 50)
+        ema200 = ni.ema(daily.close, 200)
+        _, _, macd_line, _, _ = ni.macd(daily.close, 12, 26, 9)
+        lower, middle, upper = ni.bollinger(daily.close, 20, 2)
+        daily_rsi = ni.rsi(daily.close, 14)
+        adx = ni.adx(daily.high, daily.low, daily.close, 14)
+        obv = ni.obv(daily.close, daily.volume)
+        atr = ni.atr(daily.high, daily.low, daily.close, 14)
+        daily_samples = np.cumsum(~np.isnan(daily.close), axis=1)
+        hourly_rsi = ni.rsi(hourly.close, 14)
+
+        minute_of_day = (hourly.times - hourly.times.astype('datetime64[D]')).astype('timedelta64[m]').astype(np.int64)
+        columns = np.flatnonzero((minute_of_day == 10 * 60) & (hourly.times > start))
+        times = hourly.times[columns]
+        # the daily bar of a trading day is consolidated once the next day's first bar arrives
+        daily_dates = (daily.times - np.timedelta64(1, 's')).astype('datetime64[D]')
+        daily_index = np.searchsorted(daily_dates, times.astype('datetime64[D]'), side='left') - 1
+
+        d = np.maximum(daily_index, 0)
+        has_daily = (daily_index >= 0)[None, :]
+        take = lambda values: np.where(has_daily, values[:, d], np.nan)
+        price = hourly.close[:, columns]
+        warm = lambda values: _last_values(values, daily_history, history_length)
+        return cls(columns=columns, times=times, daily_index=daily_index, price=price,
+                   ema50=take(ema50), ema200=take(ema200), macd=take(macd_line), daily_rsi=take(daily_rsi),
+                   adx=take(adx), obv=take(obv), atr=take(atr), lower=take(lower), middle=take(middle), upper=take(upper),
+                   hourly_rsi=hourly_rsi[:, columns],
+                   # the alpha skips symbols until their daily MACD is ready
+                   valid=~np.isnan(price) & (take(daily_samples.astype(np.float64)) >= 34),
+                   warm_price=warm(daily.close), warm_ema50=warm(ema50), warm_ema200=warm(ema200), warm_macd=warm(macd_line),
+                   warm_adx=warm(adx), warm_obv=warm(obv), warm_lower=warm(lower), warm_middle=warm(middle),
+                   warm_upper=warm(upper), warm_hourly_rsi=_last_values(hourly_rsi, hourly_history, history_length))
+
+
+# the parameters DailyEvaluation's windows depend on; the rest only change the gates and the hourly loop
+EVALUATION_PARAMS = ('price_rolling_window_length', 'trend_order', 'K_order', 'RSIS_rolling_window_length', 'rsi_trend_order',
+                     'rsi_K_order', 'obv_rolling_window_length', 'obv_trend_order', 'obv_K_order', 'ema_rolling_window_length',
+                     'adx_rolling_window_length', 'Bollinger_window_size', 'bollinger_params', 'macd_candles_history_size',
+                     'macd_params')
+
+
+class DailyEvaluation:
+    '''
+    Everything the 10:00 evaluation of custom_alpha.Update reads, for every
+    symbol and every 10:00 bar: (symbols x evaluations) arrays.
+    '''
+    def __init__(self, inputs, params):
+        p = params
+        for name in EvaluationInputs.ARRAYS:
+            setattr(self, name, getattr(inputs, name))
+        symbols, E = self.price.shape
+
+        shape = (symbols, E)
+        self.price_trend_raw, self.rsi_trend_raw, self.obv_trend_raw = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        self.ema_trend, self.derivative = np.zeros(shape), np.zeros(shape)
+        self.adx_max, self.adx_min = np.full(shape, np.nan), np.full(shape, np.nan)
+        self.bollinger_score, self.macd_score = np.zeros(shape), np.zeros(shape, dtype=np.int64)
+        self.last_price = np.full(shape, np.nan)
+
+        # trend windows of every symbol are fitted together, one get_trend_batch call per window fill
+        trend_inputs = {
+            'price': (self.price, self.warm_price, p['price_rolling_window_length'], p['trend_order'], p['K_order'], self.price_trend_raw),
+            'rsi': (self.hourly_rsi, self.warm_hourly_rsi, p['RSIS_rolling_window_length'], p['rsi_trend_order'], p['rsi_K_order'], self.rsi_trend_raw),
+            'obv': (self.obv, self.warm_obv, p['obv_rolling_window_length'], p['obv_trend_order'], p['obv_K_order'], self.obv_trend_raw),
+        }
+        trend_windows = {name: ([], []) for name in trend_inputs}
+
+        for s in range(symbols):
+            valid = self.valid[s]
+            if not valid.any():
+                continue
+            rows = np.flatnonzero(valid)
+            # the history values replay_history seeds each window with, oldest first
+            seed = lambda warm, size: warm[s][~np.isnan(warm[s])][-size:]
+
+            for name, (values, warm, size, _, _, _) in trend_inputs.items():
+                windows, counts = _windows(values[s], valid, size, seed(warm, size))
+                trend_windows[name][0].append(windows[rows])
+                trend_windows[name][1].append(counts[rows])
+                if name == 'price':
+                    # the newest value of the price window, which stays put on days without a 10:00 bar
+                    self.last_price[s] = pd.Series(windows[:, 0]).ffill().values
+
+            size = p['ema_rolling_window_length']
+            above, counts = _windows((self.ema50[s] > self.ema200[s]).astype(np.float64), valid, size,
+                                     (seed(self.warm_ema50, size) > seed(self.warm_ema200, size)).astype(np.float64))
+            self.ema_trend[s, rows] = np.nansum(above[rows], axis=1)
+            ema50s, counts = _windows(self.ema50[s], valid, 2, seed(self.warm_ema50, 2))
+            self.derivative[s, rows] = np.where(counts[rows] == 2, (ema50s[rows, 0] - ema50s[rows, 1]) / ema50s[rows, 0], 0)
+
+            size = p['adx_rolling_window_length']
+            adxs, _ = _windows(self.adx[s], valid, size, seed(self.warm_adx, size))
+            self.adx_max[s, rows] = np.nanmax(adxs[rows], axis=1)
+            self.adx_min[s, rows] = np.nanmin(adxs[rows], axis=1)
+
+            size = p['Bollinger_window_size']
+            bands = [_windows(values[s], valid, size, seed(warm, size))[0][rows]
+                     for values, warm in ((self.lower, self.warm_lower), (self.middle, self.warm_middle),
+                                          (self.upper, self.warm_upper), (self.price, self.warm_price))]
+            counts = _windows(self.price[s], valid, size, seed(self.warm_price, size))[1][rows]
+            self.bollinger_score[s, rows] = get_bollinger_buy_and_short_batch(*bands, 1, p['bollinger_params'], counts)
+
+            size = p['macd_candles_history_size']
+            macds, counts = _windows(self.macd[s], valid, size, seed(self.warm_macd, size))
+            oldest_first = np.full((len(rows), size), np.nan)
+            for count in np.unique(counts[rows]):
+                same = counts[rows] == count
+                oldest_first[same, :count] = macds[rows][same, :count][:, ::-1]
+            self.macd_score[s, rows] = get_macd_score_batch(oldest_first, 1, p['macd_params'], counts[rows])
+
+        for name, (_, _, _, order, K, out) in trend_inputs.items():
+            windows, counts = trend_windows[name]
+            if windows:
+                out[self.valid] = _trends(np.concatenate(windows), np.concatenate(counts), order, K)
+
+    def signals(self, s, e, price, params):
+        '''
+        Runs the gate chain for symbol rows s at evaluation columns e with the
+        given current prices. Returns (long, short, entry scores).
+        '''
+        p = params
+        long_mask, short_mask, _ = prefilter(self.ema_trend[s, e], self.derivative[s, e], self.adx[s, e], self.adx_max[s, e],
+                                             self.adx_min[s, e], {'ema_trend_threshold': p['ema_trend_threshold'],
+                                                                  'derivative_threshold': p['derivative_threshold'],
+                                                                  'adx_threshold': p['adx_threshold']})
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_trend = self.price_trend_raw[s, e] / price
+            rsi_trend = self.rsi_trend_raw[s, e] / self.daily_rsi[s, e]
+            obv_trend = self.obv_trend_raw[s, e] / np.abs(self.obv[s, e])
+        rsi_score = get_rsi_buy_short_batch(price_trend, rsi_trend)
+        bollinger_score = self.bollinger_score[s, e]
+        macd_score = self.macd_score[s, e]
+
+        long = long_mask & (bollinger_score == 1) & (macd_score == 1) & (rsi_score == 1) & (obv_trend > p['obv_threshold'])
+        short = short_mask & (bollinger_score == 2) & (macd_score == 2) & (rsi_score == 2) & (obv_trend < -p['obv_threshold'])
+        with np.errstate(invalid='ignore'):
+            scores = np.abs(np.trunc(self.derivative[s, e] * self.adx[s, e] * np.maximum(price_trend, 1) * np.maximum(rsi_trend, 1)
+                                     * np.maximum(obv_trend, 1) * 100 + p['port_bias']))
+        return long, short, scores
+
+
+class BacktestResult:
+    def __init__(self, tickers, times, equity, positions, insights, liquidations, cash):
+        self.tickers = tickers
+        self.times = times
+        self.equity = equity
+        self.positions = positions
+        self.insights = insights
+        self.liquidations = liquidations
+        self.starting_cash = cash
+
+    @property
+    def pnl(self):
+        return self.equity[-1] - self.starting_cash if len(self.equity) > 0 else 0.0
+
+    def max_drawdown(self):
+        if len(self.equity) == 0:
+            return 0.0
+        peaks = np.maximum.accumulate(self.equity)
+        return float(np.max((peaks - self.equity) / peaks))
+
+    def sharpe_ratio(self, periods_per_year=252 * 7):
+        '''annualized Sharpe ratio of the hourly equity returns, without a risk-free rate'''
+        if len(self.equity) < 2:
+            return 0.0
+        returns = np.diff(self.equity) / self.equity[:-1]
+        deviation = returns.std()
+        return float(returns.mean() / deviation * np.sqrt(periods_per_year)) if deviation > 0 else 0.0
+
+    def summary(self):
+        total_return = self.pnl / self.starting_cash
+        return "pnl: " + str(round(self.pnl, 2)) + " return: " + str(round(total_return, 4)) + " max drawdown: " \
+            + str(round(self.max_drawdown(), 4)) + " insights: " + str(len(self.insights)) + " stops: " + str(len(self.liquidations))
+
+
+class OfflineBacktest:
+    '''
+    Replays custom_alpha's signal chain over local bars without LEAN. Every
+    indicator and window is computed up front for the whole universe; the
+    hourly loop only walks the evaluations, armed entries and open trails.
+    Bars before start are the algorithm's warm-up history: the last 750 daily
+    and hourly bars prime the indicators and seed the windows.
+
+    Positions follow the InsightWeightingPortfolioConstructionModel with the
+    algorithm's leverage: each active Up/Down insight targets its weight, scaled
+    down so the weights sum to at most 1, and the portfolio is rebalanced at the
+    bar's close whenever the active insights change. There are no fees or
+    slippage, and symbols are not re-selected during the run. As in the alpha,
+    the first bar emits a .75-weight Up insight, lasting insight_expiry - 4
+    days, for each of the initial_tickers that has bars.
+    '''
+    def __init__(self, daily, hourly, params=None, start=None, end=None, cash=1000000, inputs=None, evaluation=None):
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.hourly = hourly
+        if inputs is None and evaluation is None:
+            inputs = EvaluationInputs.compute(daily.select(hourly.tickers) if daily.tickers != hourly.tickers else daily, hourly, start)
+        # precomputed inputs must have been computed for the same start, an evaluation also with the same EVALUATION_PARAMS
+        self.evaluation = evaluation if evaluation is not None else DailyEvaluation(inputs, self.params)
+        self.start = np.datetime64(start, 's') if start is not None else hourly.times[0]
+        self.end = np.datetime64(end, 's') if end is not None else hourly.times[-1]
+        self.cash = cash
+
+    def run(self):
+        p = self.params
+        hourly = self.hourly
+        evaluation = self.evaluation
+        tickers = hourly.tickers
+        row = {ticker: i for i, ticker in enumerate(tickers)}
+
+        columns = np.flatnonzero((hourly.times >= self.start) & (hourly.times <= self.end))
+        # latest evaluation column at or before every hourly column
+        latest_evaluation = np.searchsorted(evaluation.columns, np.arange(len(hourly.times)), side='right') - 1
+        is_evaluation = np.zeros(len(hourly.times), dtype=bool)
+        is_evaluation[evaluation.columns] = True
+        last_close = pd.DataFrame(hourly.close.T).ffill().values.T
+
+        pending = PendingEntries(p['entry_expiry'])
+        stops = TrailingStops()
+        entry_scores = {}
+        dirty = set()
+        active = {}
+        shares = np.zeros(len(tickers))
+        cash = float(self.cash)
+        equity = np.zeros(len(columns))
+        positions = np.zeros((len(tickers), len(columns)))
+        insights = []
+        liquidations = []
+
+        for n, c in enumerate(columns):
+            time = hourly.times[c]
+            e = latest_evaluation[c]
+            prices = last_close[:, c]
+            has_data = ~np.isnan(hourly.close[:, c])
+            changed = False
+
+            if n == 0:
+                for ticker in p['initial_tickers']:
+                    if ticker in row:
+                        active[row[ticker]] = (1, .75, time + np.timedelta64(p['insight_expiry'] - 4, 'D'))
+                        insights.append((time, ticker, 1, .75))
+                        changed = True
+
+            # signal chain for the symbols whose inputs changed
+            if e >= 0:
+                if is_evaluation[c]:
+                    dirty.update(np.flatnonzero(evaluation.valid[:, e]).tolist())
+                due = np.array(sorted(s for s in dirty if has_data[s] and evaluation.valid[s, e]), dtype=np.int64)
+                dirty.difference_update(due.tolist())
+                if len(due) > 0:
+                    long, short, scores = evaluation.signals(due, np.full(len(due), e), hourly.close[due, c], p)
+                    for s, is_long, is_short, score in zip(due, long, short, scores):
+                        if shares[s] != 0:
+                            continue
+                        ticker = tickers[s]
+                        if is_long and pending.direction(ticker) == 0:
+                            pending.arm(ticker, 1)
+                            entry_scores[ticker] = score
+                        elif is_short:
+                            pending.arm(ticker, -1)
+                            entry_scores[ticker] = score
+
+            # armed entries lapse, or enter once the last 10:00 close crosses the middle band
+            for ticker in pending.advance():
+                stops.stop_counting(ticker)
+            if len(pending) > 0 and e >= 0:
+                armed_rows = [row[ticker] for ticker in pending.symbols]
+                for ticker, direction in pending.triggered(evaluation.last_price[armed_rows, e], evaluation.middle[armed_rows, e]):
+                    s = row[ticker]
+                    active[s] = (direction, entry_scores[ticker], time + np.timedelta64(p['insight_expiry'], 'D'))
+                    insights.append((time, ticker, direction, entry_scores[ticker]))
+                    stops.open(ticker, prices[s], p['atr_stop_multiplier'], direction)
+                    pending.disarm(ticker)
+                    changed = True
+
+            # ATR trailing stops
+            if len(stops) > 0 and e >= 0:
+                trail_rows = [row[ticker] for ticker in stops.symbols]
+                stop_prices = np.where(has_data[trail_rows], hourly.close[trail_rows, c], evaluation.last_price[trail_rows, e])
+                stopped = [stops.symbols[i] for i in stops.update(stop_prices, evaluation.atr[trail_rows, e], shares[trail_rows] > 0)]
+                for ticker in stopped:
+                    s = row[ticker]
+                    liquidations.append((time, ticker))
+                    cash += shares[s] * prices[s]
+                    shares[s] = 0
+                    active[s] = (0, 1, time + np.timedelta64(7, 'D'))
+                    insights.append((time, ticker, 0, 1))
+                    stops.close(ticker)
+                    dirty.add(s)
+                    changed = True
+
+            # expired insights
+            for s in [s for s, insight in active.items() if insight[2] <= time]:
+                del active[s]
+                changed = True
+
+            value = cash + np.nansum(shares * prices)
+            if changed:
+                targets = np.zeros(len(tickers))
+                weights = {s: insight[1] for s, insight in active.items() if insight[0] != 0}
+                total = sum(weights.values())
+                scale = 1 / total if total > 1 else 1
+                for s, weight in weights.items():
+                    targets[s] = active[s][0] * weight * scale * p['leverage']
+                tradable = ~np.isnan(prices) & (prices > 0)
+                new_shares = np.where(tradable, targets * value / np.where(tradable, prices, 1), shares)
+                cash -= np.nansum((new_shares - shares) * np.where(tradable, prices, 0))
+                shares = new_shares
+
+            equity[n] = cash + np.nansum(shares * prices)
+            positions[:, n] = shares
+
+        return BacktestResult(tickers, hourly.times[columns], equity, positions, insights, liquidations, self.cash)
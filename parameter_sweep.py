@@ -0,0 +1,223 @@
+import itertools
+import math
+import os
+import random
+from datetime import timedelta
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from offline_backtest import DEFAULT_PARAMS, EVALUATION_PARAMS, Bars, DailyEvaluation, EvaluationInputs, OfflineBacktest
+
+
+def grid(space):
+    '''
+    Every combination of a grid. space maps a parameter name to a list of
+    values; nested parameters are named with dots, e.g. "macd_params.long_macd_threshold".
+    '''
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space, samples, seed=None):
+    '''
+    samples random combinations. A list in space is sampled uniformly from its
+    values, a (low, high) tuple uniformly from the range (integers if both ends are).
+    '''
+    rng = random.Random(seed)
+    combinations = []
+    for _ in range(samples):
+        combination = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                combination[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                combination[name] = rng.choice(values)
+        combinations.append(combination)
+    return combinations
+
+
+def apply_params(combination, base=DEFAULT_PARAMS):
+    '''base with the combination applied; dotted names set keys of nested dicts'''
+    params = {name: dict(value) if isinstance(value, dict) else value for name, value in base.items()}
+    for name, value in combination.items():
+        if '.' in name:
+            outer, inner = name.split('.', 1)
+            params[outer][inner] = value
+        else:
+            params[name] = value
+    return params
+
+
+def walk_forward_splits(times, train, test, step=None):
+    '''
+    (train_start, train_end, test_start, test_end) windows over times, each
+    test window directly following its train window; step defaults to test
+    '''
+    times = np.asarray(times, dtype='datetime64[s]')
+    train, test = np.timedelta64(train, 's'), np.timedelta64(test, 's')
+    step = np.timedelta64(step, 's') if step is not None else test
+    splits = []
+    start = times[0]
+    while start + train + test <= times[-1] + np.timedelta64(1, 's'):
+        splits.append((start, start + train, start + train, start + train + test))
+        start = start + step
+    return splits
+
+
+class SharedArrays:
+    '''
+    NumPy arrays copied once into named shared memory blocks. Workers attach
+    to the blocks by their specs and read them without copying.
+    '''
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            block = SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+            self.blocks.append(block)
+            self.specs[name] = (block.name, values.shape, values.dtype.str)
+
+    @staticmethod
+    def attach(specs):
+        '''returns (arrays, blocks); the blocks must be kept alive as long as the arrays'''
+        arrays, blocks = {}, []
+        for name, (block_name, shape, dtype) in specs.items():
+            # pool workers share the creating process's resource tracker, which unlinks the block once
+            block = SharedMemory(name=block_name)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            blocks.append(block)
+        return arrays, blocks
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+# per worker process: the shared bars and evaluation inputs per start, and the last DailyEvaluation built
+_worker = {}
+
+
+def _evaluation_key(start, params):
+    return repr((start,) + tuple(params[name] for name in EVALUATION_PARAMS))
+
+
+def _init_worker(specs, tickers, starts, cash):
+    arrays, blocks = SharedArrays.attach(specs)
+    hourly = Bars(tickers, arrays['hourly_times'], *(arrays['hourly_' + name] for name in ('open', 'high', 'low', 'close', 'volume')))
+    inputs = {start: EvaluationInputs(**{name: arrays['inputs%d_%s' % (i, name)] for name in EvaluationInputs.ARRAYS})
+              for i, start in enumerate(starts)}
+    _worker.update(blocks=blocks, hourly=hourly, cash=cash, key=None, evaluation=None, inputs=inputs)
+
+
+def _run_chunk(chunk):
+    '''runs (index, params, start, end) jobs that share one evaluation key'''
+    results = []
+    for index, params, start, end in chunk:
+        key = _evaluation_key(start, params)
+        if key != _worker['key']:
+            _worker['evaluation'] = DailyEvaluation(_worker['inputs'][start], params)
+            _worker['key'] = key
+        result = OfflineBacktest(None, _worker['hourly'], params, start, end, _worker['cash'], evaluation=_worker['evaluation']).run()
+        results.append((index, {'pnl': float(result.pnl), 'return': float(result.pnl / result.starting_cash),
+                                'max_drawdown': result.max_drawdown(), 'sharpe': result.sharpe_ratio(),
+                                'insights': len(result.insights), 'stops': len(result.liquidations)}))
+    return results
+
+
+class ParameterSweep:
+    '''
+    Runs OfflineBacktest for many parameter combinations on a process pool.
+    Bars and the parameter-free evaluation inputs are computed once per start
+    date, as the windows are seeded from the history before it, and shared
+    with the workers through shared memory; combinations that share a start
+    and the window parameters (EVALUATION_PARAMS) are sent to a worker
+    together so it builds their DailyEvaluation once.
+    '''
+    def __init__(self, daily, hourly, base=None, processes=None, cash=1000000):
+        self.daily = daily.select(hourly.tickers) if daily.tickers != hourly.tickers else daily
+        self.hourly = hourly
+        self.base = dict(DEFAULT_PARAMS, **(base or {}))
+        self.processes = processes or os.cpu_count() or 1
+        self.cash = cash
+        self.inputs = {}
+
+    def inputs_for(self, start):
+        if start not in self.inputs:
+            self.inputs[start] = EvaluationInputs.compute(self.daily, self.hourly, start)
+        return self.inputs[start]
+
+    def _jobs(self, jobs):
+        '''runs (params, start, end) jobs, returning their metrics in order'''
+        jobs = [(params, np.datetime64(start, 's') if start is not None else None, end) for params, start, end in jobs]
+        key = lambda i: _evaluation_key(jobs[i][1], jobs[i][0])
+        order = sorted(range(len(jobs)), key=key)
+        groups = [list(group) for _, group in itertools.groupby(order, key=key)]
+        # split the groups so every worker gets some work even with a single evaluation key
+        size = max(1, math.ceil(len(jobs) / (self.processes * 4)))
+        chunks = [[(i,) + tuple(jobs[i]) for i in group[n:n + size]] for group in groups for n in range(0, len(group), size)]
+
+        starts = sorted({start for _, start, _ in jobs}, key=repr)
+        arrays = {'hourly_times': self.hourly.times}
+        arrays.update({'hourly_' + name: getattr(self.hourly, name) for name in ('open', 'high', 'low', 'close', 'volume')})
+        for i, start in enumerate(starts):
+            inputs = self.inputs_for(start)
+            arrays.update({'inputs%d_%s' % (i, name): getattr(inputs, name) for name in EvaluationInputs.ARRAYS})
+        shared = SharedArrays(arrays)
+        metrics = [None] * len(jobs)
+        try:
+            with get_context().Pool(self.processes, _init_worker, (shared.specs, self.hourly.tickers, starts, self.cash)) as pool:
+                for results in pool.imap_unordered(_run_chunk, chunks):
+                    for index, values in results:
+                        metrics[index] = values
+        finally:
+            shared.close()
+        return metrics
+
+    def run(self, combinations, start=None, end=None):
+        '''a DataFrame with one row per combination: its parameters and metrics'''
+        jobs = [(apply_params(combination, self.base), start, end) for combination in combinations]
+        return pd.DataFrame([dict(combination, **metrics) for combination, metrics in zip(combinations, self._jobs(jobs))])
+
+    def walk_forward(self, combinations, train=timedelta(days=180), test=timedelta(days=60), step=None, metric='sharpe'):
+        '''
+        Runs every combination on each train window and the one with the best
+        metric on the test window that follows. Returns a DataFrame of all
+        runs with fold, phase ("train" or "test") and window columns.
+        '''
+        splits = walk_forward_splits(self.hourly.times, train, test, step)
+        params = [apply_params(combination, self.base) for combination in combinations]
+        train_jobs = [(p, train_start, train_end) for train_start, train_end, _, _ in splits for p in params]
+        train_metrics = self._jobs(train_jobs)
+
+        rows, test_jobs = [], []
+        for fold, (train_start, train_end, test_start, test_end) in enumerate(splits):
+            fold_metrics = train_metrics[fold * len(params):(fold + 1) * len(params)]
+            for combination, metrics in zip(combinations, fold_metrics):
+                rows.append(dict(combination, fold=fold, phase='train', start=train_start, end=train_end, **metrics))
+            best = int(np.argmax([metrics[metric] for metrics in fold_metrics]))
+            test_jobs.append((best, (params[best], test_start, test_end)))
+        for (fold, (best, job)), metrics in zip(enumerate(test_jobs), self._jobs([job for _, job in test_jobs])):
+            rows.append(dict(combinations[best], fold=fold, phase='test', start=job[1], end=job[2], **metrics))
+        return pd.DataFrame(rows)
+
+
+def save_results(results, path):
+    '''writes a results DataFrame as a columnar .npz, one array per column'''
+    columns = {}
+    for name in results.columns:
+        values = results[name].to_numpy()
+        columns[name] = values.astype(str) if values.dtype == object else values
+    np.savez_compressed(path, **columns)
+
+
+def load_results(path):
+    with np.load(path) as arrays:
+        return pd.DataFrame({name: arrays[name] for name in arrays.files})
@@ -0,0 +1,93 @@
+import heapq
+
+import numpy as np
+
+
+class PendingEntries:
+    '''
+    Symbols armed for an entry, waiting for price to cross the Bollinger middle
+    band. Only armed symbols are held, in parallel arrays so the per-bar check
+    is one vectorized comparison; expiry is a min-heap keyed by the bar count
+    at which an entry lapses.
+    '''
+    def __init__(self, expiry, initial_capacity=64):
+        self.expiry = expiry
+        self.bar = 0
+        self.symbols = []
+        self.index = {}
+        self.directions = np.zeros(initial_capacity, dtype=np.int8)
+        self.deadlines = np.zeros(initial_capacity, dtype=np.int64)
+        # (deadline, sequence, symbol); stale when the symbol was disarmed or re-armed since
+        self.heap = []
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def direction(self, symbol):
+        '''1 if armed long, -1 if armed short, 0 if not armed'''
+        i = self.index.get(symbol)
+        return 0 if i is None else int(self.directions[i])
+
+    def bars_left(self, symbol):
+        '''bars until an armed entry lapses, None if symbol is not armed'''
+        i = self.index.get(symbol)
+        return None if i is None else int(self.deadlines[i] - self.bar)
+
+    def arm(self, symbol, direction, expiry=None):
+        '''
+        arms symbol, or re-arms it with a fresh expiry, in the given direction;
+        expiry defaults to the full expiry
+        '''
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            if i == len(self.directions):
+                self.directions = np.concatenate([self.directions, np.zeros_like(self.directions)])
+                self.deadlines = np.concatenate([self.deadlines, np.zeros_like(self.deadlines)])
+            self.symbols.append(symbol)
+            self.index[symbol] = i
+        deadline = self.bar + (self.expiry if expiry is None else expiry)
+        self.directions[i] = direction
+        self.deadlines[i] = deadline
+        self.sequence += 1
+        heapq.heappush(self.heap, (deadline, self.sequence, symbol))
+
+    def disarm(self, symbol):
+        i = self.index.pop(symbol, None)
+        if i is None:
+            return
+        # move the last armed symbol into the freed slot
+        last = len(self.symbols) - 1
+        if i != last:
+            moved = self.symbols[last]
+            self.symbols[i] = moved
+            self.index[moved] = i
+            self.directions[i] = self.directions[last]
+            self.deadlines[i] = self.deadlines[last]
+        self.symbols.pop()
+
+    def advance(self):
+        '''
+        Moves to the next bar and disarms the entries that lapse on it.
+        Returns the expired symbols.
+        '''
+        self.bar += 1
+        expired = []
+        while self.heap and self.heap[0][0] <= self.bar:
+            deadline, _, symbol = heapq.heappop(self.heap)
+            i = self.index.get(symbol)
+            if i is not None and self.deadlines[i] == deadline:
+                self.disarm(symbol)
+                expired.append(symbol)
+        return expired
+
+    def triggered(self, prices, middles):
+        '''
+        prices and middles are in the order of self.symbols. Returns the armed
+        symbols and directions whose price is above (long) or below (short) the
+        middle band.
+        '''
+        count = len(self.symbols)
+        hits = np.flatnonzero(self.directions[:count] * (np.asarray(prices, dtype=np.float64) - np.asarray(middles, dtype=np.float64)) > 0)
+        return [(self.symbols[i], int(self.directions[i])) for i in hits]
@@ -0,0 +1,181 @@
+import numpy as np
+
+
+class ColumnarRingStore:
+    '''
+    Fixed-capacity ring buffers for many symbols, one NumPy column per field.
+    Every value is written twice, at slot and slot + capacity, so a symbol's
+    most recent values are always one contiguous run of a row and can be
+    handed out as zero-copy views, oldest first or newest first.
+    '''
+    def __init__(self, capacity, columns, initial_rows=64):
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.data = {name: np.zeros((initial_rows, 2 * capacity)) for name in self.columns}
+        self.heads = np.zeros(initial_rows, dtype=np.int64)
+        self.counts = np.zeros(initial_rows, dtype=np.int64)
+        self.rows = {}
+        self.free_rows = list(range(initial_rows - 1, -1, -1))
+
+    def add_symbol(self, symbol):
+        # re-adding a symbol starts it from an empty window
+        if symbol in self.rows:
+            row = self.rows[symbol]
+        else:
+            if not self.free_rows:
+                self._grow()
+            row = self.free_rows.pop()
+            self.rows[symbol] = row
+        self.heads[row] = 0
+        self.counts[row] = 0
+        return row
+
+    def remove_symbol(self, symbol):
+        row = self.rows.pop(symbol, None)
+        if row is not None:
+            self.free_rows.append(row)
+
+    def append(self, symbol, *values):
+        '''values are given in column order'''
+        row = self.rows[symbol]
+        slot = self.heads[row]
+        for name, value in zip(self.columns, values):
+            column = self.data[name]
+            column[row, slot] = value
+            column[row, slot + self.capacity] = value
+        self.heads[row] = (slot + 1) % self.capacity
+        if self.counts[row] < self.capacity:
+            self.counts[row] += 1
+
+    def extend(self, symbol, *columns):
+        '''
+        append for many values at once; columns are sequences in column order,
+        oldest first
+        '''
+        row = self.rows[symbol]
+        count = len(columns[0])
+        kept = min(count, self.capacity)
+        slots = (self.heads[row] + count - kept + np.arange(kept)) % self.capacity
+        for name, values in zip(self.columns, columns):
+            values = np.asarray(values, dtype=np.float64)[count - kept:]
+            column = self.data[name]
+            column[row, slots] = values
+            column[row, slots + self.capacity] = values
+        self.heads[row] = (self.heads[row] + count) % self.capacity
+        self.counts[row] = min(self.counts[row] + count, self.capacity)
+
+    def window(self, symbol):
+        return RingWindow(self, self.rows[symbol])
+
+    def oldest_first(self, row, column):
+        newest = (self.heads[row] - 1) % self.capacity + self.capacity
+        return self.data[column][row, newest - self.counts[row] + 1:newest + 1]
+
+    def newest_first(self, row, column):
+        newest = (self.heads[row] - 1) % self.capacity + self.capacity
+        return self.data[column][row, newest:newest - self.counts[row]:-1]
+
+    def gather(self, symbols, column, newest_first=True):
+        '''
+        (symbols x capacity) copy of one column for many symbols, gathered with a
+        single fancy index. Rows that are not full are NaN padded on the right;
+        the number of valid values per row is returned alongside.
+        '''
+        rows = np.array([self.rows[symbol] for symbol in symbols], dtype=np.int64)
+        counts = self.counts[rows]
+        offsets = np.arange(self.capacity)
+        newest = (self.heads[rows] - 1) % self.capacity + self.capacity
+        if newest_first:
+            cols = newest[:, None] - offsets
+        else:
+            cols = np.minimum(newest[:, None] - counts[:, None] + 1 + offsets, 2 * self.capacity - 1)
+        matrix = self.data[column][rows[:, None], cols]
+        matrix[offsets >= counts[:, None]] = np.nan
+        return matrix, counts
+
+    def _grow(self):
+        old_rows = len(self.heads)
+        for name in self.columns:
+            self.data[name] = np.concatenate((self.data[name], np.zeros_like(self.data[name])))
+        self.heads = np.concatenate((self.heads, np.zeros(old_rows, dtype=np.int64)))
+        self.counts = np.concatenate((self.counts, np.zeros(old_rows, dtype=np.int64)))
+        self.free_rows.extend(range(2 * old_rows - 1, old_rows - 1, -1))
+
+
+class RingWindow:
+    '''
+    One symbol's window in a ColumnarRingStore. Columns are returned as views
+    into the store, so they are only valid until the next append.
+    '''
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __len__(self):
+        return int(self.store.counts[self.row])
+
+    def oldest_first(self, column):
+        return self.store.oldest_first(self.row, column)
+
+    def newest_first(self, column):
+        return self.store.newest_first(self.row, column)
+
+
+class MirrorWindow:
+    '''
+    A NumPy stand-in for LEAN's RollingWindow[float], so iterating or indexing
+    never crosses the Python.NET boundary. Indexing and iteration follow
+    RollingWindow: index 0 is the most recent value.
+    '''
+    def __init__(self, size):
+        self.size = size
+        self.buffer = np.zeros(2 * size)
+        self.head = 0
+        self.count = 0
+
+    def Add(self, value):
+        self.buffer[self.head] = value
+        self.buffer[self.head + self.size] = value
+        self.head = (self.head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def extend(self, values):
+        '''Add for many values at once, oldest first'''
+        count = len(values)
+        kept = min(count, self.size)
+        slots = (self.head + count - kept + np.arange(kept)) % self.size
+        values = np.asarray(values, dtype=np.float64)[count - kept:]
+        self.buffer[slots] = values
+        self.buffer[slots + self.size] = values
+        self.head = (self.head + count) % self.size
+        self.count = min(self.count + count, self.size)
+
+    @property
+    def Count(self):
+        return self.count
+
+    @property
+    def IsReady(self):
+        return self.count == self.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError("MirrorWindow index out of range")
+        return float(self.buffer[(self.head - 1) % self.size + self.size - i])
+
+    def __iter__(self):
+        return iter(self.newest_first().tolist())
+
+    def newest_first(self):
+        newest = (self.head - 1) % self.size + self.size
+        return self.buffer[newest:newest - self.count:-1]
+
+    def oldest_first(self):
+        newest = (self.head - 1) % self.size + self.size
+        return self.buffer[newest - self.count + 1:newest + 1]
@@ -1,6 +1,4 @@
-#region imports
-from AlgorithmImports import *
-#endregion
+import numpy as np
 
 def get_rsi_buy_short(price_trend, rsi_trend):
     if price_trend > 0:
@@ -19,3 +17,19 @@ def get_rsi_sell_cover(price_trend, rsi_trend):
         if rsi_trend > 0:
             return 2
     return 0
+
+def get_rsi_buy_short_batch(price_trends, rsi_trends):
+    '''
+    get_rsi_buy_short over vectors of price and RSI trends
+    '''
+    price_trends = np.asarray(price_trends)
+    rsi_trends = np.asarray(rsi_trends)
+    return np.select([(price_trends > 0) & (rsi_trends > 0), (price_trends < 0) & (rsi_trends < 0)], [1, 2], 0)
+
+def get_rsi_sell_cover_batch(price_trends, rsi_trends):
+    '''
+    get_rsi_sell_cover over vectors of price and RSI trends
+    '''
+    price_trends = np.asarray(price_trends)
+    rsi_trends = np.asarray(rsi_trends)
+    return np.select([(price_trends > 0) & (rsi_trends < 0), (price_trends < 0) & (rsi_trends > 0)], [1, 2], 0)
@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def prefilter(ema_trends, derivatives, adxs, adx_maxes, adx_mins, params):
+    '''
+    Cheap first stage of the signal chain across the whole universe. Applies the
+    EMA crossover, EMA50 slope and ADX gates that every long or short entry has
+    to pass, so the trend extraction and oracles only run for the survivors.
+
+    params holds 'ema_trend_threshold', 'derivative_threshold' and 'adx_threshold'.
+    Returns (long_mask, short_mask, long_reasons). long_reasons is the index of
+    the first long gate (slope, ADX threshold, ADX max) a symbol in an EMA uptrend
+    fails, -1 when it passes or is not in an EMA uptrend.
+    '''
+    ema_trends = np.asarray(ema_trends, dtype=np.float64)
+    derivatives = np.asarray(derivatives, dtype=np.float64)
+    adxs = np.asarray(adxs, dtype=np.float64)
+    adx_maxes = np.asarray(adx_maxes, dtype=np.float64)
+    adx_mins = np.asarray(adx_mins, dtype=np.float64)
+
+    uptrend = ema_trends >= params['ema_trend_threshold']
+    above_threshold = adxs > params['adx_threshold']
+
+    long_gates = [derivatives > params['derivative_threshold'], above_threshold, adxs >= adx_maxes * .95]
+    short_gates = [derivatives < -params['derivative_threshold'], above_threshold, adxs <= adx_mins * 1.05]
+
+    long_mask = uptrend & np.logical_and.reduce(long_gates)
+    short_mask = ~uptrend & np.logical_and.reduce(short_gates)
+    long_reasons = np.select([uptrend & ~gate for gate in long_gates], range(len(long_gates)), -1)
+    return long_mask, short_mask, long_reasons
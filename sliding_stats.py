@@ -0,0 +1,107 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+from collections import deque
+
+import numpy as np
+
+
+class CrossoverCount:
+    '''
+    Number of bars in the last `size` where the fast series was above the slow one,
+    kept up to date as pairs enter and leave the window.
+    '''
+    def __init__(self, size):
+        self.flags = deque(maxlen=size)
+        self.Value = 0
+
+    def Add(self, fast, slow):
+        if len(self.flags) == self.flags.maxlen:
+            self.Value -= self.flags[0]
+        above = 1 if fast > slow else 0
+        self.flags.append(above)
+        self.Value += above
+
+    def extend(self, fast, slow):
+        '''Add for many pairs at once, oldest first'''
+        self.flags.extend((np.asarray(fast) > np.asarray(slow)).astype(int).tolist())
+        self.Value = sum(self.flags)
+
+
+class SlidingExtremes:
+    '''
+    Max and min of the last `size` values using monotonic deques,
+    amortized O(1) per Add.
+    '''
+    def __init__(self, size):
+        self.size = size
+        self.samples = 0
+        # (sample number, value), values decreasing for maxes and increasing for mins
+        self.maxes = deque()
+        self.mins = deque()
+
+    def Add(self, value):
+        while self.maxes and self.maxes[-1][1] <= value:
+            self.maxes.pop()
+        self.maxes.append((self.samples, value))
+        while self.mins and self.mins[-1][1] >= value:
+            self.mins.pop()
+        self.mins.append((self.samples, value))
+        self.samples += 1
+
+        oldest = self.samples - self.size
+        if self.maxes[0][0] < oldest:
+            self.maxes.popleft()
+        if self.mins[0][0] < oldest:
+            self.mins.popleft()
+
+    def extend(self, values):
+        '''Add for many values at once, oldest first'''
+        if len(values) < self.size:
+            for value in values:
+                self.Add(value)
+            return
+        # only the last size values are left in the window, so the deques are rebuilt from them
+        window = np.asarray(values, dtype=np.float64)[-self.size:]
+        first = self.samples + len(values) - self.size
+        self.samples += len(values)
+        # a value stays in the max deque while nothing after it is as large
+        later_max = np.append(np.maximum.accumulate(window[::-1])[::-1][1:], -np.inf)
+        later_min = np.append(np.minimum.accumulate(window[::-1])[::-1][1:], np.inf)
+        self.maxes = deque((first + int(i), float(window[i])) for i in np.flatnonzero(window > later_max))
+        self.mins = deque((first + int(i), float(window[i])) for i in np.flatnonzero(window < later_min))
+
+    @property
+    def Max(self):
+        return self.maxes[0][1]
+
+    @property
+    def Min(self):
+        return self.mins[0][1]
+
+
+class LastGradient:
+    '''
+    np.gradient(window)[-1] for a window fed oldest to newest: the backward
+    difference of the last two values, or 0 before two values have arrived.
+    '''
+    def __init__(self):
+        self.previous = None
+        self.latest = None
+
+    def Add(self, value):
+        self.previous = self.latest
+        self.latest = value
+
+    def extend(self, values):
+        '''Add for many values at once, oldest first'''
+        if len(values) == 1:
+            self.Add(float(values[0]))
+        elif len(values) > 1:
+            self.previous, self.latest = float(values[-2]), float(values[-1])
+
+    @property
+    def Value(self):
+        if self.previous is None:
+            return 0
+        return self.latest - self.previous
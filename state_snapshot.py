@@ -0,0 +1,64 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import io
+from datetime import datetime
+
+import numpy as np
+
+
+class StateSnapshot:
+    '''
+    Compact binary snapshot of per-symbol arrays, written as a compressed .npz
+    to the ObjectStore, or to a local file when a path is given.
+    '''
+    def __init__(self, algo, key="custom_alpha_state", path=None):
+        self.algo = algo
+        self.key = key
+        self.path = path
+
+    def save(self, time, states):
+        '''
+        states maps a symbol id string to a dict of named NumPy arrays
+        '''
+        symbol_ids = list(states.keys())
+        # isoformat, so the time doesn't depend on the host's timezone
+        arrays = {'time': np.array(time.isoformat()), 'symbols': np.array(symbol_ids)}
+        for i, symbol_id in enumerate(symbol_ids):
+            for name, values in states[symbol_id].items():
+                arrays[str(i) + '__' + name] = np.asarray(values)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        if self.path is not None:
+            with open(self.path, 'wb') as f:
+                f.write(buffer.getvalue())
+        else:
+            self.algo.ObjectStore.SaveBytes(self.key, bytearray(buffer.getvalue()))
+
+    def load(self):
+        '''
+        Returns (time, states) as passed to save, or None if there is no snapshot
+        '''
+        if self.path is not None:
+            try:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                return None
+        else:
+            if not self.algo.ObjectStore.ContainsKey(self.key):
+                return None
+            raw = bytes(self.algo.ObjectStore.ReadBytes(self.key))
+
+        arrays = np.load(io.BytesIO(raw))
+        if arrays['time'].dtype.kind != 'U':
+            # older snapshots stored a host-local epoch
+            return None
+        symbol_ids = [str(x) for x in arrays['symbols']]
+        states = {symbol_id: {} for symbol_id in symbol_ids}
+        for name in arrays.files:
+            if '__' in name:
+                i, field = name.split('__', 1)
+                states[symbol_ids[int(i)]][field] = arrays[name]
+        return datetime.fromisoformat(arrays['time'].item()), states
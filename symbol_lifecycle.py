@@ -0,0 +1,97 @@
+#region imports
+from AlgorithmImports import *
+#endregion
+import sys
+from collections import deque
+
+import numpy as np
+
+
+class SymbolLifecycle:
+    '''
+    Owns the alpha's per-symbol tables. Releasing a symbol drops it from every
+    table and runs the release hooks (consolidators, stores, caches). Symbols
+    removed from the universe while a position is still open are kept until
+    the position is flat.
+    '''
+    def __init__(self, algo):
+        self.algo = algo
+        self.tables = {}
+        self.release_hooks = []
+        self.stores = []
+        self.pending_release = set()
+
+    def table(self, name):
+        self.tables[name] = {}
+        return self.tables[name]
+
+    def on_release(self, callback):
+        '''callback(symbol) runs whenever a symbol's state is released'''
+        self.release_hooks.append(callback)
+
+    def track_store(self, store):
+        '''a ColumnarRingStore whose rows are freed on release'''
+        self.stores.append(store)
+        self.on_release(store.remove_symbol)
+
+    def remove(self, symbol):
+        if self.algo.Portfolio[symbol].Invested:
+            self.pending_release.add(symbol)
+        else:
+            self.release(symbol)
+
+    def keep(self, symbol):
+        '''a removed symbol came back into the universe before it was released'''
+        self.pending_release.discard(symbol)
+
+    def release_flat(self):
+        for symbol in [symbol for symbol in self.pending_release if not self.algo.Portfolio[symbol].Invested]:
+            self.release(symbol)
+
+    def release(self, symbol):
+        self.pending_release.discard(symbol)
+        # hooks run first so they can still reach the symbol's indicators
+        for callback in self.release_hooks:
+            callback(symbol)
+        for table in self.tables.values():
+            table.pop(symbol, None)
+
+    def memory_per_symbol(self):
+        '''approximate bytes of Python-side state held for each tracked symbol'''
+        usage = {}
+        for table in self.tables.values():
+            for symbol, value in table.items():
+                usage[symbol] = usage.get(symbol, 0) + _approximate_size(value)
+        for store in self.stores:
+            row_bytes = sum(column.nbytes // len(column) for column in store.data.values())
+            for symbol in store.rows:
+                usage[symbol] = usage.get(symbol, 0) + row_bytes
+        return usage
+
+    def memory_report(self, largest=5):
+        '''totals and average per symbol, followed by the largest symbols' bytes'''
+        usage = self.memory_per_symbol()
+        total = sum(usage.values())
+        average = total / len(usage) if len(usage) > 0 else 0
+        top = sorted(usage.items(), key=lambda item: item[1], reverse=True)[:largest]
+        return "tracked symbols: " + str(len(usage)) + " pending release: " + str(len(self.pending_release)) \
+            + " state bytes: " + str(total) + " per symbol: " + str(int(average)) \
+            + " largest: " + ", ".join(str(symbol) + " " + str(size) for symbol, size in top)
+
+
+def _approximate_size(value, depth=2):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    size = sys.getsizeof(value)
+    if depth == 0:
+        return size
+    if isinstance(value, (deque, list, tuple, set)):
+        size += sum(_approximate_size(x, depth - 1) for x in value)
+    else:
+        try:
+            attributes = vars(value)
+        except TypeError:
+            # LEAN objects don't expose their fields to Python
+            return size
+        size += sum(_approximate_size(x, depth - 1) for x in attributes.values())
+    return size
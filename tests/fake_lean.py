@@ -0,0 +1,377 @@
+'''
+Just enough of LEAN to run custom_alpha outside the engine: the names the
+modules import from AlgorithmImports, a FakeAlgorithm serving History from
+synthetic hourly bars, and step(), which delivers one hourly time slice the way
+LEAN does (daily consolidators first, then the alpha's Update). LEAN's
+indicators are stood in for by numpy_indicators, so tests running them check
+the wiring, not LEAN's values.
+'''
+import sys
+import types
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import numpy_indicators as ni
+
+
+class Resolution:
+    Hour = 'hour'
+    Daily = 'daily'
+
+
+class InsightDirection:
+    Down = -1
+    Flat = 0
+    Up = 1
+
+
+class Insight:
+    def __init__(self, symbol, period, direction, weight):
+        self.Symbol = symbol
+        self.Period = period
+        self.Direction = direction
+        self.Weight = weight
+
+    @staticmethod
+    def price(symbol, period, direction, weight=None):
+        return Insight(symbol, period, direction, weight)
+
+    def key(self):
+        return (str(self.Symbol), self.Period, self.Direction, self.Weight)
+
+
+class AlphaModel:
+    pass
+
+
+class Symbol:
+    def __init__(self, ticker):
+        self.Value = ticker
+        self.ID = ticker + ' R735QTJ8XC9X'
+
+    def __str__(self):
+        return self.Value
+
+    __repr__ = __str__
+
+
+class TradeBar:
+    def __init__(self, time, symbol, open, high, low, close, volume, period):
+        self.Time = time
+        self.EndTime = time + period
+        self.Period = period
+        self.Symbol = symbol
+        self.Open = open
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+
+    @property
+    def price(self):
+        return self.Close
+
+
+class _Generic:
+    '''supports LEAN's RollingWindow[float](size) spelling'''
+    def __class_getitem__(cls, item):
+        return cls
+
+
+class RollingWindow(_Generic):
+    def __init__(self, size):
+        self.values = []
+        self.size = size
+
+    def Add(self, value):
+        self.values.insert(0, value)
+        del self.values[self.size:]
+
+    @property
+    def Count(self):
+        return len(self.values)
+
+
+class MovingAverageType:
+    Exponential = 'exponential'
+    Simple = 'simple'
+
+
+class IndicatorDataPoint:
+    def __init__(self, value):
+        self.Value = value
+
+
+class _Indicator:
+    '''a LEAN indicator backed by a numpy_indicators one; read(indicator) is Current.Value'''
+    def __init__(self, indicator, read=lambda indicator: indicator.Value):
+        self.indicator = indicator
+        self.read = read
+
+    @property
+    def Current(self):
+        return IndicatorDataPoint(self.read(self.indicator))
+
+    @property
+    def IsReady(self):
+        return self.indicator.IsReady
+
+    def Update(self, time, value):
+        self.indicator.Update(float(value))
+        return self.IsReady
+
+
+class _BarIndicator(_Indicator):
+    def Update(self, bar):
+        self.indicator.Update(*self.inputs(bar))
+        return self.IsReady
+
+
+class ExponentialMovingAverage(_Indicator):
+    def __init__(self, period):
+        super().__init__(ni.EMA(period))
+
+
+class RelativeStrengthIndex(_Indicator):
+    def __init__(self, period):
+        super().__init__(ni.RSI(period))
+
+
+class MovingAverageConvergenceDivergence(_Indicator):
+    def __init__(self, fast, slow, signal, moving_average_type):
+        super().__init__(ni.MACD(fast, slow, signal))
+        self.Fast = _Indicator(self.indicator.Fast)
+        self.Slow = _Indicator(self.indicator.Slow)
+        self.Signal = _Indicator(self.indicator.Signal)
+        self.Histogram = _Indicator(self.indicator, lambda macd: macd.Histogram)
+
+
+class BollingerBands(_Indicator):
+    def __init__(self, period, k, moving_average_type):
+        super().__init__(ni.Bollinger(period, k), lambda bands: bands.Middle)
+        self.LowerBand = _Indicator(self.indicator, lambda bands: bands.Lower)
+        self.MiddleBand = _Indicator(self.indicator, lambda bands: bands.Middle)
+        self.UpperBand = _Indicator(self.indicator, lambda bands: bands.Upper)
+
+
+class AverageDirectionalIndex(_BarIndicator):
+    def __init__(self, period):
+        super().__init__(ni.ADX(period))
+        self.inputs = lambda bar: (bar.High, bar.Low, bar.Close)
+
+
+class AverageTrueRange(_BarIndicator):
+    def __init__(self, period):
+        super().__init__(ni.ATR(period))
+        self.inputs = lambda bar: (bar.High, bar.Low, bar.Close)
+
+
+class OnBalanceVolume(_BarIndicator):
+    def __init__(self):
+        super().__init__(ni.OBV())
+        self.inputs = lambda bar: (bar.Close, bar.Volume)
+
+
+class _Event:
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    def fire(self, sender, bar):
+        for handler in list(self.handlers):
+            handler(sender, bar)
+
+
+def _daily_bar(bars):
+    day = datetime.combine(bars[0].Time.date(), datetime.min.time())
+    return TradeBar(day, bars[0].Symbol, bars[0].Open, max(bar.High for bar in bars), min(bar.Low for bar in bars),
+                    bars[-1].Close, sum(bar.Volume for bar in bars), timedelta(days=1))
+
+
+class TradeBarConsolidator:
+    '''daily only: a day's bar is emitted by the first bar of a later day'''
+    def __init__(self, period):
+        self.DataConsolidated = _Event()
+        self.working = []
+
+    def Update(self, bar):
+        if self.working and bar.Time.date() > self.working[0].Time.date():
+            self.DataConsolidated.fire(self, _daily_bar(self.working))
+            self.working = []
+        self.working.append(bar)
+
+
+class SubscriptionManager:
+    def __init__(self):
+        self.consolidators = defaultdict(list)
+
+    def AddConsolidator(self, symbol, consolidator):
+        self.consolidators[symbol].append(consolidator)
+
+    def RemoveConsolidator(self, symbol, consolidator):
+        self.consolidators[symbol].remove(consolidator)
+
+
+class ObjectStore:
+    def __init__(self, contents=None):
+        self.contents = dict(contents or {})
+
+    def ContainsKey(self, key):
+        return key in self.contents
+
+    def SaveBytes(self, key, data):
+        self.contents[key] = bytes(data)
+        return True
+
+    def ReadBytes(self, key):
+        return self.contents[key]
+
+
+class Slice(dict):
+    def ContainsKey(self, symbol):
+        return symbol in self
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+
+class _Holding:
+    Invested = False
+    IsLong = False
+
+
+class _Transactions:
+    def GetOpenOrders(self, symbol=None):
+        return []
+
+
+class _Security:
+    def __init__(self, symbol):
+        self.Symbol = symbol
+
+
+class SecurityChanges:
+    def __init__(self, added=(), removed=()):
+        self.AddedSecurities = list(added)
+        self.RemovedSecurities = list(removed)
+
+
+class _History:
+    def __init__(self, algo):
+        self.algo = algo
+
+    def __getitem__(self, bar_type):
+        return self.request
+
+    def request(self, symbols, start, end=None, resolution=None):
+        '''multi-symbol History: a list of slices in time order'''
+        if resolution is None:
+            end, resolution = None, end
+        source = self.algo.hourly if resolution == Resolution.Hour else self.algo.daily
+        slices = defaultdict(Slice)
+        for symbol in symbols:
+            bars = [bar for bar in source.get(symbol.Value, ()) if bar.EndTime <= self.algo.Time]
+            if end is None:
+                bars = bars[-start:]
+            else:
+                bars = [bar for bar in bars if start < bar.EndTime <= end]
+            for bar in bars:
+                slices[bar.EndTime][symbol] = bar
+        return [slices[time] for time in sorted(slices)]
+
+
+class FakeAlgorithm:
+    '''serves History from hourly bars by ticker; daily bars are consolidated from them'''
+    def __init__(self, hourly, time, object_store=None, start_date=None):
+        from log_facade import AlgoLogger, LogLevel
+
+        self.hourly = hourly
+        self.daily = {ticker: [_daily_bar([bar for bar in bars if bar.Time.date() == day])
+                               for day in sorted({bar.Time.date() for bar in bars})] for ticker, bars in hourly.items()}
+        self.Time = time
+        # a warm-up starts before the start date
+        self.StartDate = start_date or time
+        self.symbols = {ticker: bars[0].Symbol for ticker, bars in hourly.items()}
+        self.ObjectStore = object_store or ObjectStore()
+        self.SubscriptionManager = SubscriptionManager()
+        self.Portfolio = defaultdict(_Holding)
+        self.Transactions = _Transactions()
+        self.History = _History(self)
+        self.logs = []
+        self.logger = AlgoLogger(self, LogLevel.WARNING)
+
+    def AddEquity(self, ticker, resolution=None):
+        return _Security(self.symbols.setdefault(ticker, Symbol(ticker)))
+
+    def Liquidate(self, symbol):
+        pass
+
+    def Log(self, message):
+        self.logs.append(message)
+
+    def securities(self):
+        return [_Security(symbol) for symbol in self.symbols.values()]
+
+
+def synthetic_hourly(tickers, start, days, seed=0):
+    '''random-walk hourly bars ending 10:00 to 16:00 on weekdays'''
+    rng = np.random.default_rng(seed)
+    hourly = {}
+    for ticker in tickers:
+        symbol = Symbol(ticker)
+        price = 50 + 100 * rng.random()
+        drift = rng.normal(0, 0.002)
+        bars = []
+        day = start
+        while len(bars) < days * 7:
+            if day.weekday() < 5:
+                for hour in range(9, 16):
+                    close = max(1.0, price * (1 + drift + rng.normal(0, 0.01)))
+                    spread = abs(rng.normal(0, 0.005)) * price
+                    bars.append(TradeBar(day.replace(hour=hour), symbol, price, max(price, close) + spread,
+                                         min(price, close) - spread, close, float(rng.integers(1000, 100000)), timedelta(hours=1)))
+                    price = close
+            day += timedelta(days=1)
+        hourly[ticker] = bars
+    return hourly
+
+
+def bar_end_times(algo, after, until):
+    return sorted({bar.EndTime for bars in algo.hourly.values() for bar in bars if after < bar.EndTime <= until})
+
+
+def step(algo, alpha, time):
+    '''delivers the hourly slice ending at time and returns the alpha's insights'''
+    algo.Time = time
+    data = Slice()
+    for ticker, bars in algo.hourly.items():
+        for bar in bars:
+            if bar.EndTime == time:
+                for consolidator in list(algo.SubscriptionManager.consolidators[bar.Symbol]):
+                    consolidator.Update(bar)
+                data[bar.Symbol] = bar
+    return alpha.Update(algo, data)
+
+
+def install():
+    '''makes AlgorithmImports importable when LEAN is not installed'''
+    try:
+        import AlgorithmImports
+    except ImportError:
+        module = types.ModuleType('AlgorithmImports')
+        for name in ('Resolution', 'InsightDirection', 'Insight', 'AlphaModel', 'Symbol', 'TradeBar', 'RollingWindow',
+                     'TradeBarConsolidator', 'MovingAverageType', 'ExponentialMovingAverage', 'RelativeStrengthIndex',
+                     'MovingAverageConvergenceDivergence', 'BollingerBands', 'AverageDirectionalIndex', 'AverageTrueRange',
+                     'OnBalanceVolume', 'datetime', 'timedelta', 'np'):
+            setattr(module, name, globals()[name])
+        sys.modules['AlgorithmImports'] = module
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from chart_recorder import ChartRecorder
+from fake_lean import Symbol
+
+
+SERIES = (("price", "price"), ("atr", "atr"))
+
+
+def test_only_watched_symbols_are_recorded():
+    charts = ChartRecorder(SERIES, ["MS"])
+    assert charts.watching(Symbol("MS"))
+    assert not charts.watching(Symbol("DAL"))
+    assert charts.due(Symbol("MS"), datetime(2024, 8, 1))
+    assert not charts.due(Symbol("DAL"), datetime(2024, 8, 1))
+
+
+@pytest.mark.parametrize("watch_list", [None, []])
+def test_watch_list_is_required(watch_list):
+    with pytest.raises(ValueError):
+        ChartRecorder(SERIES, watch_list)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from fake_lean import FakeAlgorithm, SecurityChanges, bar_end_times, step, synthetic_hourly
+from alpha import custom_alpha
+from daily_fanout import DailyBarFanout
+import numpy_indicators as ni
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def Update(self, *args):
+        self.calls.append(args)
+
+
+def test_selectors_choose_update_arguments():
+    hourly = synthetic_hourly(["MS"], datetime(2023, 1, 2), 3, seed=2)
+    algo = FakeAlgorithm(hourly, datetime(2023, 1, 2))
+    fanout = DailyBarFanout(algo)
+    symbol = algo.symbols["MS"]
+    fanout.add_symbol(symbol)
+    default, whole_bar = Recorder(), Recorder()
+    fanout.register_indicator(symbol, default)
+    fanout.register_indicator(symbol, whole_bar, lambda bar: (bar,))
+    seen = []
+    fanout.subscribe(lambda bar: seen.append((len(default.calls), bar)))
+
+    for bar in hourly["MS"]:
+        for consolidator in algo.SubscriptionManager.consolidators[symbol]:
+            consolidator.Update(bar)
+    bars = [bar for _, bar in seen]
+    assert len(bars) == 2
+    assert default.calls == [(bar.EndTime, bar.Close) for bar in bars]
+    assert whole_bar.calls == [(bar,) for bar in bars]
+    # subscribers run after the indicators
+    assert [count for count, _ in seen] == [1, 2]
+
+
+def test_alpha_daily_indicators_follow_the_daily_bars():
+    hourly = synthetic_hourly(["MS", "DAL"], datetime(2023, 1, 2), 70, seed=5)
+    days = sorted({bar.Time.date() for bar in hourly["MS"]})
+    start = datetime.combine(days[60], datetime.min.time())
+    algo = FakeAlgorithm(hourly, start)
+    alpha = custom_alpha(algo)
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+    for time in bar_end_times(algo, start, datetime.combine(days[-1], datetime.min.time()) + timedelta(hours=12)):
+        step(algo, alpha, time)
+
+    for ticker in ("MS", "DAL"):
+        symbol = algo.symbols[ticker]
+        daily = [bar for bar in algo.daily[ticker] if bar.Time <= alpha.last_daily_bar[symbol]]
+        assert daily[-1].Time.date() == days[-2]
+        close = [bar.Close for bar in daily]
+        high, low, volume = [bar.High for bar in daily], [bar.Low for bar in daily], [bar.Volume for bar in daily]
+        assert alpha.EMAS50[symbol].Value == pytest.approx(ni.ema(close, 50)[-1], rel=1e-12)
+        assert alpha.ADX[symbol].Value == pytest.approx(ni.adx(high, low, close)[-1], rel=1e-12)
+        assert alpha.obvs[symbol].Value == pytest.approx(ni.obv(close, volume)[-1], rel=1e-12)
+        assert alpha.ATRS[symbol].Value == pytest.approx(ni.atr(high, low, close)[-1], rel=1e-12)
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fake_lean import FakeAlgorithm, SecurityChanges, bar_end_times, step, synthetic_hourly
+from alpha import custom_alpha
+
+
+def test_order_event_marks_symbol_for_evaluation():
+    hourly = synthetic_hourly(["MS", "DAL"], datetime(2023, 1, 2), 60, seed=1)
+    days = sorted({bar.Time.date() for bar in hourly["MS"]})
+    start = datetime.combine(days[50], datetime.min.time())
+    algo = FakeAlgorithm(hourly, start)
+    alpha = custom_alpha(algo)
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+
+    times = bar_end_times(algo, start, start + timedelta(days=1))
+    for time in times[:2]:
+        step(algo, alpha, time)
+    dal = algo.symbols["DAL"]
+    assert dal not in alpha.scheduler.dirty and algo.symbols["MS"] not in alpha.scheduler.dirty
+
+    # nothing advanced, so only the symbol with an order event is evaluated
+    evaluated = alpha.scheduler.evaluated
+    alpha.on_order_event(SimpleNamespace(Symbol=dal))
+    step(algo, alpha, times[2])
+    assert alpha.scheduler.evaluated == evaluated + 1
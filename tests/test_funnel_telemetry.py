@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from fake_lean import FakeAlgorithm, SecurityChanges, bar_end_times, step, synthetic_hourly
+import alpha as alpha_module
+from alpha import custom_alpha
+from funnel_telemetry import FunnelTelemetry, Gate
+
+
+TICKERS = ["T%d" % i for i in range(8)]
+
+
+def funnel_intervals(hourly, start, end):
+    algo = FakeAlgorithm(hourly, start)
+    alpha = custom_alpha(algo)
+    alpha.symbols_invested_in_last_iteration = None
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+    for time in bar_end_times(algo, start, end):
+        step(algo, alpha, time)
+    return alpha.funnel.intervals()
+
+
+def test_prefilter_keeps_the_gate_counts_of_the_full_chain(monkeypatch):
+    hourly = synthetic_hourly(TICKERS, datetime(2020, 1, 1), 780, seed=15)
+    days = sorted({bar.Time.date() for bar in hourly[TICKERS[0]]})
+    start = datetime.combine(days[760], datetime.min.time())
+    end = datetime.combine(days[-1], datetime.min.time()) + timedelta(days=1)
+    screened = funnel_intervals(hourly, start, end)
+
+    # without screening every symbol goes through the gates in order
+    prefilter = alpha_module.prefilter
+    def unscreened(*args):
+        count = len(prefilter(*args)[0])
+        return np.ones(count, dtype=bool), np.ones(count, dtype=bool), np.full(count, -1)
+    monkeypatch.setattr(alpha_module, 'prefilter', unscreened)
+
+    assert screened == funnel_intervals(hourly, start, end)
+    rejected = np.sum([interval[2] for interval in screened], axis=0)
+    # symbols the prefilter screens on slope or ADX fail RSI first in the full chain
+    assert rejected[Gate.EMA_TREND] > 0 and rejected[Gate.RSI] > 0
+
+
+def test_passed_counts_follow_gate_order():
+    funnel = FunnelTelemetry(timedelta(days=1))
+    funnel.roll(datetime(2024, 1, 2))
+    funnel.enter(10)
+    funnel.reject(Gate.NO_DATA)
+    funnel.reject(Gate.EMA_TREND, 4)
+    funnel.reject(Gate.BOLLINGER, 2)
+    funnel.reject(Gate.DERIVATIVE)
+    funnel.roll(datetime(2024, 1, 3))
+    funnel.enter(3)
+
+    (_, entered, rejected), _ = funnel.intervals()
+    passed = funnel.passed(entered, rejected)
+    assert passed[Gate.NO_DATA] == 9
+    assert passed[Gate.EMA_TREND] == 5
+    assert passed[Gate.BOLLINGER] == 3
+    assert passed[Gate.DERIVATIVE] == 2
+    assert passed[Gate.OBV] == 2
+    assert funnel.to_csv().splitlines()[1].endswith(",2")
+    assert "bollinger: 2/6" in funnel.summary()
@@ -0,0 +1,83 @@
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+import lean_data_cache
+from lean_data_cache import LeanDataCache
+
+
+def write_daily(data_folder, ticker, days, price):
+    '''a LEAN daily trade zip with one bar per day, prices in deci-cents'''
+    folder = os.path.join(data_folder, 'equity', 'usa', 'daily')
+    os.makedirs(folder, exist_ok=True)
+    lines = ["%s 00:00,%d,%d,%d,%d,%d" % (day.replace('-', ''), price * 10000, (price + 1) * 10000, (price - 1) * 10000,
+                                          price * 10000, 1000) for day in days]
+    path = os.path.join(folder, ticker + '.zip')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(ticker + '.csv', "\n".join(lines))
+    return path
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    '''the zip paths the cache parses'''
+    paths = []
+    read_zip = lean_data_cache._read_zip
+
+    def counting(path, day=None):
+        paths.append(os.path.basename(path))
+        return read_zip(path, day)
+    monkeypatch.setattr(lean_data_cache, '_read_zip', counting)
+    return paths
+
+
+def test_missing_tickers_are_parsed_alone(tmp_path, parsed):
+    data, cache = str(tmp_path / 'data'), LeanDataCache(str(tmp_path / 'data'), str(tmp_path / 'cache'))
+    write_daily(data, 'aaa', ['2020-01-02', '2020-01-03'], 10)
+    write_daily(data, 'ccc', ['2020-01-03', '2020-01-06'], 30)
+    write_daily(data, 'bbb', ['2020-01-02', '2020-01-06'], 20)
+
+    first = cache.load('daily', ['AAA', 'CCC'])
+    assert sorted(parsed) == ['aaa.zip', 'ccc.zip']
+    parsed.clear()
+
+    bars = cache.load('daily', ['AAA', 'BBB', 'CCC'])
+    assert parsed == ['bbb.zip']
+    assert bars.tickers == ['AAA', 'BBB', 'CCC']
+    assert bars.times.tolist() == [np.datetime64(day, 's') for day in ('2020-01-03', '2020-01-04', '2020-01-07')]
+    np.testing.assert_array_equal(bars.close, [[10, 10, np.nan], [20, np.nan, 20], [np.nan, 30, 30]])
+    # the arrays loaded before the update still read the old cache
+    np.testing.assert_array_equal(first.close, [[10, 10, np.nan], [np.nan, 30, 30]])
+    parsed.clear()
+
+    assert cache.is_current('daily')
+    cache.load('daily')
+    assert parsed == []
+
+
+def test_changed_tickers_are_reparsed(tmp_path, parsed):
+    data, cache = str(tmp_path / 'data'), LeanDataCache(str(tmp_path / 'data'), str(tmp_path / 'cache'))
+    write_daily(data, 'aaa', ['2020-01-02'], 10)
+    write_daily(data, 'bbb', ['2020-01-02'], 20)
+    cache.load('daily')
+    parsed.clear()
+
+    path = write_daily(data, 'bbb', ['2020-01-02', '2020-01-03'], 21)
+    os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime + 10))
+    bars = cache.load('daily')
+    assert parsed == ['bbb.zip']
+    np.testing.assert_array_equal(bars.close, [[10, np.nan], [21, 21]])
+
+
+def test_unknown_ticker_raises_without_parsing(tmp_path, parsed):
+    data, cache = str(tmp_path / 'data'), LeanDataCache(str(tmp_path / 'data'), str(tmp_path / 'cache'))
+    write_daily(data, 'aaa', ['2020-01-02'], 10)
+    cache.load('daily', ['AAA'])
+    parsed.clear()
+
+    with pytest.raises(ValueError, match='zzz'):
+        cache.load('daily', ['AAA', 'ZZZ'])
+    assert parsed == []
+    assert cache.load('daily', ['AAA']).tickers == ['AAA']
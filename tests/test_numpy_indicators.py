@@ -0,0 +1,152 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+import numpy_indicators as ni
+
+
+REFERENCE = os.path.join(os.path.dirname(__file__), 'data', 'lean_indicator_reference.npz')
+
+
+def streaming_outputs(high, low, close, volume):
+    '''the all_outputs values from the streaming classes, one bar at a time'''
+    indicators = {'macd': ni.MACD(), 'bollinger': ni.Bollinger(), 'rsi': ni.RSI(), 'ema50': ni.EMA(50),
+                  'ema200': ni.EMA(200), 'adx': ni.ADX(), 'obv': ni.OBV(), 'atr': ni.ATR()}
+    outputs = {name: [] for name in ('macd', 'signal', 'lower', 'middle', 'upper', 'rsi', 'ema50', 'ema200', 'adx', 'obv', 'atr')}
+    for h, l, c, v in zip(high, low, close, volume):
+        for name in ('macd', 'bollinger', 'rsi', 'ema50', 'ema200'):
+            indicators[name].Update(c)
+        indicators['adx'].Update(h, l, c)
+        indicators['atr'].Update(h, l, c)
+        indicators['obv'].Update(c, v)
+        macd = indicators['macd']
+        outputs['macd'].append(macd.Value)
+        outputs['signal'].append(macd.Signal.Value if macd.Signal.IsReady else np.nan)
+        outputs['lower'].append(indicators['bollinger'].Lower)
+        outputs['middle'].append(indicators['bollinger'].Middle)
+        outputs['upper'].append(indicators['bollinger'].Upper)
+        for name in ('rsi', 'ema50', 'ema200', 'adx', 'obv', 'atr'):
+            outputs[name].append(indicators[name].Value)
+    return {name: np.array(values) for name, values in outputs.items()}
+
+
+@pytest.fixture(scope='module')
+def reference():
+    if not os.path.exists(REFERENCE):
+        pytest.skip("no LEAN reference: record one with numpy_indicators.save_lean_reference inside LEAN "
+                    "and download it to tests/data/lean_indicator_reference.npz")
+    with np.load(REFERENCE) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+@pytest.mark.parametrize('compute', [ni.all_outputs, streaming_outputs], ids=['vectorized', 'streaming'])
+def test_matches_lean_reference(reference, compute):
+    actual = compute(reference['high'], reference['low'], reference['close'], reference['volume'])
+    for name in ('macd', 'signal', 'lower', 'middle', 'upper', 'rsi', 'ema50', 'ema200', 'adx', 'obv', 'atr'):
+        expected = reference[name]
+        values = np.where(np.isnan(expected), np.nan, actual[name])
+        # LEAN computes in decimal
+        np.testing.assert_allclose(values, expected, rtol=1e-7, atol=1e-7, err_msg=name)
+
+
+def test_first_rsi_values():
+    closes = [10.0, 11.0, 10.5]
+    rsi = ni.RSI(14)
+    # no change yet, then the averages of the changes seen so far
+    assert [rsi.Update(close) for close in closes] == pytest.approx([0.0, 100.0, 100 - 100 / (1 + 0.5 / 0.25)])
+    assert ni.rsi(closes) == pytest.approx([0.0, 100.0, 100 - 100 / (1 + 0.5 / 0.25)])
+    assert not rsi.IsReady
+
+
+def test_first_adx_values():
+    high, low, close = [10.0, 11.0, 10.5], [8.0, 8.5, 7.5], [9.0, 10.5, 8.0]
+    adx = ni.ADX(14)
+    # 0 before the second bar; the first move is all up (DX 100), the second all down (DX 0)
+    assert [adx.Update(h, l, c) for h, l, c in zip(high, low, close)] == pytest.approx([0.0, 100.0, 50.0])
+    assert ni.adx(high, low, close) == pytest.approx([0.0, 100.0, 50.0])
+
+
+def test_macd_signal_starts_when_slow_average_is_ready():
+    values = [1.0, 3.0, 2.0, 5.0, 4.0, 6.0, 8.0]
+    macd = ni.MACD(3, 5, 2)
+    lines = []
+    for i, value in enumerate(values):
+        macd.Update(value)
+        lines.append(macd.Value)
+        # the signal line sees its first MACD value at the fifth sample and is ready one later
+        assert macd.Signal.Samples == max(0, i - 3)
+        assert macd.IsReady == (i >= 5)
+    _, _, line, signal, histogram = ni.macd(values, 3, 5, 2)
+    assert line == pytest.approx(lines)
+    assert np.isnan(signal[:4]).all() and signal[4] == pytest.approx(lines[4])
+    assert np.isnan(histogram[:5]).all() and not np.isnan(histogram[5:]).any()
+    assert histogram[-1] == pytest.approx(macd.Histogram)
+
+
+def test_bollinger_deviation_over_a_partial_window():
+    bollinger = ni.Bollinger(20, 2)
+    # population standard deviation of the values seen so far
+    deviations = []
+    for value in (1.0, 2.0, 3.0):
+        bollinger.Update(value)
+        deviations.append(bollinger.StandardDeviation)
+    assert deviations == pytest.approx([0.0, 0.5, math.sqrt(2 / 3)])
+    lower, middle, upper = ni.bollinger([1.0, 2.0, 3.0], 20, 2)
+    assert middle == pytest.approx([1.0, 1.5, 2.0])
+    assert upper - middle == pytest.approx([0.0, 1.0, 2 * math.sqrt(2 / 3)])
+    assert middle - lower == pytest.approx(upper - middle)
+
+
+def test_first_values_of_ema_obv_and_atr():
+    ema = ni.EMA(50)
+    obv = ni.OBV()
+    atr = ni.ATR(14)
+    # the EMA is seeded with the first value, OBV starts at the first volume, the first true range is 0
+    assert ema.Update(10.0) == 10.0
+    assert obv.Update(10.0, 500.0) == 500.0
+    assert atr.Update(11.0, 9.0, 10.0) == 0.0
+    assert atr.Update(12.0, 10.5, 11.5) == pytest.approx(2.0 / 2)
+    assert ni.obv([10.0, 9.0], [500.0, 200.0]) == pytest.approx([500.0, 300.0])
+    assert ni.atr([11.0, 12.0], [9.0, 10.5], [10.0, 11.5]) == pytest.approx([0.0, 1.0])
+
+
+def test_streaming_and_vectorized_agree():
+    rng = np.random.default_rng(4)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    high = close * (1 + np.abs(rng.normal(0, 0.01, 300)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, 300)))
+    volume = rng.integers(1000, 100000, 300).astype(float)
+    vectorized = ni.all_outputs(high, low, close, volume)
+    streaming = streaming_outputs(high, low, close, volume)
+    for name, values in streaming.items():
+        np.testing.assert_allclose(np.where(np.isnan(values), np.nan, vectorized[name]), values, rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_loaded_indicators_match_streaming_state():
+    rng = np.random.default_rng(9)
+    lengths = [300, 120, 30, 20, 1]
+    close = np.full((len(lengths), 300), np.nan)
+    volume = np.full(close.shape, np.nan)
+    for i, length in enumerate(lengths):
+        close[i, 300 - length:] = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+        volume[i, 300 - length:] = rng.integers(1000, 100000, length)
+    high = close * (1 + np.abs(rng.normal(0, 0.01, close.shape)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, close.shape)))
+
+    loaded = [(ni.load_macd, ni.MACD, (close,)), (ni.load_bollinger, ni.Bollinger, (close,)), (ni.load_rsi, ni.RSI, (close,)),
+              (ni.load_ema, lambda: ni.EMA(50), (close,)), (ni.load_atr, ni.ATR, (high, low, close)),
+              (ni.load_adx, ni.ADX, (high, low, close)), (ni.load_obv, ni.OBV, (close, volume))]
+    for load, create, inputs in loaded:
+        indicators = [create() for _ in lengths]
+        load(indicators, *inputs)
+        for i, indicator in enumerate(indicators):
+            expected = create()
+            for values in zip(*[row[i][~np.isnan(row[i])].tolist() for row in inputs]):
+                expected.Update(*values)
+            state = ni.indicator_state(indicator)
+            expected_state = ni.indicator_state(expected)
+            assert state.keys() == expected_state.keys()
+            for name, values in expected_state.items():
+                np.testing.assert_array_equal(state[name], values, err_msg=create.__name__ + ' ' + name)
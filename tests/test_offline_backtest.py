@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fake_lean import FakeAlgorithm, SecurityChanges, bar_end_times, step, synthetic_hourly
+from alpha import custom_alpha
+from offline_backtest import DEFAULT_PARAMS, Bars, DailyEvaluation, EvaluationInputs, OfflineBacktest
+
+
+TICKERS = ["MS", "DAL", "APP"]
+START = datetime(2020, 1, 1)
+
+
+def to_bars(bars_by_ticker):
+    '''Bars indexed by bar end time, as load_csv_bars reads them'''
+    frames = {}
+    for ticker, bars in bars_by_ticker.items():
+        frames[ticker] = pd.DataFrame({'open': [bar.Open for bar in bars], 'high': [bar.High for bar in bars],
+                                       'low': [bar.Low for bar in bars], 'close': [bar.Close for bar in bars],
+                                       'volume': [bar.Volume for bar in bars]},
+                                      index=pd.DatetimeIndex([bar.EndTime for bar in bars]))
+    return Bars.from_frames(frames)
+
+
+def test_evaluation_matches_alpha_after_warm_up():
+    # more daily and hourly bars than the 750 the algorithm requests, so the history is trimmed too
+    hourly = synthetic_hourly(TICKERS, START, 800, seed=11)
+    days = sorted({bar.Time.date() for bar in hourly["MS"]})
+    live_start = datetime.combine(days[780], datetime.min.time())
+    live_end = datetime.combine(days[-1], datetime.min.time()) + timedelta(days=1)
+
+    algo = FakeAlgorithm(hourly, live_start)
+    alpha = custom_alpha(algo)
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+
+    daily_bars, hourly_bars = to_bars(algo.daily), to_bars(hourly)
+    evaluation = DailyEvaluation(EvaluationInputs.compute(daily_bars, hourly_bars, live_start), DEFAULT_PARAMS)
+    evaluations = {time: e for e, time in enumerate(evaluation.times.astype(datetime))}
+    rows = {ticker: s for s, ticker in enumerate(hourly_bars.tickers)}
+
+    compared = 0
+    for time in bar_end_times(algo, live_start, live_end):
+        step(algo, alpha, time)
+        if time not in evaluations:
+            continue
+        e = evaluations[time]
+        for ticker, s in rows.items():
+            assert evaluation.valid[s, e]
+            symbol = algo.symbols[ticker]
+            assert evaluation.price_trend_raw[s, e] == pytest.approx(alpha.price_trend_trackers[symbol].Value, rel=1e-6)
+            assert evaluation.rsi_trend_raw[s, e] == pytest.approx(alpha.rsi_trend_trackers[symbol].Value, rel=1e-6)
+            assert evaluation.obv_trend_raw[s, e] == pytest.approx(alpha.obv_trend_trackers[symbol].Value, rel=1e-6)
+            assert evaluation.ema_trend[s, e] == alpha.ema_crossovers[symbol].Value
+            assert evaluation.derivative[s, e] == pytest.approx(alpha.ema50_derivative(symbol), rel=1e-9)
+            assert evaluation.adx_max[s, e] == pytest.approx(alpha.adx_extremes[symbol].Max, rel=1e-9)
+            assert evaluation.adx_min[s, e] == pytest.approx(alpha.adx_extremes[symbol].Min, rel=1e-9)
+            assert evaluation.bollinger_score[s, e] == alpha.batch_bollinger_scores([symbol])[0]
+            assert evaluation.macd_score[s, e] == alpha.batch_macd_scores([symbol])[0]
+            compared += 1
+    assert compared == len(TICKERS) * (len(days) - 780)
+
+
+def test_run_reenters_the_initial_tickers():
+    hourly = synthetic_hourly(TICKERS, START, 60, seed=3)
+    # APP has no bars, so it gets no initial insight
+    del hourly["APP"]
+    algo = FakeAlgorithm(hourly, START)
+    daily_bars, hourly_bars = to_bars(algo.daily), to_bars(hourly)
+    start = hourly_bars.times[-7 * 20]
+
+    result = OfflineBacktest(daily_bars, hourly_bars, {'ema_trend_threshold': 10 ** 9}, start).run()
+    assert result.insights == [(start, 'MS', 1, .75), (start, 'DAL', 1, .75)]
+    assert (result.positions[:, 0] > 0).all()
+    # the insights last insight_expiry - 4 days, then the portfolio is flat
+    flat = result.times >= start + np.timedelta64(DEFAULT_PARAMS['insight_expiry'] - 4, 'D')
+    assert flat.any() and (result.positions[:, flat] == 0).all() and (result.positions[:, ~flat] > 0).all()
+
+    result = OfflineBacktest(daily_bars, hourly_bars, {'ema_trend_threshold': 10 ** 9, 'initial_tickers': ()}, start).run()
+    assert result.insights == [] and (result.positions == 0).all()
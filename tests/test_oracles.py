@@ -0,0 +1,84 @@
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+from bollinger_oracle import get_bollinger_buy_and_short, get_bollinger_buy_and_short_batch
+from macd_oracle import get_macd_score, get_macd_score_batch
+from ring_buffer import ColumnarRingStore
+
+
+def padded(rows, width, rng):
+    '''rows of different lengths in one array, padded on the right with noise the batch must ignore'''
+    matrix = rng.normal(size=(len(rows), width))
+    for r, row in enumerate(rows):
+        matrix[r, :len(row)] = row
+    return matrix
+
+
+def bollinger_window(rng, length):
+    '''oldest first, as the rolling window is iterated; prices often sit exactly on a band'''
+    middle = np.round(rng.normal(size=length), 1)
+    width = np.round(rng.uniform(0.1, 1, size=length), 1)
+    lower, upper = middle - width, middle + width
+    price = np.choose(rng.integers(0, 5, size=length), [lower, middle, upper, np.round(middle + rng.normal(size=length), 1),
+                                                         middle + rng.choice([-1, 1], size=length) * width / 2])
+    return [SimpleNamespace(lower=l, middle=m, upper=u, price=p) for l, m, u, p in zip(lower, middle, upper, price)]
+
+
+def test_bollinger_batch_matches_scalar_oracle():
+    rng = np.random.default_rng(6)
+    for params in ({'long_threshold': 1, 'short_threshold': 1}, {'long_threshold': .5, 'short_threshold': .6},
+                   {'long_threshold': 3, 'short_threshold': .3}):
+        windows = [bollinger_window(rng, int(rng.integers(1, 30))) for _ in range(300)]
+        trends = rng.choice([-1., 0., 1.], size=len(windows))
+        expected = [get_bollinger_buy_and_short(None, window, trend, params) for window, trend in zip(windows, trends)]
+
+        # the batch wants the most recent bar first
+        columns = [padded([[getattr(bar, field) for bar in reversed(window)] for window in windows], 30, rng)
+                   for field in ('lower', 'middle', 'upper', 'price')]
+        counts = np.array([len(window) for window in windows])
+        scores = get_bollinger_buy_and_short_batch(*columns, trends, params, counts)
+        np.testing.assert_array_equal(scores, expected)
+        assert {0, .5, 1, 2} <= set(expected)
+
+
+def test_macd_batch_matches_scalar_oracle():
+    rng = np.random.default_rng(7)
+    for params in ({'cross_check_length': 35, 'macd_above_below_length': 28, 'long_macd_threshold': 0.25,
+                    'short_macd_threshold': -0.25},
+                   {'cross_check_length': 5, 'macd_above_below_length': 3, 'long_macd_threshold': 0,
+                    'short_macd_threshold': -0.5}):
+        # macd values cluster on the thresholds so that ties are common
+        windows = [[SimpleNamespace(macd=m, hist=h) for m, h in zip(rng.choice([-0.5, -0.25, 0, 0.25, 0.3, 1], size=length),
+                                                                    rng.normal(size=length))]
+                   for length in rng.integers(1, 40, size=300)]
+        trends = rng.choice([-1., 0., 1.], size=len(windows))
+        expected = [get_macd_score(window, trend, params) for window, trend in zip(windows, trends)]
+
+        macds = padded([[bar.macd for bar in window] for window in windows], 40, rng)
+        counts = np.array([len(window) for window in windows])
+        np.testing.assert_array_equal(get_macd_score_batch(macds, trends, params, counts), expected)
+        assert {0, 1, 2} <= set(expected)
+
+
+def test_ring_windows_score_like_the_lists():
+    rng = np.random.default_rng(5)
+    bollinger_params = {'long_threshold': 1, 'short_threshold': .5}
+    macd_params = {'cross_check_length': 35, 'macd_above_below_length': 5, 'long_macd_threshold': 0.25,
+                   'short_macd_threshold': -0.25}
+    bollinger_store = ColumnarRingStore(8, ('lower', 'middle', 'upper', 'price'))
+    macd_store = ColumnarRingStore(8, ('macd', 'hist'))
+    bollinger_store.add_symbol('x')
+    macd_store.add_symbol('x')
+    bands, macds = deque(maxlen=8), deque(maxlen=8)
+    for bar in bollinger_window(rng, 30):
+        bollinger_store.append('x', bar.lower, bar.middle, bar.upper, bar.price)
+        bands.append(bar)
+        macd = SimpleNamespace(macd=float(rng.choice([-0.25, 0.25, 0.3])), hist=float(rng.normal()))
+        macd_store.append('x', macd.macd, macd.hist)
+        macds.append(macd)
+        for trend in (-1, 1):
+            assert get_bollinger_buy_and_short(None, bollinger_store.window('x'), trend, bollinger_params) == \
+                get_bollinger_buy_and_short(None, list(bands), trend, bollinger_params)
+            assert get_macd_score(macd_store.window('x'), trend, macd_params) == get_macd_score(list(macds), trend, macd_params)
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from fake_lean import FakeAlgorithm, synthetic_hourly
+from test_offline_backtest import to_bars
+from offline_backtest import DEFAULT_PARAMS, OfflineBacktest
+from parameter_sweep import ParameterSweep, apply_params, grid, load_results, save_results
+
+
+# gates loose enough that synthetic bars produce entries and stops
+BASE = {'ema_trend_threshold': 0, 'adx_threshold': 0, 'derivative_threshold': -1, 'obv_threshold': -1e9,
+        'bollinger_params': {'long_threshold': 0, 'short_threshold': 0},
+        'macd_params': dict(DEFAULT_PARAMS['macd_params'], macd_above_below_length=1, long_macd_threshold=-1e9)}
+
+
+@pytest.fixture(scope='module')
+def bars():
+    hourly = synthetic_hourly(["MS", "DAL", "APP", "TOST"], datetime(2020, 1, 1), 800, seed=24)
+    algo = FakeAlgorithm(hourly, datetime(2020, 1, 1))
+    hourly_bars = to_bars(hourly)
+    return to_bars(algo.daily), hourly_bars, hourly_bars.times[-7 * 60]
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_sweep_matches_direct_backtests(bars, processes, tmp_path):
+    daily, hourly, start = bars
+    combinations = grid({'atr_stop_multiplier': [1, 3]})
+    results = ParameterSweep(daily, hourly, base=BASE, processes=processes).run(combinations, start=start)
+
+    assert results['atr_stop_multiplier'].tolist() == [1, 3]
+    assert results['pnl'].nunique() == 2
+    for combination, (_, row) in zip(combinations, results.iterrows()):
+        result = OfflineBacktest(daily, hourly, apply_params(combination, dict(DEFAULT_PARAMS, **BASE)), start).run()
+        assert row['insights'] == len(result.insights) > 0
+        assert row['stops'] == len(result.liquidations)
+        assert row['pnl'] == result.pnl
+        assert row['return'] == result.pnl / result.starting_cash
+        assert row['max_drawdown'] == result.max_drawdown()
+        assert row['sharpe'] == result.sharpe_ratio()
+
+    path = str(tmp_path / 'results.npz')
+    save_results(results, path)
+    pd.testing.assert_frame_equal(load_results(path), results)
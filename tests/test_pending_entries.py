@@ -0,0 +1,94 @@
+import numpy as np
+
+from pending_entries import PendingEntries
+
+
+class LookForEntries:
+    '''the look_for_entries counters the alpha kept before PendingEntries'''
+    def __init__(self):
+        self.look_for_entries = {}
+
+    def arm_long(self, key):
+        if key not in self.look_for_entries or self.look_for_entries[key] == 0:
+            self.look_for_entries[key] = 1
+
+    def arm_short(self, key):
+        self.look_for_entries[key] = -1
+
+    def scan(self, prices, middles):
+        '''one bar of the entry loop: (checked, entered, expired)'''
+        checked, entered, expired = set(), set(), set()
+        for key in self.look_for_entries:
+            if self.look_for_entries[key] > 0:
+                self.look_for_entries[key] += 1
+                if self.look_for_entries[key] > 70:
+                    self.look_for_entries[key] = 0
+                    expired.add(key)
+                else:
+                    checked.add(key)
+                    if prices[key] > middles[key]:
+                        entered.add((key, 1))
+                        self.look_for_entries[key] = 0
+            elif self.look_for_entries[key] < 0:
+                self.look_for_entries[key] -= 1
+                if self.look_for_entries[key] < -70:
+                    self.look_for_entries[key] = 0
+                    expired.add(key)
+                else:
+                    checked.add(key)
+                    if prices[key] < middles[key]:
+                        entered.add((key, -1))
+                        self.look_for_entries[key] = 0
+        return checked, entered, expired
+
+
+def scan(pending, prices, middles):
+    '''one bar of the alpha's entry scanning'''
+    expired = set(pending.advance())
+    checked = set(pending.symbols)
+    entered = set(pending.triggered([prices[key] for key in pending.symbols], [middles[key] for key in pending.symbols]))
+    for key, _ in entered:
+        pending.disarm(key)
+    return checked, entered, expired
+
+
+def test_an_untriggered_entry_is_checked_69_times():
+    baseline, pending = LookForEntries(), PendingEntries(70)
+    baseline.arm_long('x')
+    pending.arm('x', 1)
+    # price stays below the middle band, so the long entry never triggers
+    baseline_checks = [baseline.scan({'x': 0.}, {'x': 1.}) for _ in range(75)]
+    pending_checks = [scan(pending, {'x': 0.}, {'x': 1.}) for _ in range(75)]
+    assert pending_checks == baseline_checks
+    assert sum('x' in checked for checked, _, _ in pending_checks) == 69
+    assert [bar for bar, (_, _, expired) in enumerate(pending_checks) if expired] == [69]
+
+
+def test_random_entries_match_look_for_entries():
+    rng = np.random.default_rng(18)
+    symbols = ['s%d' % i for i in range(12)]
+    baseline, pending = LookForEntries(), PendingEntries(70)
+    entries = expiries = 0
+    for bar in range(2000):
+        # the evaluation arms before the entry loop runs on the same bar
+        for key in rng.choice(symbols, size=int(rng.integers(0, 3)), replace=False):
+            if rng.random() < .5:
+                baseline.arm_long(key)
+                if pending.direction(key) == 0:
+                    pending.arm(key, 1)
+            else:
+                baseline.arm_short(key)
+                pending.arm(key, -1)
+        # prices rarely leave the middle band, so most entries run for a while and some lapse
+        prices = {key: 1. for key in symbols}
+        middles = {key: 1. + rng.choice([-1, 0, 1], p=[.01, .98, .01]) for key in symbols}
+        checked, entered, expired = baseline.scan(prices, middles)
+        assert scan(pending, prices, middles) == (checked, entered, expired)
+        entries += len(entered)
+        expiries += len(expired)
+        for key in symbols:
+            counter = baseline.look_for_entries.get(key, 0)
+            assert pending.direction(key) == np.sign(counter)
+            if counter:
+                assert pending.bars_left(key) == 71 - abs(counter)
+    assert entries > 20 and expiries > 20
@@ -0,0 +1,100 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from ring_buffer import ColumnarRingStore, MirrorWindow
+
+
+@pytest.mark.parametrize('size', [1, 3, 30])
+def test_mirror_window_reads_like_rolling_window(size):
+    rng = np.random.default_rng(size)
+    window = MirrorWindow(size)
+    # RollingWindow semantics: index 0 is the most recent value
+    expected = deque(maxlen=size)
+    for value in rng.normal(size=3 * size + 2).tolist():
+        window.Add(value)
+        expected.appendleft(value)
+        assert window.Count == len(window) == len(expected)
+        assert window.IsReady == (len(expected) == size)
+        assert list(window) == list(expected)
+        assert [window[i] for i in range(len(expected))] == list(expected)
+        assert window.newest_first().tolist() == list(expected)
+        assert window.oldest_first().tolist() == list(expected)[::-1]
+    with pytest.raises(IndexError):
+        window[size]
+
+
+def test_columnar_ring_store_wraps_around():
+    rng = np.random.default_rng(5)
+    store = ColumnarRingStore(4, ('a', 'b'), initial_rows=2)
+    expected = {}
+    for symbol in ('x', 'y', 'z'):  # the third symbol grows the store
+        store.add_symbol(symbol)
+        expected[symbol] = deque(maxlen=4)
+    windows = {symbol: store.window(symbol) for symbol in expected}
+
+    for step in range(11):
+        for symbol, values in expected.items():
+            # z fills more slowly, so the gathered rows have different lengths
+            if symbol != 'z' or step % 3 == 0:
+                value = float(rng.normal())
+                store.append(symbol, value, -value)
+                values.append(value)
+        for symbol, values in expected.items():
+            window = windows[symbol]
+            assert len(window) == len(values)
+            assert window.oldest_first('a').tolist() == list(values)
+            assert window.newest_first('a').tolist() == list(values)[::-1]
+            assert window.newest_first('b').tolist() == [-value for value in reversed(values)]
+
+        symbols = list(expected)
+        for newest_first in (True, False):
+            matrix, counts = store.gather(symbols, 'a', newest_first)
+            assert counts.tolist() == [len(expected[symbol]) for symbol in symbols]
+            for row, symbol in zip(matrix, symbols):
+                values = list(expected[symbol])[::-1] if newest_first else list(expected[symbol])
+                assert row[:len(values)].tolist() == values
+                assert np.isnan(row[len(values):]).all()
+
+
+def test_columnar_ring_store_reuses_rows():
+    store = ColumnarRingStore(3, ('a',), initial_rows=2)
+    store.add_symbol('x')
+    store.append('x', 1.)
+    row = store.add_symbol('y')
+    store.append('y', 2.)
+    store.remove_symbol('y')
+    assert store.add_symbol('z') == row
+    assert len(store.window('z')) == 0
+    # re-adding a symbol starts it from an empty window
+    store.add_symbol('x')
+    assert len(store.window('x')) == 0
+    store.append('x', 3.)
+    assert store.window('x').oldest_first('a').tolist() == [3.]
+
+
+@pytest.mark.parametrize('chunks', [[2, 3], [5], [1, 9, 2], [0, 4, 4]])
+def test_extend_matches_append(chunks):
+    rng = np.random.default_rng(len(chunks))
+    appended, extended = ColumnarRingStore(4, ('a', 'b')), ColumnarRingStore(4, ('a', 'b'))
+    mirror_added, mirror_extended = MirrorWindow(4), MirrorWindow(4)
+    for store in (appended, extended):
+        store.add_symbol('x')
+    for chunk in chunks:
+        values = rng.normal(size=chunk).tolist()
+        for value in values:
+            appended.append('x', value, 2 * value)
+            mirror_added.Add(value)
+        extended.extend('x', values, [2 * value for value in values])
+        mirror_extended.extend(values)
+
+        for column in ('a', 'b'):
+            assert extended.window('x').oldest_first(column).tolist() == appended.window('x').oldest_first(column).tolist()
+            assert extended.window('x').newest_first(column).tolist() == appended.window('x').newest_first(column).tolist()
+        assert list(mirror_extended) == list(mirror_added)
+        assert mirror_extended.IsReady == mirror_added.IsReady
+    # appends after an extend continue from the same head
+    appended.append('x', 7., 8.)
+    extended.append('x', 7., 8.)
+    assert extended.window('x').oldest_first('b').tolist() == appended.window('x').oldest_first('b').tolist()
@@ -0,0 +1,93 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from sliding_stats import CrossoverCount, LastGradient, SlidingExtremes
+
+
+def chunked(rng, values):
+    '''values split into random runs, some longer than the windows, for extend'''
+    start = 0
+    while start < len(values):
+        length = int(rng.integers(0, 25))
+        yield values[start:start + length]
+        start += length
+
+
+@pytest.mark.parametrize('size', [1, 4, 30])
+def test_crossover_count_matches_list_count(size):
+    rng = np.random.default_rng(size)
+    # few levels so the series are often equal, which is not above
+    fast, slow = rng.integers(0, 3, 200).astype(float), rng.integers(0, 3, 200).astype(float)
+    added, extended = CrossoverCount(size), CrossoverCount(size)
+    ema50s, ema200s = deque(maxlen=size), deque(maxlen=size)
+    for f, s in zip(fast, slow):
+        added.Add(f, s)
+        ema50s.append(f)
+        ema200s.append(s)
+        # the loop the alpha ran over its two rolling windows
+        ema_trend = 0
+        for i in range(len(ema50s)):
+            if ema50s[i] > ema200s[i]:
+                ema_trend += 1
+        assert added.Value == ema_trend
+
+    flags = deque(maxlen=size)
+    for chunk in chunked(rng, list(zip(fast, slow))):
+        extended.extend([f for f, _ in chunk], [s for _, s in chunk])
+        flags.extend(f > s for f, s in chunk)
+        assert extended.Value == sum(flags)
+    # Add keeps counting from the extended window
+    for f, s in zip(fast[:size + 2], slow[:size + 2]):
+        extended.Add(f, s)
+        flags.append(f > s)
+        assert extended.Value == sum(flags)
+
+
+@pytest.mark.parametrize('size', [1, 3, 30])
+def test_sliding_extremes_match_max_and_min(size):
+    rng = np.random.default_rng(size)
+    values = rng.integers(0, 5, 300).astype(float).tolist()
+    added = SlidingExtremes(size)
+    window = deque(maxlen=size)
+    for value in values:
+        added.Add(value)
+        window.append(value)
+        assert added.Max == max(window)
+        assert added.Min == min(window)
+
+    extended = SlidingExtremes(size)
+    window.clear()
+    for chunk in chunked(rng, values):
+        extended.extend(chunk)
+        window.extend(chunk)
+        if window:
+            assert extended.Max == max(window)
+            assert extended.Min == min(window)
+        # extended deques keep sliding correctly
+        probe = SlidingExtremes(size)
+        probe.extend(list(window))
+        for value in values[:size + 2]:
+            probe.Add(value)
+        reference = deque(list(window) + values[:size + 2], maxlen=size)
+        assert probe.Max == max(reference)
+        assert probe.Min == min(reference)
+
+
+def test_last_gradient_matches_np_gradient():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=50).tolist()
+    added, extended = LastGradient(), LastGradient()
+    assert added.Value == 0
+    for n, value in enumerate(values, 1):
+        added.Add(value)
+        prices = values[max(n - 250, 0):n]
+        expected = 0 if len(prices) < 2 else np.gradient(prices)[-1]
+        assert added.Value == expected
+
+    fed = []
+    for chunk in chunked(rng, values):
+        extended.extend(chunk)
+        fed.extend(chunk)
+        assert extended.Value == (0 if len(fed) < 2 else np.gradient(fed)[-1])
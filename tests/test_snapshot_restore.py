@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from fake_lean import FakeAlgorithm, ObjectStore, SecurityChanges, bar_end_times, step, synthetic_hourly
+from alpha import custom_alpha
+from numpy_indicators import indicator_state
+
+
+TICKERS = ["MS", "HOOD", "DAL", "TOST", "APP"]
+START = datetime(2023, 1, 2)
+
+
+def start_alpha(algo):
+    alpha = custom_alpha(algo)
+    # only the NumPy indicators can be snapshotted
+    alpha.use_numpy_indicators = True
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+    # the start-up insights for the previous run's holdings aren't part of the comparison
+    alpha.symbols_invested_in_last_iteration = None
+    return alpha
+
+
+def alpha_state(alpha):
+    state = {}
+    for symbol in alpha.activeStocks:
+        key = str(symbol)
+        for name, table in alpha.indicator_tables().items():
+            for field, values in indicator_state(table[symbol], name + '.').items():
+                state[key, field] = values.tolist()
+        for name, windows in alpha.snapshot_windows().items():
+            state[key, name] = windows[symbol].oldest_first().tolist()
+        for prefix, store in (('bollinger_', alpha.bollinger_store), ('macd_', alpha.macd_store)):
+            for column in store.columns:
+                state[key, prefix + column] = store.window(symbol).oldest_first(column).tolist()
+        for name in ('price_trend_trackers', 'rsi_trend_trackers', 'obv_trend_trackers', 'ema_crossovers'):
+            state[key, name] = getattr(alpha, name)[symbol].Value
+        state[key, 'adx_extremes'] = (alpha.adx_extremes[symbol].Max, alpha.adx_extremes[symbol].Min)
+        state[key, 'derivative'] = alpha.ema50_derivative(symbol)
+        state[key, 'entry'] = (alpha.pending_entries.direction(symbol), alpha.pending_entries.bars_left(symbol))
+        state[key, 'trail'] = alpha.trailing_stops.trail(symbol)
+    return state
+
+
+@pytest.mark.parametrize("gap_days, warm_up", [(0, False), (3, False), (0, True), (3, True)])
+def test_restored_run_matches_uninterrupted_run(gap_days, warm_up):
+    hourly = synthetic_hourly(TICKERS, START, 340, seed=7)
+    days = sorted({bar.Time.date() for bar in hourly["MS"]})
+    live_start = datetime.combine(days[300], datetime.min.time())
+    saved_day, restart_day = days[320 - gap_days], days[321]
+    saved_at = datetime.combine(saved_day, datetime.min.time()) + timedelta(hours=16)
+    restart = datetime.combine(restart_day, datetime.min.time())
+
+    # uninterrupted run, saving a snapshot gap_days before the restart
+    algo = FakeAlgorithm(hourly, live_start)
+    alpha = start_alpha(algo)
+    for time in bar_end_times(algo, live_start, saved_at):
+        step(algo, alpha, time)
+    alpha.save_snapshot(algo)
+    saved = ObjectStore(algo.ObjectStore.contents)
+    for time in bar_end_times(algo, saved_at, restart):
+        step(algo, alpha, time)
+
+    # a new deployment restored from the snapshot, with a warm-up that starts before the snapshot was taken
+    warm_up_start = restart - timedelta(days=10) if warm_up else restart
+    restored_algo = FakeAlgorithm(hourly, warm_up_start, saved, start_date=restart)
+    restored = start_alpha(restored_algo)
+    assert restored.restored_state is not None
+    assert len(restored.deferred_restores) == (len(TICKERS) if warm_up else 0)
+    for time in bar_end_times(restored_algo, warm_up_start, restart):
+        step(restored_algo, restored, time)
+
+    next_bar = bar_end_times(algo, restart, restart + timedelta(days=1))[0]
+    insights = step(algo, alpha, next_bar)
+    restored_insights = step(restored_algo, restored, next_bar)
+    assert restored.restored_state[1] == {} and len(restored.deferred_restores) == 0
+
+    expected, actual = alpha_state(alpha), alpha_state(restored)
+    if gap_days > 0:
+        # entries armed while the algorithm was down aren't replayed
+        for state in (expected, actual):
+            for key in [key for key in state if key[1] in ('entry', 'trail')]:
+                del state[key]
+    else:
+        assert [insight.key() for insight in restored_insights] == [insight.key() for insight in insights]
+    assert actual == expected
+
+
+def test_snapshot_round_trips_indicator_state():
+    hourly = synthetic_hourly(TICKERS, START, 80, seed=3)
+    restart = datetime.combine(hourly["MS"][-1].Time.date(), datetime.min.time()) + timedelta(days=1)
+    algo = FakeAlgorithm(hourly, restart)
+    alpha = start_alpha(algo)
+    alpha.pending_entries.arm(algo.symbols["DAL"], -1)
+    alpha.entry_scores[algo.symbols["DAL"]] = 812
+    alpha.trailing_stops.open(algo.symbols["APP"], 101.5, 3, 1)
+    alpha.save_snapshot(algo)
+
+    restored = start_alpha(FakeAlgorithm(hourly, restart, algo.ObjectStore))
+    assert alpha_state(restored) == alpha_state(alpha)
+    assert restored.entry_scores[algo.symbols["DAL"]] == 812
+
+
+
+def test_no_snapshot_with_lean_indicators():
+    hourly = synthetic_hourly(TICKERS, START, 80, seed=3)
+    restart = datetime.combine(hourly["MS"][-1].Time.date(), datetime.min.time()) + timedelta(days=1)
+    algo = FakeAlgorithm(hourly, restart)
+    alpha = custom_alpha(algo)
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+    alpha.save_snapshot(algo)
+    assert algo.ObjectStore.contents == {}
+
+
+def test_stale_snapshot_is_ignored_with_a_warm_up():
+    hourly = synthetic_hourly(TICKERS, START, 80, seed=3)
+    days = sorted({bar.Time.date() for bar in hourly["MS"]})
+    saved_at = datetime.combine(days[60], datetime.min.time()) + timedelta(hours=16)
+    algo = FakeAlgorithm(hourly, saved_at)
+    start_alpha(algo).save_snapshot(algo)
+
+    # the warm-up starts within snapshot_max_age of the snapshot, but the start date doesn't
+    start = saved_at + timedelta(days=15)
+    restored = start_alpha(FakeAlgorithm(hourly, start - timedelta(days=10), algo.ObjectStore, start_date=start))
+    assert restored.restored_state is None and len(restored.deferred_restores) == 0
@@ -0,0 +1,15 @@
+import numpy as np
+
+from fake_lean import FakeAlgorithm, Symbol
+from symbol_lifecycle import SymbolLifecycle
+
+
+def test_memory_report_lists_the_largest_symbols():
+    lifecycle = SymbolLifecycle(FakeAlgorithm({}, None))
+    table = lifecycle.table("arrays")
+    for ticker, size in (("SPY", 10), ("QQQ", 1000), ("IWM", 100)):
+        table[Symbol(ticker)] = np.zeros(size)
+
+    report = lifecycle.memory_report(largest=2)
+    assert "tracked symbols: 3" in report
+    assert report.endswith("largest: QQQ 8000, IWM 800")
@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+
+from trailing_stops import TrailingStops
+
+
+class PeakPrices:
+    '''the peak_prices / hold_length dictionaries the alpha kept before TrailingStops'''
+    def __init__(self, multiplier):
+        self.atr_stop_multiplier = multiplier
+        self.peak_prices = {}
+        self.hold_length = {}
+
+    def open(self, key, price, direction):
+        self.peak_prices[key] = price
+        self.hold_length[key] = direction
+
+    def atr_trail_stop_loss(self, keys, prices, atrs, is_long):
+        stopped = set()
+        for key in keys:
+            if key in self.peak_prices and self.peak_prices[key] != None and key in self.hold_length:
+                if self.hold_length[key] != None:
+                    self.hold_length[key] += 1
+                price = prices[key]
+                if is_long[key]:
+                    if price > self.peak_prices[key]:
+                        self.peak_prices[key] = price
+                    if price < self.peak_prices[key] - self.atr_stop_multiplier * atrs[key]:
+                        stopped.add(key)
+                else:
+                    if price < self.peak_prices[key]:
+                        self.peak_prices[key] = price
+                    if price > self.peak_prices[key] + self.atr_stop_multiplier * atrs[key]:
+                        stopped.add(key)
+        for key in stopped:
+            self.hold_length[key] = None
+            self.peak_prices[key] = None
+        return stopped
+
+
+def atr_trail_stop_loss(stops, prices, atrs, is_long):
+    '''the alpha's pass over TrailingStops'''
+    if len(stops) == 0:
+        return set()
+    stopped = {stops.symbols[i] for i in stops.update([prices[key] for key in stops.symbols], [atrs[key] for key in stops.symbols],
+                                                      [is_long[key] for key in stops.symbols])}
+    for key in stopped:
+        stops.close(key)
+    return stopped
+
+
+def test_long_and_short_trails_ratchet_and_trigger():
+    stops = TrailingStops()
+    stops.open('long', 10., 3, 1)
+    stops.open('short', 10., 3, -1)
+    is_long = [True, False]
+    # the peak follows price in the trade's favour only
+    assert stops.update([12., 8.], [1., 1.], is_long).tolist() == []
+    assert stops.peak('long') == 12. and stops.peak('short') == 8.
+    assert stops.update([11., 9.], [1., 1.], is_long).tolist() == []
+    assert stops.peak('long') == 12. and stops.peak('short') == 8.
+    # exactly multiple * ATR away is not a stop
+    assert stops.update([9., 11.], [1., 1.], is_long).tolist() == []
+    assert stops.update([8.9, 10.], [1., 1.], is_long).tolist() == [0]
+    # the hold length counts from the entry's direction
+    assert stops.trail('long') == (12., 3., 5.)
+    stops.close('long')
+    assert stops.symbols == ['short']
+    stops.stop_counting('short')
+    assert stops.update([11.1], [1.], [False]).tolist() == [0]
+    assert stops.peak('short') == 8.
+    assert math.isnan(stops.trail('short')[2])
+
+
+def test_random_trails_match_peak_prices():
+    rng = np.random.default_rng(19)
+    symbols = ['s%d' % i for i in range(10)]
+    baseline, stops = PeakPrices(3), TrailingStops(initial_capacity=2)
+    is_long = {}
+    triggered = 0
+    for bar in range(1500):
+        for key in symbols:
+            draw = rng.random()
+            if draw < .03:
+                direction = 1 if rng.random() < .5 else -1
+                price = float(rng.normal(100, 5))
+                baseline.open(key, price, direction)
+                stops.open(key, price, 3, direction)
+                is_long[key] = direction > 0
+            elif draw < .04:
+                # an armed entry lapsing stops the hold count of any open trail
+                baseline.hold_length[key] = None
+                stops.stop_counting(key)
+        prices = {key: float(rng.normal(100, 5)) for key in symbols}
+        atrs = {key: float(rng.uniform(1, 3)) for key in symbols}
+        expected = baseline.atr_trail_stop_loss(symbols, prices, atrs, is_long)
+        assert atr_trail_stop_loss(stops, prices, atrs, is_long) == expected
+        triggered += len(expected)
+
+        for key in symbols:
+            if baseline.peak_prices.get(key) is None:
+                assert key not in stops
+            else:
+                peak, _, hold_length = stops.trail(key)
+                assert peak == baseline.peak_prices[key]
+                if baseline.hold_length[key] is None:
+                    assert math.isnan(hold_length)
+                else:
+                    assert hold_length == baseline.hold_length[key]
+    assert triggered > 50
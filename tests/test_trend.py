@@ -0,0 +1,105 @@
+from collections import deque
+
+import numpy as np
+import pytest
+from scipy.signal import argrelextrema
+
+import trendCalculator
+from trendCalculator import StreamingTrend, get_trend, get_trend_batch
+
+
+def series(rng, kind, length):
+    if kind == 'ties':
+        return rng.integers(0, 6, length).astype(float)
+    if kind == 'cycle':
+        return (np.arange(length) % 7).astype(float)
+    if kind == 'unrounded':
+        return 100 + np.cumsum(rng.normal(size=length))
+    return np.round(np.cumsum(rng.normal(size=length)), 2)
+
+
+@pytest.mark.parametrize('kind', ['ties', 'cycle', 'walk', 'unrounded'])
+@pytest.mark.parametrize('size, order, K', [(30, 5, 2), (150, 2, 2), (12, 1, 3), (7, 4, 2), (250, 3, 4)])
+def test_streaming_trend_matches_get_trend(kind, size, order, K):
+    rng = np.random.default_rng(size * 31 + order * 7 + K)
+    trend = StreamingTrend(size, order, K)
+    window = deque(maxlen=size)
+    for value in series(rng, kind, 3 * size + 20):
+        trend.Add(float(value))
+        window.appendleft(float(value))
+        assert trend.Value == get_trend(window, order, K)
+
+
+def test_get_trend_batch_matches_get_trend():
+    rng = np.random.default_rng(0)
+    windows = np.round(np.cumsum(rng.normal(size=(50, 30)), axis=1), 2)
+    expected = [get_trend(row, 5, 2) for row in windows]
+    np.testing.assert_array_equal(get_trend_batch(windows, 5, 2), expected)
+
+
+def baseline_patterns(data, comparator, breaks, order, K):
+    '''the argrelextrema loop the four getHigher/Lower* functions shared before scan_extrema'''
+    extrema_idx = argrelextrema(data, comparator, order=order)[0]
+    values = data[extrema_idx]
+    extrema = []
+    ex_deque = deque(maxlen=K)
+    for i, idx in enumerate(extrema_idx):
+        if i == 0:
+            ex_deque.append(idx)
+            continue
+        if breaks(values[i], values[i-1]):
+            ex_deque.clear()
+
+        ex_deque.append(idx)
+        if len(ex_deque) == K:
+            extrema.append(ex_deque.copy())
+
+    return extrema
+
+
+BASELINE = {'getHigherHighs': (np.greater, np.less), 'getHigherLows': (np.less, np.less),
+            'getLowerLows': (np.less, np.greater), 'getLowerHighs': (np.greater, np.greater)}
+
+
+def as_lists(patterns):
+    return [[int(idx) for idx in pattern] for pattern in patterns]
+
+
+def extrema_cases(seed, count):
+    '''random series with plateaus, short lengths and few extrema relative to K'''
+    rng = np.random.default_rng(seed)
+    for case in range(count):
+        length = int(rng.integers(0, 12)) if case % 3 == 0 else int(rng.integers(12, 120))
+        order, K = int(rng.integers(1, 6)), int(rng.integers(1, 6))
+        if case % 2:
+            # few distinct levels, repeated, so peaks and troughs sit on plateaus
+            data = np.repeat(rng.integers(0, 4, length), rng.integers(1, 4, length))[:length].astype(float)
+        else:
+            data = np.round(np.cumsum(rng.normal(size=length)), 1)
+        yield data, order, K
+
+
+def test_scan_extrema_matches_baseline_functions():
+    for data, order, K in extrema_cases(3, 600):
+        scanned = trendCalculator.scan_extrema(data, order, K)
+        for name, found in zip(('getHigherHighs', 'getHigherLows', 'getLowerLows', 'getLowerHighs'), scanned):
+            expected = as_lists(baseline_patterns(data, *BASELINE[name], order, K))
+            assert as_lists(found) == expected, (name, data.tolist(), order, K)
+            assert as_lists(getattr(trendCalculator, name)(data, order, K)) == expected
+
+
+def test_scan_extrema_edges():
+    plateau = np.array([1., 3., 3., 1., 0., 2., 2., 2., 0., 4., 1.])
+    for name, (comparator, breaks) in BASELINE.items():
+        for order in (1, 2, 3):
+            for K in (1, 2, 3, 4):
+                expected = as_lists(baseline_patterns(plateau, comparator, breaks, order, K))
+                assert as_lists(getattr(trendCalculator, name)(plateau, order, K)) == expected
+        for length in range(4):
+            data = np.arange(length, dtype=float)[::-1]
+            assert getattr(trendCalculator, name)(data, 2, 2) == []
+    # exactly K alternating extrema: one run in each rising family, none in the falling ones
+    rising = np.array([0., 1., 0., 2., 1., 3., 2., 4., 3.])
+    assert as_lists(trendCalculator.getHigherHighs(rising, 1, 4)) == [[1, 3, 5, 7]]
+    assert as_lists(trendCalculator.getHigherHighs(rising, 1, 5)) == []
+    assert as_lists(trendCalculator.getLowerLows(rising, 1, 2)) == []
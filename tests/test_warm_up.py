@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from fake_lean import FakeAlgorithm, SecurityChanges, bar_end_times, step, synthetic_hourly
+from alpha import custom_alpha
+from test_snapshot_restore import alpha_state
+
+
+TICKERS = ["MS", "HOOD", "DAL", "TOST", "APP"]
+
+
+def warmed_alpha(algo, vectorized):
+    alpha = custom_alpha(algo)
+    alpha.use_numpy_indicators = True
+    alpha.symbols_invested_in_last_iteration = None
+    if not vectorized:
+        def replay(symbols, hourly_history, daily_history):
+            for symbol in symbols:
+                alpha.replay_history(symbol, hourly_history[symbol], daily_history[symbol])
+        alpha.load_history = replay
+    alpha.OnSecuritiesChanged(algo, SecurityChanges(added=algo.securities()))
+    return alpha
+
+
+def test_loaded_history_matches_replayed_history():
+    hourly = synthetic_hourly(TICKERS, datetime(2021, 1, 4), 800, seed=13)
+    # shorter histories: trimmed by the window sizes, MACD not ready yet, a single bar
+    for ticker, days in (("HOOD", 140), ("DAL", 20), ("TOST", 6)):
+        hourly[ticker] = hourly[ticker][-7 * days:]
+    days = sorted({bar.Time.date() for bar in hourly["MS"]})
+    start = datetime.combine(days[-5], datetime.min.time())
+
+    algo, replayed_algo = FakeAlgorithm(hourly, start), FakeAlgorithm(hourly, start)
+    loaded, replayed = warmed_alpha(algo, True), warmed_alpha(replayed_algo, False)
+    assert alpha_state(loaded) == alpha_state(replayed)
+    for ticker in TICKERS:
+        symbol = algo.symbols[ticker]
+        assert loaded.last_daily_bar[symbol] == replayed.last_daily_bar[symbol]
+        assert loaded.last_hourly_bar[symbol] == replayed.last_hourly_bar[symbol]
+
+    for time in bar_end_times(algo, start, datetime.combine(days[-1], datetime.min.time())):
+        insights = step(algo, loaded, time)
+        assert [insight.key() for insight in insights] == [insight.key() for insight in step(replayed_algo, replayed, time)]
+    assert alpha_state(loaded) == alpha_state(replayed)
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class TrailingStops:
+    '''
+    Symbols with an active ATR trail. Peak price, ATR multiple and hold length
+    are kept in parallel arrays so every stop is checked in one vectorized
+    comparison per bar. A hold length of NaN means it is no longer counted.
+    '''
+    def __init__(self, initial_capacity=64):
+        self.symbols = []
+        self.index = {}
+        self.peaks = np.zeros(initial_capacity)
+        self.multiples = np.zeros(initial_capacity)
+        self.hold_lengths = np.zeros(initial_capacity)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def open(self, symbol, price, multiple, hold_length):
+        '''starts a trail at price, replacing any trail the symbol already has'''
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            if i == len(self.peaks):
+                self.peaks = np.concatenate([self.peaks, np.zeros_like(self.peaks)])
+                self.multiples = np.concatenate([self.multiples, np.zeros_like(self.multiples)])
+                self.hold_lengths = np.concatenate([self.hold_lengths, np.zeros_like(self.hold_lengths)])
+            self.symbols.append(symbol)
+            self.index[symbol] = i
+        self.peaks[i] = price
+        self.multiples[i] = multiple
+        self.hold_lengths[i] = hold_length
+
+    def close(self, symbol):
+        i = self.index.pop(symbol, None)
+        if i is None:
+            return
+        # move the last trail into the freed slot
+        last = len(self.symbols) - 1
+        if i != last:
+            moved = self.symbols[last]
+            self.symbols[i] = moved
+            self.index[moved] = i
+            self.peaks[i] = self.peaks[last]
+            self.multiples[i] = self.multiples[last]
+            self.hold_lengths[i] = self.hold_lengths[last]
+        self.symbols.pop()
+
+    def stop_counting(self, symbol):
+        i = self.index.get(symbol)
+        if i is not None:
+            self.hold_lengths[i] = np.nan
+
+    def peak(self, symbol):
+        i = self.index.get(symbol)
+        return None if i is None else float(self.peaks[i])
+
+    def trail(self, symbol):
+        '''(peak, multiple, hold length) of symbol's trail, None if it has none'''
+        i = self.index.get(symbol)
+        return None if i is None else (float(self.peaks[i]), float(self.multiples[i]), float(self.hold_lengths[i]))
+
+    def update(self, prices, atrs, is_long):
+        '''
+        prices, atrs and is_long are in the order of self.symbols. Counts a bar
+        of holding, ratchets each peak (up for longs, down for everything else)
+        and returns the indices whose price is further than multiple * ATR from
+        the peak.
+        '''
+        count = len(self.symbols)
+        prices = np.asarray(prices, dtype=np.float64)
+        atrs = np.asarray(atrs, dtype=np.float64)
+        is_long = np.asarray(is_long, dtype=bool)
+
+        self.hold_lengths[:count] += 1
+        peaks = np.where(is_long, np.fmax(self.peaks[:count], prices), np.fmin(self.peaks[:count], prices))
+        self.peaks[:count] = peaks
+        distance = self.multiples[:count] * atrs
+        stopped = np.where(is_long, prices < peaks - distance, prices > peaks + distance)
+        return np.flatnonzero(stopped)
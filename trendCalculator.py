@@ -1,170 +1,346 @@
-#region imports
-from AlgorithmImports import *
-#endregion
-import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from scipy.signal import argrelextrema
-from collections import deque
-from matplotlib.lines import Line2D
-from datetime import timedelta
-
-'''
-    Much of this code is sourced at the following link: https://raposa.trade/blog/higher-highs-lower-lows-and-calculating-price-trends-in-python/
-'''
-
-def getHigherLows(data: np.array, order, K):
-  '''
-  Finds consecutive higher lows in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive lows need to be higher.
-  '''
-  # Get lows
-  low_idx = argrelextrema(data, np.less, order=order)[0]
-  lows = data[low_idx]
-  # Ensure consecutive lows are higher than previous lows
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(low_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if lows[i] < lows[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def getLowerHighs(data: np.array, order=5, K=2):
-  '''
-  Finds consecutive lower highs in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive highs need to be lower.
-  '''
-  # Get highs
-  high_idx = argrelextrema(data, np.greater, order=order)[0]
-  highs = data[high_idx]
-  # Ensure consecutive highs are lower than previous highs
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(high_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if highs[i] > highs[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def getHigherHighs(data: np.array, order, K):
-  '''
-  Finds consecutive higher highs in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive highs need to be higher.
-  '''
-  # Get highs
-  high_idx = argrelextrema(data, np.greater, order = order)[0]
-  highs = data[high_idx]
-  # Ensure consecutive highs are higher than previous highs
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(high_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if highs[i] < highs[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def getLowerLows(data: np.array, order, K):
-  '''
-  Finds consecutive lower lows in price pattern.
-  Must not be exceeded within the number of periods indicated by the width 
-  parameter for the value to be confirmed.
-  K determines how many consecutive lows need to be lower.
-  '''
-  # Get lows
-  low_idx = argrelextrema(data, np.less, order=order)[0]
-  lows = data[low_idx]
-  # Ensure consecutive lows are lower than previous lows
-  extrema = []
-  ex_deque = deque(maxlen=K)
-  for i, idx in enumerate(low_idx):
-    if i == 0:
-      ex_deque.append(idx)
-      continue
-    if lows[i] > lows[i-1]:
-      ex_deque.clear()
-
-    ex_deque.append(idx)
-    if len(ex_deque) == K:
-      extrema.append(ex_deque.copy())
-
-  return extrema
-
-def get_trend(close_data, order, K):
-    '''
-    Get the trend of the stock
-    '''
-
-    close_data = [x for x in close_data]
-    close_data.reverse()
-
-    # data set to dataframe empty
-    data = pd.DataFrame()
-    data['Close'] = close_data
-    close = data['Close'].values
-
-    hh = getHigherHighs(close, order, K)
-    hl = getHigherLows(close, order, K)
-    ll = getLowerLows(close, order, K)
-    lh = getLowerHighs(close, order, K)
-
-
-    # format for tuples inside patterns: [type, location first price, location second price, first price, second price]
-    patterns = []
-    for pattern in hh:
-    # append a tuple with date and "hh"
-        patterns.append(('hh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-    for pattern in hl:
-        patterns.append(('hl', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-    for pattern in ll:
-        patterns.append(('ll', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-    for pattern in lh:
-        patterns.append(('lh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
-
-    # sort by the second date
-    patterns.sort(key=lambda x: x[2], reverse=True)
-
-    trend = 0
-
-    total_movements = patterns
-    total_swing_up = 0
-    total_swing_down = 0
-    for x in total_movements:
-        if x[0] == 'hh' or x[0] == 'hl':
-            total_swing_up += (x[4] - x[3])
-        else:
-            total_swing_down += (x[4] - x[3])
-    
-    total_swing = total_swing_up + total_swing_down
-
-    return total_swing
-                           
-
-
+import numpy as np
+import matplotlib.pyplot as plt
+from collections import deque
+from itertools import islice
+from matplotlib.lines import Line2D
+from datetime import timedelta
+
+'''
+    Much of this code is sourced at the following link: https://raposa.trade/blog/higher-highs-lower-lows-and-calculating-price-trends-in-python/
+'''
+
+def scan_extrema(data: np.array, order, K):
+  '''
+  Finds peaks and troughs once (same rule as argrelextrema with mode='clip')
+  and labels all four swing patterns in a single pass over them.
+  Returns (hh, hl, ll, lh), each a list of the index deques that
+  getHigherHighs, getHigherLows, getLowerLows and getLowerHighs return.
+  '''
+  data = np.asarray(data)
+  n = len(data)
+  locs = np.arange(n)
+  is_high = np.ones(n, dtype=bool)
+  is_low = np.ones(n, dtype=bool)
+  for shift in range(1, order + 1):
+    plus = data[np.clip(locs + shift, 0, n - 1)]
+    minus = data[np.clip(locs - shift, 0, n - 1)]
+    is_high &= (data > plus) & (data > minus)
+    is_low &= (data < plus) & (data < minus)
+
+  hh, hl, ll, lh = [], [], [], []
+  higher_highs, lower_highs = deque(maxlen=K), deque(maxlen=K)
+  higher_lows, lower_lows = deque(maxlen=K), deque(maxlen=K)
+  last_high = last_low = None
+  for idx in np.flatnonzero(is_high | is_low):
+    value = data[idx]
+    if is_high[idx]:
+      first = last_high is None
+      _extend_run(higher_highs, idx, not first and value < last_high, first, hh)
+      _extend_run(lower_highs, idx, not first and value > last_high, first, lh)
+      last_high = value
+    else:
+      first = last_low is None
+      _extend_run(higher_lows, idx, not first and value < last_low, first, hl)
+      _extend_run(lower_lows, idx, not first and value > last_low, first, ll)
+      last_low = value
+
+  return hh, hl, ll, lh
+
+def _extend_run(ex_deque, idx, broken, first, extrema):
+  if broken:
+    ex_deque.clear()
+
+  ex_deque.append(idx)
+  if not first and len(ex_deque) == ex_deque.maxlen:
+    extrema.append(ex_deque.copy())
+
+def getHigherLows(data: np.array, order, K):
+  '''
+  Finds consecutive higher lows in price pattern.
+  Must not be exceeded within the number of periods indicated by the width
+  parameter for the value to be confirmed.
+  K determines how many consecutive lows need to be higher.
+  '''
+  return scan_extrema(data, order, K)[1]
+
+def getLowerHighs(data: np.array, order=5, K=2):
+  '''
+  Finds consecutive lower highs in price pattern.
+  Must not be exceeded within the number of periods indicated by the width
+  parameter for the value to be confirmed.
+  K determines how many consecutive highs need to be lower.
+  '''
+  return scan_extrema(data, order, K)[3]
+
+def getHigherHighs(data: np.array, order, K):
+  '''
+  Finds consecutive higher highs in price pattern.
+  Must not be exceeded within the number of periods indicated by the width
+  parameter for the value to be confirmed.
+  K determines how many consecutive highs need to be higher.
+  '''
+  return scan_extrema(data, order, K)[0]
+
+def getLowerLows(data: np.array, order, K):
+  '''
+  Finds consecutive lower lows in price pattern.
+  Must not be exceeded within the number of periods indicated by the width
+  parameter for the value to be confirmed.
+  K determines how many consecutive lows need to be lower.
+  '''
+  return scan_extrema(data, order, K)[2]
+
+def get_trend(close_data, order, K):
+    '''
+    Get the trend of the stock
+    '''
+
+    # rolling windows are most recent first, the scan wants oldest first
+    close = np.fromiter(close_data, dtype=np.float64)[::-1]
+
+    hh, hl, ll, lh = scan_extrema(close, order, K)
+
+    # format for tuples inside patterns: [type, location first price, location second price, first price, second price]
+    patterns = []
+    for pattern in hh:
+    # append a tuple with date and "hh"
+        patterns.append(('hh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+    for pattern in hl:
+        patterns.append(('hl', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+    for pattern in ll:
+        patterns.append(('ll', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+    for pattern in lh:
+        patterns.append(('lh', pattern[0], pattern[1], close[pattern[0]], close[pattern[1]]))
+
+    # sort by the second date
+    patterns.sort(key=lambda x: x[2], reverse=True)
+
+    trend = 0
+
+    total_movements = patterns
+    total_swing_up = 0
+    total_swing_down = 0
+    for x in total_movements:
+        if x[0] == 'hh' or x[0] == 'hl':
+            total_swing_up += (x[4] - x[3])
+        else:
+            total_swing_down += (x[4] - x[3])
+    
+    total_swing = total_swing_up + total_swing_down
+
+    return total_swing
+
+
+def _relative_extrema_mask(data, comparator, order):
+    '''
+    Row-wise equivalent of argrelextrema(row, comparator, order=order) with the
+    default 'clip' mode, returned as a boolean mask instead of index arrays.
+    '''
+    n = data.shape[1]
+    locs = np.arange(n)
+    mask = np.ones(data.shape, dtype=bool)
+    for shift in range(1, order + 1):
+        mask &= comparator(data, data[:, np.clip(locs + shift, 0, n - 1)])
+        mask &= comparator(data, data[:, np.clip(locs - shift, 0, n - 1)])
+    return mask
+
+def _swing_contributions(data, mask, breaks_run, K):
+    '''
+    Replays the K-deque run logic of getHigherHighs and friends for every row
+    at once. Returns (rows, columns, swings) where each swing is
+    close[pattern[1]] - close[pattern[0]] and columns holds pattern[1].
+    '''
+    n = data.shape[1]
+    j = np.arange(n)
+    # move each row's extrema to the front, keeping them in time order
+    pos = np.argsort(~mask, axis=1, kind='stable')
+    vals = np.take_along_axis(data, pos, axis=1)
+    valid = j < mask.sum(axis=1)[:, None]
+
+    # a run restarts on the first extremum and wherever the pattern is broken
+    breaks = np.zeros(data.shape, dtype=bool)
+    breaks[:, 0] = True
+    breaks[:, 1:] = breaks_run(vals[:, 1:], vals[:, :-1])
+    run_start = np.maximum.accumulate(np.where(breaks, j, 0), axis=1)
+    found = valid & (j - run_start + 1 >= K)
+
+    rows, last = np.nonzero(found)
+    first = last - K + 1
+    second = first + 1
+    swings = vals[rows, second] - vals[rows, first]
+    return rows, pos[rows, second], swings
+
+def get_trend_batch(close_data, order, K):
+    '''
+    Vectorized get_trend over a universe of windows.
+    close_data is a 2-D array with one row per symbol, each row ordered like the
+    rolling windows passed to get_trend (most recent value first).
+    Returns one total swing per row, equal to get_trend on that row.
+    '''
+    if K < 2:
+        raise ValueError("K must be at least 2 to form a swing")
+
+    close = np.asarray(close_data, dtype=np.float64)[:, ::-1]
+    if close.shape[1] == 0:
+        return np.zeros(close.shape[0])
+
+    highs = _relative_extrema_mask(close, np.greater, order)
+    lows = _relative_extrema_mask(close, np.less, order)
+
+    # swings are placed at their pattern[1] column so that summing from the last
+    # column backwards reproduces get_trend's sort order and float rounding
+    swing_up = np.zeros(close.shape)
+    swing_down = np.zeros(close.shape)
+    families = ((highs, np.less, swing_up),      # hh
+                (lows, np.less, swing_up),       # hl
+                (lows, np.greater, swing_down),  # ll
+                (highs, np.greater, swing_down)) # lh
+    for mask, breaks_run, swing in families:
+        rows, cols, swings = _swing_contributions(close, mask, breaks_run, K)
+        swing[rows, cols] = swings
+
+    total_swing_up = np.cumsum(swing_up[:, ::-1], axis=1)[:, -1]
+    total_swing_down = np.cumsum(swing_down[:, ::-1], axis=1)[:, -1]
+    return total_swing_up + total_swing_down
+
+
+class StreamingTrend:
+    '''
+    Incremental get_trend over a rolling window that is fed one value at a time.
+    Extrema whose full order-wide neighbourhood is inside the window are confirmed
+    once when the value order bars after them arrives, and expire as they slide out.
+    A swing only depends on the K-1 extrema before it, so it is cached with its
+    extremum; only the order-wide edges of the window, where argrelextrema's clip
+    mode makes extrema provisional, and the swings that reach into them are
+    recomputed when Value is read. The swings are then summed from the newest
+    pattern to the oldest, as get_trend sorts them, so Value equals get_trend over
+    the same window exactly.
+    '''
+    # a family's run is broken by a lower extremum (hh, hl) or a higher one (lh, ll)
+    BREAKS = (lambda a, b: a < b, lambda a, b: a > b)
+
+    def __init__(self, size, order, K):
+        if K < 2:
+            raise ValueError("K must be at least 2 to form a swing")
+        self.size = size
+        self.order = order
+        self.K = K
+        self.values = deque(maxlen=size)
+        self.samples = 0
+        # confirmed interior extrema as (absolute index, value, swing of each family), oldest first
+        self.highs = deque()
+        self.lows = deque()
+        self._value = 0
+
+    @property
+    def Count(self):
+        return len(self.values)
+
+    @property
+    def IsReady(self):
+        return len(self.values) == self.size
+
+    @property
+    def Value(self):
+        if self._value is None:
+            self._value = self._compute()
+        return self._value
+
+    def Add(self, value):
+        self.values.append(value)
+        self.samples += 1
+        self._value = None
+        start = self.samples - len(self.values)
+
+        # the value order bars back now has its full neighbourhood in the window
+        candidate = self.samples - 1 - self.order
+        if candidate - self.order >= start:
+            i = candidate - start
+            if self._is_extremum(i, i - self.order, i + self.order, greater=True):
+                self._confirm(self.highs, candidate, self.values[i])
+            elif self._is_extremum(i, i - self.order, i + self.order, greater=False):
+                self._confirm(self.lows, candidate, self.values[i])
+
+        # extrema that drifted into the left edge are re-scanned from the window
+        for confirmed in (self.highs, self.lows):
+            while confirmed and confirmed[0][0] - start < self.order:
+                confirmed.popleft()
+
+    def _confirm(self, confirmed, index, value):
+        extrema = [entry[:2] for entry in islice(confirmed, max(len(confirmed) - self.K + 1, 0), None)]
+        extrema.append((index, value))
+        swings = tuple(self._swing(extrema, len(extrema) - 1, breaks) for breaks in self.BREAKS)
+        confirmed.append((index, value, swings))
+
+    def _is_extremum(self, i, lo, hi, greater):
+        value = self.values[i]
+        for j in range(max(lo, 0), min(hi, len(self.values) - 1) + 1):
+            if j == i:
+                continue
+            other = self.values[j]
+            if (greater and not value > other) or (not greater and not value < other):
+                return False
+        return True
+
+    def _edge_extrema(self, first, last):
+        '''(highs, lows) as (window index, value) among indices first..last-1, under argrelextrema's clip mode'''
+        highs, lows = [], []
+        if first >= last:
+            return highs, lows
+        lo = max(first - self.order, 0)
+        segment = [self.values[j] for j in range(lo, min(last + self.order, len(self.values)))]
+        for k in range(first - lo, last - lo):
+            value = segment[k]
+            neighbours = segment[max(k - self.order, 0):k] + segment[k + 1:k + self.order + 1]
+            if value > max(neighbours):
+                highs.append((lo + k, value))
+            elif value < min(neighbours):
+                lows.append((lo + k, value))
+        return highs, lows
+
+    def _swing(self, extrema, p, breaks):
+        '''
+        (pattern[1], swing) of the pattern getHigher/Lower* find when they reach
+        extrema[p], or None: the run is the last K extrema since the last break,
+        and swing is close[pattern[1]] - close[pattern[0]]
+        '''
+        first = p - self.K + 1
+        if first < 0:
+            return None
+        for j in range(p, first, -1):
+            if breaks(extrema[j][1], extrema[j - 1][1]):
+                return None
+        return extrema[first + 1][0], extrema[first + 1][1] - extrema[first][1]
+
+    def _compute(self):
+        n = len(self.values)
+        start = self.samples - n
+        left_edge = self._edge_extrema(1, min(self.order, n - 1))
+        right_edge = self._edge_extrema(max(n - self.order, self.order), n - 1)
+        families = ([], [])
+        for kind, confirmed in enumerate((self.highs, self.lows)):
+            left = [(start + index, value) for index, value in left_edge[kind]]
+            right = [(start + index, value) for index, value in right_edge[kind]]
+            # the first K-1 confirmed extrema may have lost their run to the left edge
+            head = left + [entry[:2] for entry in islice(confirmed, self.K - 1)]
+            if len(confirmed) >= self.K - 1:
+                tail = [entry[:2] for entry in islice(confirmed, len(confirmed) - self.K + 1, None)] + right
+            else:
+                tail = head[-(self.K - 1):] + right
+            for f, breaks in enumerate(self.BREAKS):
+                swings = families[f]
+                for p in range(len(head)):
+                    swings.append(self._swing(head, p, breaks))
+                swings.extend(entry[2][f] for entry in islice(confirmed, self.K - 1, None))
+                for p in range(len(tail) - len(right), len(tail)):
+                    swings.append(self._swing(tail, p, breaks))
+
+        # get_trend adds the swings up and down separately, newest pattern first
+        totals = []
+        for swings in families:
+            swings = sorted((swing for swing in swings if swing is not None), reverse=True)
+            total = 0
+            for _, swing in swings:
+                total += swing
+            totals.append(total)
+        return totals[0] + totals[1]